@@ -0,0 +1,326 @@
+"""
+compact, column-oriented storage for very large applicant populations.
+
+every applicant field is a typed array (struct of arrays) instead of an
+attribute of its own object, names are interned once and stored as ids.
+ApplicantView gives applicant-like access to a single row.
+"""
+import csv
+import json
+from array import array
+from typing import (Any, Dict, Iterable, Iterator, List,
+                    Mapping, Optional, Union)
+
+from applicants import Applicant
+from batch_eval import (BatchEvaluator, BatchResult,
+                        category_code, check_modifier, score_row)
+from intelligence import BackgroundCheck
+from scoring import CATEGORIES, RULES
+
+_NO_CHECK = -1
+_TRUE_STRINGS = {'1', 'true', 'yes', 'y'}
+
+
+class ApplicantView:
+    """
+    applicant-like view of one row of an ApplicantTable.
+    """
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'ApplicantTable', row: int) -> None:
+        self._table = table
+        self._row = row
+
+    @property
+    def firstname(self) -> str:
+        """
+        applicant's first name.
+        """
+        return self._table.names[self._table.first_names[self._row]]
+
+    @property
+    def lastname(self) -> str:
+        """
+        applicant's last name.
+        """
+        return self._table.names[self._table.last_names[self._row]]
+
+    @property
+    def kind(self) -> int:
+        """
+        applicant's type code, NORMAL, THIRD_WORLD, VIP or the code of a
+        registered category.
+        """
+        return self._table.kinds[self._row]
+
+    @property
+    def language_score(self) -> int:
+        """
+        applicant's language score.
+        """
+        return self._table.language_scores[self._row]
+
+    @property
+    def desired_skill(self) -> bool:
+        """
+        whether the applicant has a desired skill.
+        """
+        return bool(self._table.desired_skills[self._row])
+
+    @property
+    def class_modifier(self) -> int:
+        """
+        applicant's class modifier, 0 unless the category uses it.
+        """
+        return self._table.class_modifiers[self._row]
+
+    @property
+    def background_check(self) -> Optional[BackgroundCheck]:
+        """
+        applicant's background check, None if there is none.
+        """
+        level = self._table.check_levels[self._row]
+        if level == _NO_CHECK:
+            return None
+        return BackgroundCheck(level,
+                               bool(self._table.check_sanctioned[self._row]))
+
+    def get_fullname(self) -> str:
+        """
+        returns applicant's full name (first name and last name).
+        """
+        fullname = f"{self.firstname} {self.lastname}"
+        return fullname
+
+    def __reduce__(self) -> tuple:
+        """
+        pickles the row's values only, not the whole table, it is
+        unpickled as a view of a table of its own.
+        """
+        table = self._table
+        row = self._row
+        return _view_of_row, (
+            self.firstname, self.lastname, table.kinds[row],
+            table.language_scores[row], table.desired_skills[row],
+            table.class_modifiers[row], table.check_levels[row],
+            table.check_sanctioned[row])
+
+    @property
+    def score(self) -> Union[int, str]:
+        """
+        applicant's score, as the applicant classes compute it.
+        """
+        return score_row(self.language_score, self.desired_skill,
+                         self.class_modifier, self.kind)[0]
+
+    @property
+    def status(self) -> str:
+        """
+        applicant's visa status, as the applicant classes compute it.
+        """
+        granted = score_row(self.language_score, self.desired_skill,
+                            self.class_modifier, self.kind)[1]
+        return 'GRANTED' if granted else 'DENIED'
+
+
+Applicant.register(ApplicantView)
+
+
+class ApplicantTable:
+    """
+    applicants stored as typed column arrays.
+    """
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.first_names = array('I')
+        self.last_names = array('I')
+        self.kinds = array('b')
+        self.language_scores = array('h')
+        self.desired_skills = array('b')
+        self.class_modifiers = array('h')
+        self.check_levels = array('h')
+        self.check_sanctioned = array('b')
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, row: int) -> ApplicantView:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('applicant row out of range')
+        return ApplicantView(self, row)
+
+    def __iter__(self) -> Iterator[ApplicantView]:
+        for row in range(len(self)):
+            yield ApplicantView(self, row)
+
+    def _intern(self, name: str) -> int:
+        """
+        returns the id of name, adding it to names if new.
+        """
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, firstname: str, lastname: str, kind: int,
+               language_score: int = 0, desired_skill: bool = False,
+               class_modifier: int = 0,
+               check_level: Optional[int] = None,
+               check_sanctioned: bool = False) -> None:
+        """
+        adds an applicant. raises value error if the type is unknown or
+        an applicant whose category uses the class modifier has a
+        positive one.
+        Parameters
+        ----------
+        firstname: str:
+            applicant's first name.
+        lastname: str:
+            applicant's last name.
+        kind: int:
+            NORMAL, THIRD_WORLD, VIP or a registered category's code.
+        language_score: int:
+            applicant's language score.
+        desired_skill: bool:
+            whether the applicant has a desired skill.
+        class_modifier: int:
+            applicant's modifier, ignored unless the category uses it.
+        check_level: Optional[int]:
+            terrorism threat level of the background check,
+            no background check if None.
+        check_sanctioned: bool:
+            whether the background check found the applicant sanctioned.
+        """
+        if not 0 <= kind < len(CATEGORIES):
+            raise ValueError(f'unknown applicant type {kind}')
+        check_modifier(class_modifier, kind)
+        if not RULES[CATEGORIES[kind]].use_class_modifier:
+            class_modifier = 0
+        self.first_names.append(self._intern(firstname))
+        self.last_names.append(self._intern(lastname))
+        self.kinds.append(kind)
+        self.language_scores.append(language_score)
+        self.desired_skills.append(bool(desired_skill))
+        self.class_modifiers.append(class_modifier)
+        self.check_levels.append(_NO_CHECK if check_level is None
+                                 else check_level)
+        self.check_sanctioned.append(bool(check_sanctioned))
+
+    def append_applicant(self, applicant: Applicant) -> None:
+        """
+        copies an applicant object into the table.
+        Parameters
+        ----------
+        applicant: Applicant:
+            NormalApplicant, ThirdWorldApplicant or VIPApplicant.
+        """
+        check = applicant.background_check
+        self.append(applicant.firstname, applicant.lastname,
+                    category_code(applicant),
+                    getattr(applicant, 'language_score', 0),
+                    getattr(applicant, 'desired_skill', False),
+                    getattr(applicant, 'class_modifier', 0),
+                    None if check is None else check.level,
+                    False if check is None else check.sanctioned)
+
+    def append_record(self, record: Mapping[str, Any]) -> None:
+        """
+        adds an applicant from a loaded CSV row or JSON object with keys
+        firstname, lastname, type (normal, third_world, vip or a
+        registered category) and
+        optionally language_score, desired_skill, class_modifier,
+        check_level and check_sanctioned.
+        Parameters
+        ----------
+        record: Mapping[str, Any]:
+            the applicant's fields.
+        """
+        check_level = record.get('check_level')
+        self.append(record['firstname'], record['lastname'],
+                    CATEGORIES.index(record['type']),
+                    int(record.get('language_score') or 0),
+                    _to_bool(record.get('desired_skill')),
+                    int(record.get('class_modifier') or 0),
+                    None if check_level in (None, '') else int(check_level),
+                    _to_bool(record.get('check_sanctioned')))
+
+    def extend_records(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """
+        adds every record, see append_record.
+        Parameters
+        ----------
+        records: Iterable[Mapping[str, Any]]:
+            applicants' fields.
+        """
+        for record in records:
+            self.append_record(record)
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'ApplicantTable':
+        """
+        streams a CSV file with a header row into a new table.
+        Parameters
+        ----------
+        path: str:
+            path of the CSV file.
+        """
+        table = cls()
+        with open(path, newline='', encoding='utf-8') as file:
+            table.extend_records(csv.DictReader(file))
+        return table
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> 'ApplicantTable':
+        """
+        streams a file of one JSON object per line into a new table.
+        Parameters
+        ----------
+        path: str:
+            path of the JSON lines file.
+        """
+        table = cls()
+        with open(path, encoding='utf-8') as file:
+            table.extend_records(json.loads(line)
+                                 for line in file if line.strip())
+        return table
+
+    def evaluate(self) -> BatchResult:
+        """
+        scores every applicant at once with BatchEvaluator.
+        """
+        return BatchEvaluator.evaluate(self.language_scores,
+                                       self.desired_skills,
+                                       self.class_modifiers, self.kinds)
+
+
+def _view_of_row(firstname: str, lastname: str, kind: int,
+                 language_score: int, desired_skill: int,
+                 class_modifier: int, check_level: int,
+                 check_sanctioned: int) -> ApplicantView:
+    """
+    returns a view of a one row table holding the given column values,
+    see ApplicantView.__reduce__.
+    """
+    table = ApplicantTable()
+    table.first_names.append(table._intern(firstname))
+    table.last_names.append(table._intern(lastname))
+    table.kinds.append(kind)
+    table.language_scores.append(language_score)
+    table.desired_skills.append(desired_skill)
+    table.class_modifiers.append(class_modifier)
+    table.check_levels.append(check_level)
+    table.check_sanctioned.append(check_sanctioned)
+    return ApplicantView(table, 0)
+
+
+def _to_bool(value: Any) -> bool:
+    """
+    reads a boolean from a JSON value or a CSV string.
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_STRINGS
+    return bool(value)
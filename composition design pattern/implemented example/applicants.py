@@ -3,12 +3,125 @@ contains classes for Visa application process.
 """
 from abc import (ABCMeta,
                  abstractmethod)
+from typing import Tuple
+
+from scoring import RULES, ScoringRule, register_category
+
+
+def _rule_properties(rule: ScoringRule) -> Tuple[property, property]:
+    """
+    returns score and status properties computing rule, its numbers are
+    bound into the getters so scoring an applicant does no rule lookups
+    and status does not go through score.
+
+    Parameters
+    ----------
+    rule: ScoringRule:
+        rule of the category.
+    """
+    if rule.auto_grant:
+        auto_score = rule.auto_score
+
+        def score_auto_granted(self) -> str:
+            """
+            returns the category's score instead of a number, auto-pass.
+            """
+            return auto_score
+
+        def status_auto_granted(self) -> str:
+            """
+            automatically passed status check, visa granted.
+            """
+            return 'GRANTED'
+        return property(score_auto_granted), property(status_auto_granted)
+
+    base = rule.base
+    bonus = rule.skill_bonus
+    threshold = rule.language_threshold
+    pass_score = rule.pass_score
+
+    if rule.use_class_modifier:
+        def score(self) -> int:
+            """
+            calculates applicant score based on job desirability
+            and language skill.
+            """
+            score = base + self.class_modifier
+            if self.desired_skill:
+                score += bonus
+            language_score = self.language_score
+            if language_score > threshold:
+                score += language_score - threshold
+            return score
+    else:
+        def score(self) -> int:
+            """
+            calculates applicant score based on job desirability
+            and language skill.
+            """
+            score = base
+            if self.desired_skill:
+                score += bonus
+            language_score = self.language_score
+            if language_score > threshold:
+                score += language_score - threshold
+            return score
+
+    def status(self) -> str:
+        """
+        grants or denies visa depending on score
+        compared to required pass score.
+        """
+        return 'GRANTED' if score(self) >= pass_score else 'DENIED'
+    return property(score), property(status)
+
+
+def _status_by_score(self: 'Applicant') -> str:
+    """
+    grants or denies visa depending on score
+    compared to required pass score.
+    """
+    return 'GRANTED' if self.score >= self._pass_score else 'DENIED'
 
 
 class Applicant(metaclass=ABCMeta):
     """
     Interface for applicants.
+
+    a class declaring a scoring category (_category) without writing
+    score and status itself gets them compiled from the category's rule
+    when it is created. subclasses are scored the way they are written:
+    one setting its own _pass_score gets a category of its own, compiled
+    from its parent's rule, and one overriding score or status is scored
+    by its own properties, with _custom_scoring set so batch evaluation
+    refuses it.
     """
+    _custom_scoring = False
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, '_category', None) is None:
+            return
+        if '_category' in vars(cls):
+            if 'score' not in vars(cls) and 'status' not in vars(cls):
+                cls.score, cls.status = _rule_properties(
+                    RULES[cls._category])
+            return
+        owner = next(base for base in cls.__mro__
+                     if '_category' in vars(base))
+        if cls.score is not owner.score or cls.status is not owner.status:
+            cls._custom_scoring = True
+            if cls.status is owner.status and hasattr(cls, '_pass_score'):
+                cls.status = property(_status_by_score)
+            return
+        rule = RULES[cls._category]
+        pass_score = getattr(cls, '_pass_score', rule.pass_score)
+        if pass_score != rule.pass_score:
+            cls._category = f'{cls.__module__}.{cls.__qualname__}'
+            rule = rule._replace(pass_score=pass_score)
+            register_category(cls._category, rule)
+            cls.score, cls.status = _rule_properties(rule)
+
     def __init__(self, firstname: str, lastname: str) -> None:
         self.firstname = firstname
         self.lastname = lastname
@@ -42,8 +155,14 @@ class Applicant(metaclass=ABCMeta):
 class NormalApplicant(Applicant):
     """
     a normal applicant with no modifier or special treatment.
+
+    score and status follow the category's rule in scoring.RULES, a
+    subclass overriding score is granted if its score reaches
+    _pass_score.
     """
-    _pass_score = 2
+    _category = 'normal'
+    _pass_score = RULES[_category].pass_score
+    class_modifier = 0
 
     def __init__(self, firstname: str, lastname: str,
                  language_score: int, desired_skill: bool) -> None:
@@ -51,37 +170,14 @@ class NormalApplicant(Applicant):
         self.language_score = language_score
         self.desired_skill = desired_skill
 
-    @property
-    def score(self) -> int:
-        """
-        calculates applicant score based on job desirability
-        and language skill.
-        """
-        score = 0
-        if self.desired_skill:
-            score += 1
-        if self.language_score > 4:
-            score += (abs(self.language_score - 4))
-        return score
-
-    @property
-    def status(self) -> str:
-        """
-        grants or denies visa depending on score
-        compared to required pass score.
-        """
-        status = 'DENIED'
-        if self.score >= self._pass_score:
-            status = 'GRANTED'
-        return status
-
 
 class ThirdWorldApplicant(NormalApplicant):
     """
     applicants with a negative modifier to their visa score
     from third-world countries.
     """
-    _pass_score = 3
+    _category = 'third_world'
+    _pass_score = RULES[_category].pass_score
 
     def __init__(self, firstname: str, lastname: str,
                  language_score: int, desired_skill: bool,
@@ -110,35 +206,13 @@ class ThirdWorldApplicant(NormalApplicant):
                              'cannot have positive modifier')
         self._class_modifier = origin_country_mod
 
-    @property
-    def score(self) -> int:
-        """
-        calculates applicant score based on job desirability and
-        language skill.
-        """
-        score = self.class_modifier
-        if self.desired_skill:
-            score += 1
-        if self.language_score > 4:
-            score += (abs(self.language_score - 4))
-        return score
-
-    @property
-    def status(self) -> str:
-        """
-        grants or denies visa depending on score compared to
-        required pass score.
-        """
-        status = 'DENIED'
-        if self.score >= self._pass_score:
-            status = 'GRANTED'
-        return status
-
 
 class VIPApplicant(Applicant):
     """
     VIP applicants with special treatment.
     """
+    _category = 'vip'
+
     def __init__(self, firstname: str, lastname: str) -> None:
         super().__init__(firstname, lastname)
 
@@ -157,3 +231,4 @@ class VIPApplicant(Applicant):
         """
         status = 'GRANTED'
         return status
+
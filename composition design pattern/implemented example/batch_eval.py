@@ -0,0 +1,231 @@
+"""
+columnar batch scoring of visa applicants.
+
+instead of one applicant object at a time, applicants are given as
+parallel columns (language score, desired skill, class modifier and
+applicant type) and scored all at once. NumPy is used when installed,
+otherwise the columns are scored in plain Python, both give the same
+results as the per-object score and status properties.
+"""
+from typing import Any, List, NamedTuple, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from applicants import (Applicant,
+                        NormalApplicant,
+                        ThirdWorldApplicant,
+                        VIPApplicant)
+from scoring import CATEGORIES, CODE_SCORERS, RULES
+
+# applicant type codes used in the kinds column, positions in CATEGORIES.
+# categories added with scoring.register_category get the next codes.
+NORMAL = CATEGORIES.index(NormalApplicant._category)
+THIRD_WORLD = CATEGORIES.index(ThirdWorldApplicant._category)
+VIP = CATEGORIES.index(VIPApplicant._category)
+APPLICANT_TYPES = (NormalApplicant, ThirdWorldApplicant, VIPApplicant)
+
+
+def category_code(applicant: Applicant) -> int:
+    """
+    returns the type code of an applicant object or view.
+
+    Parameters
+    ----------
+    applicant: Applicant:
+        applicant with a _category, or an ApplicantView.
+    """
+    category = getattr(applicant, '_category', None)
+    if category is None:
+        return applicant.kind
+    if applicant._custom_scoring:
+        raise ValueError(f'{type(applicant).__name__} overrides score or '
+                         'status, it can only be scored as an object')
+    return CATEGORIES.index(category)
+
+
+def check_modifier(class_modifier: int, kind: int) -> None:
+    """
+    raises value error if an applicant whose category uses the class
+    modifier has a positive one.
+
+    Parameters
+    ----------
+    class_modifier: int:
+        applicant's modifier.
+    kind: int:
+        applicant's type code.
+    """
+    if class_modifier > 0 and RULES[CATEGORIES[kind]].use_class_modifier:
+        category = CATEGORIES[kind].replace('_', '-')
+        raise ValueError(f'{category} applicants '
+                         'cannot have positive modifier')
+
+
+def score_row(language_score: int, desired_skill: bool,
+              class_modifier: int, kind: int) -> Tuple[Union[int, str], bool]:
+    """
+    returns the score of a single applicant, as the score property would,
+    and whether they are granted visa. raises value error if an applicant
+    whose category uses the class modifier has a positive one.
+
+    Parameters
+    ----------
+    language_score: int:
+        applicant's language score.
+    desired_skill: bool:
+        whether the applicant has a desired skill.
+    class_modifier: int:
+        applicant's modifier, only used for categories whose rule says so.
+    kind: int:
+        type code, NORMAL, THIRD_WORLD, VIP or a registered category.
+    """
+    check_modifier(class_modifier, kind)
+    return CODE_SCORERS[kind](language_score, desired_skill, class_modifier)
+
+
+class BatchResult(NamedTuple):
+    """
+    scores and statuses of a batch, in input order.
+
+    scores of auto-granted (VIP) applicants are 0 in `scores` and flagged
+    in `vip`, score() and score_list() turn them back into "VIP".
+    """
+    scores: Any
+    vip: Any
+    granted: Any
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def score(self, index: int) -> Union[int, str]:
+        """
+        returns the score of one applicant, as the score property would.
+        """
+        if self.vip[index]:
+            return 'VIP'
+        return int(self.scores[index])
+
+    def status(self, index: int) -> str:
+        """
+        returns the status of one applicant, as the status property would.
+        """
+        return 'GRANTED' if self.granted[index] else 'DENIED'
+
+    def score_list(self) -> List[Union[int, str]]:
+        """
+        returns every score, as the score property would.
+        """
+        return [self.score(index) for index in range(len(self))]
+
+    def status_list(self) -> List[str]:
+        """
+        returns every status, as the status property would.
+        """
+        return ['GRANTED' if granted else 'DENIED'
+                for granted in self.granted]
+
+
+class BatchEvaluator:
+    """
+    scores and grants or denies whole batches of applicants.
+    """
+    @staticmethod
+    def columns(applicants: Sequence[Applicant]) -> tuple:
+        """
+        splits applicant objects into the evaluator's input columns.
+
+        Parameters
+        ----------
+        applicants: Sequence[Applicant]:
+            NormalApplicant, ThirdWorldApplicant or VIPApplicant objects.
+        """
+        language_scores, desired_skills, class_modifiers, kinds = \
+            [], [], [], []
+        for applicant in applicants:
+            kinds.append(category_code(applicant))
+            language_scores.append(getattr(applicant, 'language_score', 0))
+            desired_skills.append(bool(getattr(applicant, 'desired_skill',
+                                               False)))
+            class_modifiers.append(getattr(applicant, 'class_modifier', 0))
+        return language_scores, desired_skills, class_modifiers, kinds
+
+    @staticmethod
+    def evaluate(language_scores: Sequence[int],
+                 desired_skills: Sequence[bool],
+                 class_modifiers: Sequence[int],
+                 kinds: Sequence[int]) -> BatchResult:
+        """
+        scores a batch given as columns of equal length. raises value error
+        if a third-world applicant has a positive modifier, like
+        ThirdWorldApplicant does.
+
+        Parameters
+        ----------
+        language_scores: Sequence[int]:
+            language score of every applicant.
+        desired_skills: Sequence[bool]:
+            whether every applicant has a desired skill.
+        class_modifiers: Sequence[int]:
+            modifier of every applicant, only used for third-world ones.
+        kinds: Sequence[int]:
+            NORMAL, THIRD_WORLD or VIP for every applicant.
+        """
+        if np is None:
+            return BatchEvaluator._evaluate_python(
+                language_scores, desired_skills, class_modifiers, kinds)
+        return BatchEvaluator._evaluate_numpy(
+            language_scores, desired_skills, class_modifiers, kinds)
+
+    @staticmethod
+    def _evaluate_numpy(language_scores, desired_skills,
+                        class_modifiers, kinds) -> BatchResult:
+        """
+        NumPy implementation of evaluate.
+        """
+        rules = [RULES[category] for category in CATEGORIES]
+        language = np.asarray(language_scores, dtype=np.int64)
+        skills = np.asarray(desired_skills).astype(bool)
+        kinds = np.asarray(kinds, dtype=np.intp)
+        # per row rule values, looked up by type code.
+        uses_modifier = np.asarray([rule.use_class_modifier
+                                    for rule in rules])[kinds]
+        modifiers = np.where(uses_modifier,
+                             np.asarray(class_modifiers, dtype=np.int64), 0)
+        positive = modifiers > 0
+        if positive.any():
+            row = int(positive.argmax())
+            check_modifier(int(modifiers[row]), int(kinds[row]))
+        vip = np.asarray([rule.auto_grant for rule in rules])[kinds]
+        thresholds = np.asarray([rule.language_threshold
+                                 for rule in rules], dtype=np.int64)[kinds]
+        scores = (np.asarray([rule.base for rule in rules],
+                             dtype=np.int64)[kinds] + modifiers +
+                  np.where(skills, np.asarray([rule.skill_bonus
+                                               for rule in rules],
+                                              dtype=np.int64)[kinds], 0) +
+                  np.maximum(language - thresholds, 0))
+        scores[vip] = 0
+        pass_scores = np.asarray([rule.pass_score for rule in rules],
+                                 dtype=np.int64)[kinds]
+        granted = vip | (scores >= pass_scores)
+        return BatchResult(scores, vip, granted)
+
+    @staticmethod
+    def _evaluate_python(language_scores, desired_skills,
+                         class_modifiers, kinds) -> BatchResult:
+        """
+        plain Python implementation of evaluate.
+        """
+        auto_granted = [RULES[category].auto_grant for category in CATEGORIES]
+        scores, vips, granted = [], [], []
+        for language, skill, modifier, kind in zip(
+                language_scores, desired_skills, class_modifiers, kinds):
+            score, passed = score_row(language, skill, modifier, kind)
+            vip = auto_granted[kind]
+            scores.append(0 if vip else score)
+            vips.append(vip)
+            granted.append(passed)
+        return BatchResult(scores, vips, granted)
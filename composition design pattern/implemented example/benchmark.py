@@ -0,0 +1,315 @@
+"""
+benchmarks the evaluation pipeline of the composition example.
+
+run from this directory:
+python benchmark.py [applicants] [normal:third_world:vip mix]
+"""
+import random
+import sys
+import time
+from typing import Sequence
+
+from applicants import (Applicant,
+                        NormalApplicant,
+                        ThirdWorldApplicant,
+                        VIPApplicant)
+from batch_eval import BatchEvaluator
+from eval_sys import ApplicantEvalSystem
+from instrumentation import StageStats
+from intelligence import BackgroundCheck, BackgroundCheckCache
+from scoring import CODE_SCORERS
+
+
+class ReferenceNormalApplicant(Applicant):
+    """
+    NormalApplicant as it was before scoring.py, the baseline
+    bench_scoring compares against.
+    """
+    _pass_score = 2
+
+    def __init__(self, firstname: str, lastname: str,
+                 language_score: int, desired_skill: bool) -> None:
+        super().__init__(firstname, lastname)
+        self.language_score = language_score
+        self.desired_skill = desired_skill
+
+    @property
+    def score(self) -> int:
+        score = 0
+        if self.desired_skill:
+            score += 1
+        if self.language_score > 4:
+            score += (abs(self.language_score - 4))
+        return score
+
+    @property
+    def status(self) -> str:
+        status = 'DENIED'
+        if self.score >= self._pass_score:
+            status = 'GRANTED'
+        return status
+
+
+class ReferenceThirdWorldApplicant(ReferenceNormalApplicant):
+    """
+    ThirdWorldApplicant as it was before scoring.py.
+    """
+    _pass_score = 3
+
+    def __init__(self, firstname: str, lastname: str,
+                 language_score: int, desired_skill: bool,
+                 origin_country_mod: int) -> None:
+        super().__init__(firstname, lastname, language_score, desired_skill)
+        self.class_modifier = origin_country_mod
+
+    @property
+    def class_modifier(self) -> int:
+        return self._class_modifier
+
+    @class_modifier.setter
+    def class_modifier(self, origin_country_mod: int) -> None:
+        if origin_country_mod > 0:
+            raise ValueError('third-world applicants '
+                             'cannot have positive modifier')
+        self._class_modifier = origin_country_mod
+
+    @property
+    def score(self) -> int:
+        score = self.class_modifier
+        if self.desired_skill:
+            score += 1
+        if self.language_score > 4:
+            score += (abs(self.language_score - 4))
+        return score
+
+    @property
+    def status(self) -> str:
+        status = 'DENIED'
+        if self.score >= self._pass_score:
+            status = 'GRANTED'
+        return status
+
+
+class ReferenceVIPApplicant(Applicant):
+    """
+    VIPApplicant as it was before scoring.py.
+    """
+    @property
+    def score(self) -> str:
+        score = "VIP"
+        return score
+
+    @property
+    def status(self) -> str:
+        status = 'GRANTED'
+        return status
+
+
+def reference_applicants(applicants: list) -> list:
+    """
+    returns copies of applicants as instances of the reference classes.
+
+    Parameters
+    ----------
+    applicants: list:
+        NormalApplicant, ThirdWorldApplicant or VIPApplicant objects.
+    """
+    copies = []
+    for applicant in applicants:
+        if isinstance(applicant, ThirdWorldApplicant):
+            copies.append(ReferenceThirdWorldApplicant(
+                applicant.firstname, applicant.lastname,
+                applicant.language_score, applicant.desired_skill,
+                applicant.class_modifier))
+        elif isinstance(applicant, NormalApplicant):
+            copies.append(ReferenceNormalApplicant(
+                applicant.firstname, applicant.lastname,
+                applicant.language_score, applicant.desired_skill))
+        else:
+            copies.append(ReferenceVIPApplicant(applicant.firstname,
+                                                applicant.lastname))
+    return copies
+
+
+def make_applicants(count: int, mix: Sequence[float] = (1, 1, 1),
+                    failed_ratio: float = 0.1, unchecked_ratio: float = 0.05,
+                    seed: int = 0) -> list:
+    """
+    returns count applicants of random categories and scores, each with a
+    background check unless left unchecked.
+
+    Parameters
+    ----------
+    count: int:
+        number of applicants.
+    mix: Sequence[float]:
+        relative weights of normal, third-world and VIP applicants.
+    failed_ratio: float:
+        share of background checks that fail.
+    unchecked_ratio: float:
+        share of applicants without a background check.
+    seed: int:
+        seed of the random generator.
+    """
+    rng = random.Random(seed)
+    kinds = rng.choices(range(3), weights=mix, k=count)
+    applicants = []
+    for i, kind in enumerate(kinds):
+        if kind == 0:
+            applicant = NormalApplicant(f'first{i}', f'last{i}',
+                                        rng.randrange(10), rng.random() < .5)
+        elif kind == 1:
+            applicant = ThirdWorldApplicant(f'first{i}', f'last{i}',
+                                            rng.randrange(10),
+                                            rng.random() < .5,
+                                            -rng.randrange(4))
+        else:
+            applicant = VIPApplicant(f'first{i}', f'last{i}')
+        draw = rng.random()
+        if draw >= unchecked_ratio:
+            # checks fail at threat level 3 and above.
+            failed = draw < unchecked_ratio + failed_ratio
+            applicant.background_check = BackgroundCheck(
+                rng.randrange(3, 6) if failed else rng.randrange(3),
+                False)
+        applicants.append(applicant)
+    return applicants
+
+
+def report(title: str, stats: StageStats) -> None:
+    """
+    prints throughput and latency percentiles of every stage in stats.
+
+    Parameters
+    ----------
+    title: str:
+        heading of the report.
+    stats: StageStats:
+        recorded stage timings.
+    """
+    print(title)
+    for name, stage in stats.summary().items():
+        print(f'{name:>18}: {stage["runs"]:8} runs '
+              f'{stage["runs"] / stage["seconds"]:12,.0f} runs/s '
+              f'p50 {stage["p50"] * 1e6:7.2f} us '
+              f'p90 {stage["p90"] * 1e6:7.2f} us '
+              f'p99 {stage["p99"] * 1e6:7.2f} us')
+    if stats.counters:
+        print(' ' * 20 + ', '.join(f'{name} {value}' for name, value
+                                   in sorted(stats.counters.items())))
+
+
+def bench_stages(applicants: list) -> None:
+    """
+    times the scoring, background check and evaluation stages of every
+    applicant separately.
+
+    Parameters
+    ----------
+    applicants: list:
+        applicants to be evaluated.
+    """
+    stats = StageStats()
+    clock = time.perf_counter
+    results = []
+    cache = BackgroundCheckCache(len(applicants) or 1)
+    for applicant in applicants:
+        start = clock()
+        applicant.score, applicant.status
+        stats.stage('score', clock() - start)
+    for applicant in applicants:
+        start = clock()
+        results.append(ApplicantEvalSystem.run_background_check(applicant))
+        stats.stage('background_check', clock() - start)
+    for applicant in applicants:
+        start = clock()
+        ApplicantEvalSystem.run_background_check(applicant, cache)
+        stats.stage('cached_check', clock() - start)
+    for applicant, passed in zip(applicants, results):
+        start = clock()
+        ApplicantEvalSystem.evaluate(applicant, passed)
+        stats.stage('evaluate', clock() - start)
+    report(f'{len(applicants)} applicants, stages', stats)
+
+
+def bench_hooks(applicants: list) -> None:
+    """
+    prints the evaluation pipeline's time with instrumentation off and on,
+    and the timings the hooks collected.
+
+    Parameters
+    ----------
+    applicants: list:
+        applicants to be evaluated.
+    """
+    def run() -> float:
+        start = time.perf_counter()
+        for applicant in applicants:
+            ApplicantEvalSystem.evaluate(
+                applicant, ApplicantEvalSystem.run_background_check(applicant))
+        return time.perf_counter() - start
+
+    ApplicantEvalSystem.set_hooks(None)
+    disabled = min(run() for _ in range(3))
+    stats = StageStats()
+    ApplicantEvalSystem.set_hooks(stats)
+    try:
+        enabled = run()
+    finally:
+        ApplicantEvalSystem.set_hooks(None)
+    print(f'pipeline without hooks: {disabled * 1000:9.1f} ms, '
+          f'with hooks: {enabled * 1000:9.1f} ms')
+    report('hooks', stats)
+
+
+def bench_scoring(applicants: list) -> None:
+    """
+    prints the time taken to score applicants through the original
+    branchy properties (the reference classes), the applicant properties,
+    the compiled scorers and the batch evaluator.
+
+    Parameters
+    ----------
+    applicants: list:
+        applicants to be scored.
+    """
+    count = len(applicants)
+    columns = BatchEvaluator.columns(applicants)
+    references = reference_applicants(applicants)
+
+    start = time.perf_counter()
+    by_reference = [(applicant.score, applicant.status)
+                    for applicant in references]
+    timings = [('original properties', time.perf_counter() - start)]
+
+    start = time.perf_counter()
+    by_object = [(applicant.score, applicant.status)
+                 for applicant in applicants]
+    timings.append(('properties', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    by_scorer = [CODE_SCORERS[kind](language, skill, modifier)
+                 for language, skill, modifier, kind in zip(*columns)]
+    timings.append(('compiled scorers', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    batch = BatchEvaluator.evaluate(*columns)
+    timings.append(('batch evaluator', time.perf_counter() - start))
+
+    assert by_object == by_reference
+    assert [score for score, _ in by_object] == batch.score_list()
+    assert [score for score, _ in by_scorer] == batch.score_list()
+    print(f'{count} applicants')
+    for name, seconds in timings:
+        print(f'{name:>19}: {seconds * 1000:9.1f} ms '
+              f'({count / seconds:12,.0f} applicants/s)')
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    mix = ([float(weight) for weight in sys.argv[2].split(':')]
+           if len(sys.argv) > 2 else (1, 1, 1))
+    population = make_applicants(count, mix)
+    bench_scoring(population)
+    bench_stages(population)
+    bench_hooks(population)
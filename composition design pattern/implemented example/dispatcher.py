@@ -0,0 +1,196 @@
+"""
+runs background checks of a whole batch of applicants concurrently,
+within the agency's quota.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Event, Lock
+from typing import (Callable, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+from applicants import Applicant
+from intelligence import BackgroundCheckCache, run_background_check
+
+
+class TokenBucket:
+    """
+    token bucket rate limiter, `rate` tokens are added per second up to
+    `capacity`, every acquire takes one token.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        rate: float:
+            tokens added per second.
+        capacity: Optional[float]:
+            maximum number of tokens (burst size), defaults to rate.
+        clock: Callable[[], float]:
+            returns the current time in seconds.
+        sleep: Callable[[float], None]:
+            sleeps for the given seconds.
+        """
+        if rate <= 0:
+            raise ValueError('rate has to be positive.')
+        self.rate = rate
+        self.capacity = max(capacity if capacity is not None else rate, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        """
+        takes a token, waiting until one is available.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class CheckDispatcher:
+    """
+    runs background checks on a thread pool. at most `max_in_flight`
+    checks run at once, new checks start no faster than the token bucket
+    allows and a check taking longer than `timeout` counts as not done
+    (None), like a check that was never run.
+
+    a timed out check keeps its thread until the agency answers, so it
+    still counts against max_in_flight.
+    """
+    def __init__(self, max_in_flight: int = 16,
+                 rate: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 cache: Optional[BackgroundCheckCache] = None) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        max_in_flight: int:
+            maximum number of checks running at once.
+        rate: Optional[float]:
+            maximum checks started per second, unlimited if None.
+        burst: Optional[float]:
+            checks that may start at once before rate applies.
+        timeout: Optional[float]:
+            seconds a single check may take, unlimited if None.
+        cache: Optional[BackgroundCheckCache]:
+            cache consulted before querying the agency.
+        """
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight has to be at least 1.')
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.timeout = timeout
+        self.cache = cache
+        self.timed_out = 0
+
+    def _run(self, applicant: Applicant, started: List, event: Event,
+             check: Callable[[Applicant, Optional[BackgroundCheckCache]],
+                             Optional[bool]],
+             cache: Optional[BackgroundCheckCache]) -> Optional[bool]:
+        """
+        waits for a token, then runs the applicant's check.
+        """
+        if self.bucket is not None:
+            self.bucket.acquire()
+        started.append(time.monotonic())
+        event.set()
+        return check(applicant, cache)
+
+    @staticmethod
+    def _check(applicant: Applicant,
+               cache: Optional[BackgroundCheckCache]) -> Optional[bool]:
+        """
+        runs the applicant's background check, the default check.
+        """
+        return run_background_check(applicant.background_check, cache)
+
+    def _result(self, future, started: List, event: Event) -> Optional[bool]:
+        """
+        returns a check's result, or None if it ran past the timeout.
+        """
+        if self.timeout is None:
+            return future.result()
+        event.wait()
+        remaining = started[0] + self.timeout - time.monotonic()
+        try:
+            return future.result(timeout=max(remaining, 0))
+        except TimeoutError:
+            self.timed_out += 1
+            return None
+
+    def dispatch_iter(self, applicants: Iterable[Applicant],
+                      cache: Optional[BackgroundCheckCache] = None,
+                      check: Optional[Callable[
+                          [Applicant, Optional[BackgroundCheckCache]],
+                          Optional[bool]]] = None
+                      ) -> Iterator[Tuple[Applicant, Optional[bool]]]:
+        """
+        yields (applicant, check result) in input order. applicants are
+        read ahead only as far as needed to keep max_in_flight checks busy.
+        Parameters
+        ----------
+        applicants: Iterable[Applicant]:
+            applicants whose background checks are to be run.
+        cache: Optional[BackgroundCheckCache]:
+            cache consulted before querying the agency, the
+            dispatcher's cache if None.
+        check: Optional[Callable]:
+            runs one applicant's check given the cache, e.g.
+            ApplicantEvalSystem.run_background_check, run_background_check
+            on the applicant's background_check if None.
+        """
+        cache = self.cache if cache is None else cache
+        check = self._check if check is None else check
+        window = deque()
+        pool = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        try:
+            for applicant in applicants:
+                started, event = [], Event()
+                future = pool.submit(self._run, applicant, started, event,
+                                     check, cache)
+                window.append((applicant, future, started, event))
+                if len(window) >= 2 * self.max_in_flight:
+                    applicant, *pending = window.popleft()
+                    yield applicant, self._result(*pending)
+            while window:
+                applicant, *pending = window.popleft()
+                yield applicant, self._result(*pending)
+        finally:
+            # don't wait for timed out checks still held by the agency.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def dispatch(self, applicants: Iterable[Applicant],
+                 cache: Optional[BackgroundCheckCache] = None,
+                 check: Optional[Callable[
+                     [Applicant, Optional[BackgroundCheckCache]],
+                     Optional[bool]]] = None) -> List[Optional[bool]]:
+        """
+        returns the check result of every applicant, in input order.
+        Parameters
+        ----------
+        applicants: Iterable[Applicant]:
+            applicants whose background checks are to be run.
+        cache: Optional[BackgroundCheckCache]:
+            cache consulted before querying the agency, the
+            dispatcher's cache if None.
+        check: Optional[Callable]:
+            runs one applicant's check given the cache, see dispatch_iter.
+        """
+        return [passed for _, passed in self.dispatch_iter(applicants,
+                                                           cache, check)]
@@ -0,0 +1,216 @@
+"""
+evaluation engine for large applicant batches.
+
+applicants are read from any iterable in chunks, chunks are evaluated
+in a process pool and the resulting records are yielded in input order,
+ready to be written to a sink. at most `max_pending` chunks are held in
+memory at once.
+"""
+import csv
+import json
+import os
+from abc import (ABCMeta,
+                 abstractmethod)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional
+
+from applicants import Applicant
+from eval_sys import ApplicantEvalSystem, EvalRecord
+from intelligence import BackgroundCheckCache
+
+# background check cache of the current worker process.
+_cache: Optional[BackgroundCheckCache] = None
+
+
+def _init_worker(cache_size: Optional[int], cache_ttl: float) -> None:
+    """
+    worker initializer, creates the worker's background check cache.
+    """
+    global _cache
+    if cache_size is not None:
+        _cache = BackgroundCheckCache(cache_size, cache_ttl)
+
+
+def _evaluate_chunk(applicants: List[Applicant]) -> List[EvalRecord]:
+    """
+    evaluates a chunk of applicants inside a worker process.
+    """
+    return [ApplicantEvalSystem.evaluate(
+                applicant,
+                ApplicantEvalSystem.run_background_check(applicant, _cache))
+            for applicant in applicants]
+
+
+class RecordSink(metaclass=ABCMeta):
+    """
+    Interface for destinations of evaluation records.
+    """
+    @abstractmethod
+    def write(self, record: EvalRecord) -> None:
+        """
+        writes a record, raises NotImplementedError if not overwritten.
+
+        Parameters
+        ----------
+        record: EvalRecord:
+            record to be written.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        flushes buffered records, no-op by default.
+        """
+
+    def __enter__(self) -> 'RecordSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JSONLSink(RecordSink):
+    """
+    writes one JSON object per record and line.
+    """
+    def __init__(self, file: IO[str]) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        file: IO[str]:
+            text file the records are written to.
+        """
+        self.file = file
+
+    def write(self, record: EvalRecord) -> None:
+        """
+        writes a record as a JSON line.
+
+        Parameters
+        ----------
+        record: EvalRecord:
+            record to be written.
+        """
+        self.file.write(json.dumps(record._asdict()))
+        self.file.write('\n')
+
+    def close(self) -> None:
+        """
+        flushes the file.
+        """
+        self.file.flush()
+
+
+class CSVSink(RecordSink):
+    """
+    writes records as CSV rows under a header row.
+    """
+    def __init__(self, file: IO[str]) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        file: IO[str]:
+            text file opened with newline='' the records are written to.
+        """
+        self.file = file
+        self._writer = csv.writer(file)
+        self._writer.writerow(EvalRecord._fields)
+
+    def write(self, record: EvalRecord) -> None:
+        """
+        writes a record as a CSV row.
+
+        Parameters
+        ----------
+        record: EvalRecord:
+            record to be written.
+        """
+        self._writer.writerow(record)
+
+    def close(self) -> None:
+        """
+        flushes the file.
+        """
+        self.file.flush()
+
+
+class EvalEngine:
+    """
+    evaluates applicants in chunks on a process pool.
+    """
+    def __init__(self, processes: Optional[int] = None,
+                 chunk_size: int = 1000,
+                 max_pending: Optional[int] = None,
+                 cache_size: Optional[int] = 10000,
+                 cache_ttl: float = 3600.0) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        processes: Optional[int]:
+            number of worker processes, one per core if None.
+        chunk_size: int:
+            number of applicants sent to a worker at once.
+        max_pending: Optional[int]:
+            chunks submitted ahead of the one being yielded,
+            twice the number of processes if None.
+        cache_size: Optional[int]:
+            size of each worker's background check cache, no cache if None.
+        cache_ttl: float:
+            seconds a cached background check result stays valid.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk size has to be at least 1.')
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+    def run(self, applicants: Iterable[Applicant]) -> Iterator[EvalRecord]:
+        """
+        yields the evaluation record of every applicant, in input order.
+
+        Parameters
+        ----------
+        applicants: Iterable[Applicant]:
+            applicants to be evaluated, read lazily.
+        """
+        applicants = iter(applicants)
+        pending = deque()
+        processes = self.processes or os.cpu_count() or 1
+        max_pending = self.max_pending or 2 * processes
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(self.cache_size,
+                                           self.cache_ttl)) as pool:
+            while True:
+                chunk = list(islice(applicants, self.chunk_size))
+                if chunk:
+                    pending.append(pool.submit(_evaluate_chunk, chunk))
+                if pending and (not chunk or len(pending) >= max_pending):
+                    yield from pending.popleft().result()
+                if not chunk and not pending:
+                    return
+
+    def run_to(self, applicants: Iterable[Applicant],
+               sink: RecordSink) -> int:
+        """
+        writes the evaluation record of every applicant to sink, in input
+        order, returns the number of records written.
+
+        Parameters
+        ----------
+        applicants: Iterable[Applicant]:
+            applicants to be evaluated, read lazily.
+        sink: RecordSink:
+            destination of the records.
+        """
+        written = 0
+        for record in self.run(applicants):
+            sink.write(record)
+            written += 1
+        return written
@@ -2,36 +2,169 @@
 application evaluation module to determine
 whether an applicant will be granted visa.
 """
-from typing import List
+from time import perf_counter
+from typing import List, NamedTuple, Optional, Union
 from applicants import (VIPApplicant,
                         ThirdWorldApplicant,
                         NormalApplicant,
                         Applicant)
-from intelligence import BackgroundCheck
+from intelligence import (BackgroundCheck,
+                          BackgroundCheckCache,
+                          run_background_check)
+from dispatcher import CheckDispatcher
+from instrumentation import EvalHooks
+
+
+class EvalRecord(NamedTuple):
+    """
+    outcome of one applicant's evaluation. score and status are None if
+    the background check was not done, score is None if it failed.
+    """
+    name: str
+    score: Union[int, str, None]
+    status: Optional[str]
+    background_check: str
 
 
 class ApplicantEvalSystem:
     """
     announces whther applicant's visa request is granted or denied.
+
+    if hooks is set, every evaluation and background check reports its
+    duration ("evaluate", "score", "background_check" stages) and outcome
+    counters to it.
     """
+    hooks: Optional[EvalHooks] = None
+
+    @classmethod
+    def set_hooks(cls, hooks: Optional[EvalHooks]) -> None:
+        """
+        sets the instrumentation hooks, None turns instrumentation off.
+        Parameters
+        ----------
+        hooks: Optional[EvalHooks]:
+            receiver of timings and counters.
+        """
+        cls.hooks = hooks
+
+    @staticmethod
+    def evaluate(applicant: Applicant,
+                 passed: Optional[bool]) -> EvalRecord:
+        """
+        returns the evaluation record of an applicant given the result of
+        their background check.
+        Parameters
+        ----------
+        applicant: Applicant:
+            applicant to be evaluated.
+        passed: Optional[bool]:
+            result of the applicant's background check.
+        """
+        hooks = ApplicantEvalSystem.hooks
+        if hooks is not None:
+            return ApplicantEvalSystem._evaluate_instrumented(
+                applicant, passed, hooks)
+        if passed is None:
+            return EvalRecord(applicant.get_fullname(), None, None,
+                              'not done')
+        if passed:
+            return EvalRecord(applicant.get_fullname(), applicant.score,
+                              applicant.status, 'clear')
+        return EvalRecord(applicant.get_fullname(), None, 'DENIED',
+                          'NOT CLEARED')
+
+    @staticmethod
+    def _evaluate_instrumented(applicant: Applicant, passed: Optional[bool],
+                               hooks: EvalHooks) -> EvalRecord:
+        """
+        evaluate, reporting timings and counters to hooks.
+        """
+        start = perf_counter()
+        if passed is None:
+            record = EvalRecord(applicant.get_fullname(), None, None,
+                                'not done')
+        elif passed:
+            scored = perf_counter()
+            score, status = applicant.score, applicant.status
+            hooks.stage('score', perf_counter() - scored)
+            record = EvalRecord(applicant.get_fullname(), score, status,
+                                'clear')
+        else:
+            record = EvalRecord(applicant.get_fullname(), None, 'DENIED',
+                                'NOT CLEARED')
+        hooks.stage('evaluate', perf_counter() - start)
+        hooks.count('evaluated')
+        if record.status is not None:
+            hooks.count(record.status.lower())
+        return record
+
+    @staticmethod
+    def run_background_check(
+            applicant: Applicant,
+            cache: Optional[BackgroundCheckCache] = None) -> Optional[bool]:
+        """
+        runs an applicant's background check once, returns None if the
+        applicant has no background check or it was not done.
+        Parameters
+        ----------
+        applicant: Applicant:
+            applicant to be checked.
+        cache: Optional[BackgroundCheckCache]:
+            cache consulted before querying the third party.
+        """
+        hooks = ApplicantEvalSystem.hooks
+        if hooks is None:
+            return run_background_check(applicant.background_check, cache)
+        start = perf_counter()
+        passed = run_background_check(applicant.background_check, cache)
+        hooks.stage('background_check', perf_counter() - start)
+        hooks.count('check_not_done' if passed is None else
+                    'check_passed' if passed else 'check_failed')
+        return passed
+
     @staticmethod
-    def eval_applicant(applicants: List[Applicant]) -> None:
+    def eval_applicant(applicants: List[Applicant],
+                       cache: Optional[BackgroundCheckCache] = None,
+                       dispatcher: Optional[CheckDispatcher] = None) -> None:
         """
         given a list of applicants, announces their results one by one.
+        each background check is run at most once per applicant, and
+        each result is announced from the applicant's evaluation record,
+        see evaluate.
         Parameters
         ----------
         applicants: List[Applicants]:
             a list of applicants who are to be processed.
+        cache: Optional[BackgroundCheckCache]:
+            cache of background check results shared between applicants.
+        dispatcher: Optional[CheckDispatcher]:
+            runs the batch's background checks concurrently if given,
+            otherwise they are run one by one. either way checks go
+            through run_background_check, with cache and hooks.
         """
-        for applicant in applicants:
-            print(f"results for {applicant.get_fullname()}:")
-            if applicant.background_check() is None:
+        if dispatcher is None:
+            results = (ApplicantEvalSystem.run_background_check(applicant,
+                                                                cache)
+                       for applicant in applicants)
+        else:
+            timed_out = dispatcher.timed_out
+            results = dispatcher.dispatch(
+                applicants, cache, ApplicantEvalSystem.run_background_check)
+            hooks = ApplicantEvalSystem.hooks
+            if hooks is not None and dispatcher.timed_out > timed_out:
+                hooks.count('check_timed_out',
+                            dispatcher.timed_out - timed_out)
+        for applicant, passed in zip(applicants, results):
+            record = ApplicantEvalSystem.evaluate(applicant, passed)
+            print(f"results for {record.name}:")
+            if passed is None:
                 print('background check was not done \n')
-            elif applicant.background_check():
-                print(f"applicant score: {applicant.score}, status: "
-                      f"{applicant.status}\n")
+            elif passed:
+                print(f"applicant score: {record.score}, status: "
+                      f"{record.status}\n")
             else:
-                print(applicant.background_check, 'status: DENIED\n')
+                print(BackgroundCheck.describe(passed),
+                      f'status: {record.status}\n')
 
 
 if __name__ == '__main__':
@@ -41,4 +174,5 @@ if __name__ == '__main__':
     muhammed.background_check = BackgroundCheck(5, False)
     john_doe = NormalApplicant('John', 'Doe', 5, True)
     john_doe.background_check = BackgroundCheck(1, False)
-    ApplicantEvalSystem.eval_applicant([john_doe, muhammed, mr_important])
+    ApplicantEvalSystem.eval_applicant([john_doe, muhammed, mr_important],
+                                       BackgroundCheckCache())
@@ -0,0 +1,131 @@
+"""
+opt-in instrumentation of the evaluation pipeline.
+
+ApplicantEvalSystem reports per-stage timings and counters to its hooks
+object, if one is set. with no hooks set (the default) the only cost is
+a single attribute check per call.
+"""
+import math
+from abc import (ABCMeta,
+                 abstractmethod)
+from collections import Counter, defaultdict
+from threading import Lock
+from typing import Dict, List, Sequence
+
+
+class EvalHooks(metaclass=ABCMeta):
+    """
+    Interface for receivers of evaluation timings and counters.
+    """
+    @abstractmethod
+    def stage(self, name: str, seconds: float) -> None:
+        """
+        records the duration of one run of a stage, raises
+        NotImplementedError if not overwritten.
+
+        Parameters
+        ----------
+        name: str:
+            name of the stage, e.g. "background_check" or "evaluate".
+        seconds: float:
+            time the stage took.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        increments a counter, raises NotImplementedError if not overwritten.
+
+        Parameters
+        ----------
+        name: str:
+            name of the counter, e.g. "check_passed".
+        amount: int:
+            amount added to the counter.
+        """
+        raise NotImplementedError
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    returns the q-th percentile (0 to 100) of values, nearest rank.
+
+    Parameters
+    ----------
+    values: Sequence[float]:
+        sorted values.
+    q: float:
+        percentile to be returned.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class StageStats(EvalHooks):
+    """
+    keeps every stage duration and counter in memory, thread safe.
+    """
+    def __init__(self) -> None:
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Counter = Counter()
+        self._lock = Lock()
+
+    def stage(self, name: str, seconds: float) -> None:
+        """
+        records the duration of one run of a stage.
+
+        Parameters
+        ----------
+        name: str:
+            name of the stage.
+        seconds: float:
+            time the stage took.
+        """
+        with self._lock:
+            self.timings[name].append(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        increments a counter.
+
+        Parameters
+        ----------
+        name: str:
+            name of the counter.
+        amount: int:
+            amount added to the counter.
+        """
+        with self._lock:
+            self.counters[name] += amount
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)
+                ) -> Dict[str, dict]:
+        """
+        returns runs, total seconds and latency percentiles of every stage.
+
+        Parameters
+        ----------
+        percentiles: Sequence[float]:
+            percentiles reported for each stage.
+        """
+        with self._lock:
+            timings = {name: sorted(values)
+                       for name, values in self.timings.items()}
+        summary = {}
+        for name, values in timings.items():
+            stats = {'runs': len(values), 'seconds': sum(values)}
+            for q in percentiles:
+                stats[f'p{q:g}'] = percentile(values, q)
+            summary[name] = stats
+        return summary
+
+    def clear(self) -> None:
+        """
+        forgets every timing and counter.
+        """
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
@@ -3,13 +3,20 @@
 """
 an intelligence agency doing background checks on people.
 """
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict, Hashable, Optional
 
 
 class BackgroundCheck:
     """
     background check done via a third party.
     """
-    def __init__(self, level: int, sanctioned: bool) -> None:
+    def __init__(self, level: int, sanctioned: bool,
+                 agency: Optional['FakeAgency'] = None) -> None:
         """
         initialize the instance.
         Parameters
@@ -18,16 +25,27 @@ class BackgroundCheck:
             terrorism threat level.
         sanctioned: bool:
             whether the person is in sanctioned list.
+        agency: Optional[FakeAgency]:
+            agency queried for the result, evaluated locally if None.
         """
         self.level = level
         self.sanctioned = sanctioned
+        self.agency = agency
 
-    def __call__(self) -> bool:
+    def __call__(self) -> Optional[bool]:
         """
         returns True if conditions are met (passed the background check).
         or returns False if conditions are not met
         (failed the background check).
         """
+        if self.agency is not None:
+            return self.agency.query(self)
+        return self.evaluate()
+
+    def evaluate(self) -> bool:
+        """
+        applies the agency's rules to the check's inputs.
+        """
         if not self.sanctioned and self.level < 3:
             result = True
         else:
@@ -38,12 +56,186 @@ class BackgroundCheck:
         """
         print whether background check was clear or not.
         """
-        if self.__call__():
+        return self.describe(self.__call__())
+
+    @staticmethod
+    def describe(passed: bool) -> str:
+        """
+        returns whether a background check result was clear or not.
+        Parameters
+        ----------
+        passed: bool:
+            result returned by a background check.
+        """
+        if passed:
             result = 'background check: clear'
         else:
             result = 'background check: NOT CLEARED'
         return result
 
+    def cache_key(self) -> Hashable:
+        """
+        returns the inputs the result of this check depends on.
+        """
+        return type(self), self.level, self.sanctioned
+
+
+class FakeAgency:
+    """
+    local stand-in for the third party agency, answers background checks
+    after a configurable delay.
+    """
+    def __init__(self, latency: float = 0.1, jitter: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        latency: float:
+            seconds every query takes.
+        jitter: float:
+            up to this many seconds are randomly added to latency.
+        seed: Optional[int]:
+            seed of the jitter's random generator.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.queries = 0
+        self._random = random.Random(seed)
+        self._lock = Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def query(self, background_check: BackgroundCheck) -> bool:
+        """
+        answers a background check after the agency's latency.
+        Parameters
+        ----------
+        background_check: BackgroundCheck:
+            check to answer.
+        """
+        with self._lock:
+            self.queries += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+        return background_check.evaluate()
+
+
+class BackgroundCheckCache:
+    """
+    remembers background check results by their inputs, so the third
+    party is only queried once per distinct check. entries expire after
+    a time to live and the least recently used entry is evicted when the
+    cache is full. concurrent misses on the same check are coalesced: the
+    first one queries the third party and the others wait for its result,
+    counting as hits.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        max_size: int:
+            maximum number of results kept.
+        ttl: float:
+            seconds a result stays valid.
+        clock: Callable[[], float]:
+            returns the current time in seconds.
+        """
+        if max_size < 1:
+            raise ValueError('cache size has to be at least 1.')
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        # futures of the checks being run, by cache key.
+        self._running: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def check(self, background_check: BackgroundCheck) -> Optional[bool]:
+        """
+        returns the cached result of a background check, running the
+        check on a miss. None results (check not done) aren't cached.
+        Parameters
+        ----------
+        background_check: BackgroundCheck:
+            check to run.
+        """
+        key = background_check.cache_key()
+        now = self.clock()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[1] > now:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            running = self._running.get(key)
+            if running is None:
+                self.misses += 1
+                future = self._running[key] = Future()
+            else:
+                self.hits += 1
+        if running is not None:
+            return running.result()
+        try:
+            result = background_check()
+        except BaseException as error:
+            with self._lock:
+                del self._running[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._running[key]
+            if result is not None:
+                self._results[key] = (result, self.clock() + self.ttl)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def clear(self) -> None:
+        """
+        drops every cached result and resets the counters.
+        """
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def run_background_check(
+        background_check: Optional[BackgroundCheck],
+        cache: Optional[BackgroundCheckCache] = None) -> Optional[bool]:
+    """
+    runs a background check once, through cache if given. returns None
+    if there is no background check or it was not done.
+    Parameters
+    ----------
+    background_check: Optional[BackgroundCheck]:
+        check to run.
+    cache: Optional[BackgroundCheckCache]:
+        cache consulted before querying the third party.
+    """
+    if background_check is None:
+        return None
+    if cache is None:
+        return background_check()
+    return cache.check(background_check)
+
 
 if __name__ == '__main__':
     ok = BackgroundCheck(0, False)
@@ -54,3 +246,7 @@ if __name__ == '__main__':
     print(notok)
     notok_1 = BackgroundCheck(0, True)
     print(notok_1)
+    cache = BackgroundCheckCache(max_size=2, ttl=60)
+    for check in (ok, notok, BackgroundCheck(0, False)):
+        print(cache.check(check))
+    print(f'hits: {cache.hits}, misses: {cache.misses}')
@@ -0,0 +1,112 @@
+"""
+declarative scoring rules for applicant categories.
+
+every category is described by a ScoringRule and compiled once into a
+scorer, a plain function taking (language_score, desired_skill,
+class_modifier) and returning (score, granted). the rule's numbers are
+bound into the function when it is compiled, so scoring an applicant
+does no attribute or dictionary lookups.
+"""
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+
+Scorer = Callable[[int, bool, int], Tuple[Union[int, str], bool]]
+
+
+class ScoringRule(NamedTuple):
+    """
+    scoring rule of an applicant category.
+
+    score = base + class modifier (if use_class_modifier)
+            + skill_bonus (if desired skill)
+            + language score above language_threshold
+    granted if score >= pass_score, or always if auto_grant.
+    """
+    pass_score: int = 2
+    base: int = 0
+    use_class_modifier: bool = False
+    skill_bonus: int = 1
+    language_threshold: int = 4
+    auto_grant: bool = False
+    auto_score: str = 'VIP'
+
+
+def compile_rule(rule: ScoringRule) -> Scorer:
+    """
+    returns a scorer specialised for rule.
+
+    Parameters
+    ----------
+    rule: ScoringRule:
+        rule of the category.
+    """
+    if rule.auto_grant:
+        result = (rule.auto_score, True)
+
+        def score_auto_granted(language_score: int = 0,
+                               desired_skill: bool = False,
+                               class_modifier: int = 0):
+            return result
+        return score_auto_granted
+
+    base = rule.base
+    bonus = rule.skill_bonus
+    threshold = rule.language_threshold
+    pass_score = rule.pass_score
+
+    if rule.use_class_modifier:
+        def score_with_modifier(language_score: int, desired_skill: bool,
+                                class_modifier: int = 0):
+            score = base + class_modifier
+            if desired_skill:
+                score += bonus
+            if language_score > threshold:
+                score += language_score - threshold
+            return score, score >= pass_score
+        return score_with_modifier
+
+    def score_plain(language_score: int, desired_skill: bool,
+                    class_modifier: int = 0):
+        score = base
+        if desired_skill:
+            score += bonus
+        if language_score > threshold:
+            score += language_score - threshold
+        return score, score >= pass_score
+    return score_plain
+
+
+# rule table, category codes are positions in CATEGORIES.
+RULES: Dict[str, ScoringRule] = {
+    'normal': ScoringRule(pass_score=2),
+    'third_world': ScoringRule(pass_score=3, use_class_modifier=True),
+    'vip': ScoringRule(auto_grant=True),
+}
+CATEGORIES: List[str] = list(RULES)
+SCORERS: Dict[str, Scorer] = {name: compile_rule(rule)
+                              for name, rule in RULES.items()}
+# scorers by category code.
+CODE_SCORERS: List[Scorer] = [SCORERS[name] for name in CATEGORIES]
+
+
+def register_category(name: str, rule: ScoringRule) -> int:
+    """
+    adds a category or replaces its rule, returns the category's code.
+
+    Parameters
+    ----------
+    name: str:
+        name of the category.
+    rule: ScoringRule:
+        rule of the category.
+    """
+    scorer = compile_rule(rule)
+    RULES[name] = rule
+    SCORERS[name] = scorer
+    if name in CATEGORIES:
+        code = CATEGORIES.index(name)
+        CODE_SCORERS[code] = scorer
+    else:
+        code = len(CATEGORIES)
+        CATEGORIES.append(name)
+        CODE_SCORERS.append(scorer)
+    return code
@@ -0,0 +1,42 @@
+"""
+behaviour of ApplicantTable rows sent to other processes.
+run from the example directory: python -m pytest
+"""
+import pickle
+import unittest
+
+from applicant_table import ApplicantTable
+from batch_eval import NORMAL, THIRD_WORLD
+
+
+def fields(applicant) -> tuple:
+    check = applicant.background_check
+    return (applicant.get_fullname(), applicant.kind,
+            applicant.language_score, applicant.desired_skill,
+            applicant.class_modifier, applicant.score, applicant.status,
+            None if check is None else (check.level, check.sanctioned))
+
+
+class TestViewPickling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = ApplicantTable()
+        for row in range(2000):
+            self.table.append(f'first{row}', f'last{row}', NORMAL, row % 10)
+        self.table.append('ali', 'foo', THIRD_WORLD, 4, True, -2, 3, True)
+
+    def test_view_is_unpickled_with_its_values(self):
+        view = self.table[-1]
+        self.assertEqual(fields(pickle.loads(pickle.dumps(view))),
+                         fields(view))
+        view = self.table[0]
+        self.assertEqual(fields(pickle.loads(pickle.dumps(view))),
+                         fields(view))
+
+    def test_view_does_not_carry_the_table(self):
+        size = len(pickle.dumps(self.table[0]))
+        self.assertLess(size, 1000)
+        self.assertLess(size * 100, len(pickle.dumps(self.table)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+behaviour of ApplicantEvalSystem.eval_applicant with hooks set.
+run from the example directory: python -m pytest
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from applicants import NormalApplicant, VIPApplicant
+from eval_sys import ApplicantEvalSystem
+from instrumentation import StageStats
+from intelligence import BackgroundCheck
+
+
+class TestEvalApplicantHooks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stats = StageStats()
+        ApplicantEvalSystem.set_hooks(self.stats)
+        self.addCleanup(ApplicantEvalSystem.set_hooks, None)
+
+    def test_announced_results_are_evaluated_and_counted(self):
+        john = NormalApplicant('John', 'Doe', 5, True)
+        john.background_check = BackgroundCheck(1, False)
+        jane = NormalApplicant('Jane', 'Doe', 1, False)
+        jane.background_check = BackgroundCheck(1, False)
+        vip = VIPApplicant('mr', 'important')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            ApplicantEvalSystem.eval_applicant([john, jane, vip])
+        self.assertEqual(self.stats.counters, {
+            'check_passed': 2, 'check_not_done': 1, 'evaluated': 3,
+            'granted': 1, 'denied': 1})
+        self.assertEqual({name: stats['runs'] for name, stats
+                          in self.stats.summary().items()},
+                         {'background_check': 3, 'evaluate': 3, 'score': 2})
+        self.assertIn('applicant score: 2, status: GRANTED',
+                      output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+behaviour of BackgroundCheckCache under concurrent checks.
+run from the example directory: python -m pytest
+"""
+import unittest
+
+from applicants import NormalApplicant
+from dispatcher import CheckDispatcher
+from intelligence import BackgroundCheck, BackgroundCheckCache, FakeAgency
+
+
+class FailingCheck(BackgroundCheck):
+    """
+    background check whose third party is unreachable.
+    """
+    def __call__(self):
+        raise ConnectionError('agency unreachable')
+
+
+class TestConcurrentMisses(unittest.TestCase):
+    def test_misses_on_the_same_check_are_coalesced(self):
+        agency = FakeAgency(latency=0.05)
+        applicants = []
+        for number in range(20):
+            applicant = NormalApplicant('ali', f'foo{number}', 5, True)
+            applicant.background_check = BackgroundCheck(number % 5, False,
+                                                         agency)
+            applicants.append(applicant)
+        cache = BackgroundCheckCache()
+        results = CheckDispatcher(max_in_flight=20).dispatch(applicants,
+                                                             cache)
+        self.assertEqual(results, [number % 5 < 3 for number in range(20)])
+        self.assertEqual((cache.misses, cache.hits), (5, 15))
+        self.assertEqual(agency.queries, 5)
+
+    def test_failed_check_is_not_cached(self):
+        cache = BackgroundCheckCache()
+        with self.assertRaises(ConnectionError):
+            cache.check(FailingCheck(0, False))
+        self.assertTrue(cache.check(BackgroundCheck(0, False)))
+        self.assertEqual((cache.misses, len(cache)), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
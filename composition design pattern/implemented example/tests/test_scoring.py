@@ -0,0 +1,120 @@
+"""
+batch scoring agrees with the applicant objects and the original rules.
+run from the example directory: python -m pytest
+"""
+import unittest
+
+import batch_eval
+from applicants import NormalApplicant, ThirdWorldApplicant, VIPApplicant
+from batch_eval import THIRD_WORLD, BatchEvaluator, category_code
+from benchmark import make_applicants, reference_applicants
+
+
+class StrictApplicant(NormalApplicant):
+    """
+    normal applicant with a higher pass score.
+    """
+    _pass_score = 5
+
+
+class BonusApplicant(NormalApplicant):
+    """
+    normal applicant with a score of its own.
+    """
+    @property
+    def score(self) -> int:
+        return self.language_score * 2
+
+
+def by_object(applicants: list) -> list:
+    return [(applicant.score, applicant.status) for applicant in applicants]
+
+
+def by_batch(result: batch_eval.BatchResult) -> list:
+    return [(result.score(row), result.status(row))
+            for row in range(len(result))]
+
+
+class TestBatchEquivalence(unittest.TestCase):
+    def setUp(self) -> None:
+        self.applicants = make_applicants(3000, seed=7)
+        self.columns = BatchEvaluator.columns(self.applicants)
+
+    def test_objects_match_original_properties(self):
+        self.assertEqual(by_object(self.applicants),
+                         by_object(reference_applicants(self.applicants)))
+
+    def test_python_batch_matches_objects(self):
+        result = BatchEvaluator._evaluate_python(*self.columns)
+        self.assertEqual(by_batch(result), by_object(self.applicants))
+
+    @unittest.skipIf(batch_eval.np is None, 'NumPy is not installed')
+    def test_numpy_batch_matches_objects(self):
+        result = BatchEvaluator._evaluate_numpy(*self.columns)
+        self.assertEqual(by_batch(result), by_object(self.applicants))
+
+    def test_evaluate_matches_objects(self):
+        result = BatchEvaluator.evaluate(*self.columns)
+        self.assertEqual(result.score_list(),
+                         [applicant.score for applicant in self.applicants])
+        self.assertEqual(result.status_list(),
+                         [applicant.status for applicant in self.applicants])
+
+    def test_positive_modifier_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ThirdWorldApplicant('ali', 'foo', 5, True, 1)
+        for evaluate in (BatchEvaluator._evaluate_python,
+                         BatchEvaluator.evaluate):
+            with self.assertRaises(ValueError):
+                evaluate([5], [True], [1], [THIRD_WORLD])
+
+
+class TestSubclassOverrides(unittest.TestCase):
+    def test_own_pass_score_is_honoured_by_objects_and_batches(self):
+        applicants = [StrictApplicant('ali', 'foo', language, skill)
+                      for language in range(10) for skill in (False, True)]
+        statuses = [applicant.status for applicant in applicants]
+        self.assertEqual(statuses, [
+            'GRANTED' if applicant.score >= 5 else 'DENIED'
+            for applicant in applicants])
+        self.assertIn('DENIED', statuses)
+        columns = BatchEvaluator.columns(applicants)
+        self.assertEqual(BatchEvaluator.evaluate(*columns).status_list(),
+                         statuses)
+        self.assertEqual(
+            BatchEvaluator._evaluate_python(*columns).status_list(),
+            statuses)
+
+    def test_own_score_is_used_and_refused_by_batches(self):
+        applicant = BonusApplicant('ali', 'foo', 3, False)
+        self.assertEqual(applicant.score, 6)
+        self.assertEqual(applicant.status, 'GRANTED'
+                         if 6 >= applicant._pass_score else 'DENIED')
+        with self.assertRaises(ValueError):
+            category_code(applicant)
+
+    def test_own_score_on_a_stricter_category_uses_its_pass_score(self):
+        class StrictBonusApplicant(StrictApplicant):
+            @property
+            def score(self) -> int:
+                return self.language_score
+
+        self.assertEqual(StrictBonusApplicant('ali', 'foo', 5, False).status,
+                         'GRANTED')
+        self.assertEqual(StrictBonusApplicant('ali', 'foo', 4, True).status,
+                         'DENIED')
+
+    def test_vip_with_own_score_stays_granted(self):
+        class RankedVIPApplicant(VIPApplicant):
+            @property
+            def score(self) -> str:
+                return 'VVIP'
+
+        applicant = RankedVIPApplicant('ali', 'foo')
+        self.assertEqual((applicant.score, applicant.status),
+                         ('VVIP', 'GRANTED'))
+        self.assertTrue(applicant._custom_scoring)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,591 @@
+"""
+benchmarks discount fan-out of the observer example.
+
+run from this directory: python benchmark.py --help
+"""
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from services.bus import Event, EventBus
+from services.email import EMail, Transport
+from services.observer import (DiscountObserver,
+                               compose_discount_greeting,
+                               compose_discount_message)
+from services.parallel import ProcessPoolDiscountObserver
+from services.products import Products
+from services.publisher import DiscountPublisher
+from services.scheduler import NotificationScheduler
+from services.subscriber import DiscountSubscriber
+
+
+def time_fan_out(observer, discounts: list) -> Tuple[float, int]:
+    """
+    returns seconds taken to match discounts and compose every message,
+    and the number of messages.
+
+    Parameters
+    ----------
+    observer:
+        DiscountObserver instance or ProcessPoolDiscountObserver.
+    discounts: list:
+        newly discounted products.
+    """
+    start = time.perf_counter()
+    observer.update(discounts)
+    if isinstance(observer, ProcessPoolDiscountObserver):
+        messages = sum(1 for _ in observer.iter_messages())
+    else:
+        messages = sum(1 for _ in observer.iter_notifications())
+    return time.perf_counter() - start, messages
+
+
+class CountingTransport(Transport):
+    """
+    transport that drops every email, only counting them.
+    """
+    sent = 0
+
+    def send(self, email: str, message: str) -> None:
+        """
+        counts the email.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        CountingTransport.sent += 1
+
+    def send_many(self, messages: List[tuple]) -> None:
+        """
+        counts a batch of emails.
+
+        Parameters
+        ----------
+        messages: List[tuple]:
+            (recipient email, message body) pairs.
+        """
+        CountingTransport.sent += len(messages)
+
+
+class TimedObserver:
+    """
+    wraps an observer, adding the time spent in its update to `seconds`.
+    """
+    def __init__(self, observer) -> None:
+        self.observer = observer
+        self.seconds = 0.0
+
+    def update(self, new_discounts: list) -> None:
+        start = time.perf_counter()
+        self.observer.update(new_discounts)
+        self.seconds += time.perf_counter() - start
+
+
+class PipelineResult(NamedTuple):
+    """
+    measurements of one run_pipeline call, times in seconds.
+    """
+    subscribers: int
+    events: int
+    notifications: int
+    setup: float
+    publish: float
+    update: float
+    notify: float
+    peak_rss: Optional[int]
+
+    @property
+    def total(self) -> float:
+        """
+        seconds from the first discount to the last email.
+        """
+        return self.publish + self.update + self.notify
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.total if self.total else 0.0
+
+    @property
+    def notifications_per_second(self) -> float:
+        return self.notifications / self.total if self.total else 0.0
+
+
+def load_catalogue(product_count: int) -> List[str]:
+    """
+    makes sure the catalogue holds at least product_count products and
+    returns the first product_count of them.
+
+    Parameters
+    ----------
+    product_count: int:
+        number of products.
+    """
+    missing = product_count - len(Products.get_products())
+    Products.load_products(f'product{i}' for i in range(max(missing, 0)))
+    return Products.get_products()[:product_count]
+
+
+def zipf_sampler(count: int, exponent: float, rng: random.Random):
+    """
+    returns a function drawing indexes below count, index i with weight
+    1 / (i + 1) ** exponent.
+
+    Parameters
+    ----------
+    count: int:
+        number of indexes.
+    exponent: float:
+        skew of the distribution, 0 is uniform.
+    rng: random.Random:
+        random generator.
+    """
+    cumulative = list(itertools.accumulate(1 / (rank ** exponent)
+                                           for rank in range(1, count + 1)))
+    total = cumulative[-1]
+
+    def draw() -> int:
+        return min(bisect.bisect(cumulative, rng.random() * total),
+                   count - 1)
+    return draw
+
+
+def make_zipf_subscribers(count: int, products: List[str],
+                          wishlist_size: int = 5, exponent: float = 1.1,
+                          seed: int = 0) -> List[DiscountSubscriber]:
+    """
+    returns count subscribers whose wishlists draw products with Zipf
+    distributed popularity, a few products are in most wishlists.
+
+    Parameters
+    ----------
+    count: int:
+        number of subscribers.
+    products: List[str]:
+        catalogue to draw from, most popular first.
+    wishlist_size: int:
+        number of distinct products in each wishlist.
+    exponent: float:
+        Zipf exponent.
+    seed: int:
+        seed of the random generator.
+    """
+    rng = random.Random(seed)
+    draw = zipf_sampler(len(products), exponent, rng)
+    wishlist_size = min(wishlist_size, len(products))
+    subscribers = []
+    for i in range(count):
+        wishlist = set()
+        while len(wishlist) < wishlist_size:
+            wishlist.add(products[draw()])
+        subscribers.append(DiscountSubscriber(f'user{i}', f'user{i}@foo.bar',
+                                              wishlist))
+    return subscribers
+
+
+def peak_rss() -> Optional[int]:
+    """
+    returns the process' peak resident set size in bytes, None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_pipeline(subscriber_count: int, product_count: int, events: int,
+                 events_per_notify: int = 1, wishlist_size: int = 5,
+                 exponent: float = 1.1, seed: int = 0) -> PipelineResult:
+    """
+    announces `events` discounts to subscriber_count subscribers through
+    DiscountPublisher.notify_observer, DiscountObserver.update and
+    DiscountObserver.notify_subscriber, timing every stage.
+
+    Parameters
+    ----------
+    subscriber_count: int:
+        number of subscribers.
+    product_count: int:
+        number of products in the catalogue.
+    events: int:
+        number of discounted products, at most product_count.
+    events_per_notify: int:
+        discounts recorded between two notifications.
+    wishlist_size: int:
+        number of products in each wishlist.
+    exponent: float:
+        Zipf exponent of product popularity.
+    seed: int:
+        seed of the random generator.
+    """
+    start = time.perf_counter()
+    catalogue = load_catalogue(product_count)
+    subscribers = make_zipf_subscribers(subscriber_count, catalogue,
+                                        wishlist_size, exponent, seed)
+    products = Products()
+    observer = DiscountObserver()
+    timed = TimedObserver(observer)
+    publisher = DiscountPublisher(products)
+    publisher.add_observer(timed)
+    for subscriber in subscribers:
+        observer.add_subscriber(subscriber)
+    discounted = random.Random(seed).sample(catalogue,
+                                            min(events, len(catalogue)))
+    EMail.set_transport(CountingTransport)
+    CountingTransport.sent = 0
+    setup = time.perf_counter() - start
+
+    publish = notify = 0.0
+    for first in range(0, len(discounted), events_per_notify):
+        products.add_new_discounts(
+            discounted[first:first + events_per_notify])
+        start = time.perf_counter()
+        publisher.notify_observer()
+        publish += time.perf_counter() - start
+        start = time.perf_counter()
+        observer.notify_subscriber()
+        notify += time.perf_counter() - start
+
+    for subscriber in subscribers:
+        observer.remove_subscriber(subscriber)
+    return PipelineResult(subscriber_count, len(discounted),
+                          CountingTransport.sent, setup,
+                          publish - timed.seconds, timed.seconds, notify,
+                          peak_rss())
+
+
+def bench_pipeline(subscriber_counts: List[int], product_count: int,
+                   events: int, events_per_notify: int = 1,
+                   wishlist_size: int = 5, exponent: float = 1.1) -> None:
+    """
+    prints a scaling curve of the notification pipeline, one row per
+    subscriber count. peak RSS never decreases within a process.
+
+    Parameters
+    ----------
+    subscriber_counts: List[int]:
+        subscriber counts to run, in increasing order.
+    product_count: int:
+        number of products in the catalogue.
+    events: int:
+        number of discounted products.
+    events_per_notify: int:
+        discounts recorded between two notifications.
+    wishlist_size: int:
+        number of products in each wishlist.
+    exponent: float:
+        Zipf exponent of product popularity.
+    """
+    print(f'{product_count} products, {events} events, '
+          f'{events_per_notify} per notification, wishlists of '
+          f'{wishlist_size}, zipf exponent {exponent}')
+    print(f'{"subscribers":>11} {"setup s":>8} {"publish s":>9} '
+          f'{"update s":>8} {"notify s":>8} {"events/s":>10} '
+          f'{"emails":>9} {"emails/s":>10} {"peak rss MB":>11}')
+    for count in subscriber_counts:
+        result = run_pipeline(count, product_count, events,
+                              events_per_notify, wishlist_size, exponent)
+        rss = ('n/a' if result.peak_rss is None
+               else f'{result.peak_rss / 2 ** 20:.1f}')
+        print(f'{count:>11} {result.setup:>8.3f} {result.publish:>9.3f} '
+              f'{result.update:>8.3f} {result.notify:>8.3f} '
+              f'{result.events_per_second:>10,.0f} '
+              f'{result.notifications:>9} '
+              f'{result.notifications_per_second:>10,.0f} {rss:>11}')
+
+
+def bench_render(subscriber_count: int, product_count: int, events: int,
+                 wishlist_size: int = 5, exponent: float = 1.1,
+                 seed: int = 0) -> None:
+    """
+    prints the time to render one notification campaign per subscriber
+    and once per distinct set of newly discounted items, greetings
+    included.
+
+    Parameters
+    ----------
+    subscriber_count: int:
+        number of subscribers.
+    product_count: int:
+        number of products in the catalogue.
+    events: int:
+        number of discounted products of the campaign.
+    wishlist_size: int:
+        number of products in each wishlist.
+    exponent: float:
+        Zipf exponent of product popularity.
+    seed: int:
+        seed of the random generator.
+    """
+    catalogue = load_catalogue(product_count)
+    subscribers = make_zipf_subscribers(subscriber_count, catalogue,
+                                        wishlist_size, exponent, seed)
+    products = Products()
+    observer = DiscountObserver()
+    publisher = DiscountPublisher(products)
+    publisher.add_observer(observer)
+    observer.add_many(subscribers)
+    products.add_new_discounts(random.Random(seed).sample(
+        catalogue, min(events, len(catalogue))))
+    publisher.notify_observer()
+
+    start = time.perf_counter()
+    messages = [compose_discount_message(subscriber.name,
+                                         subscriber.wishlist_new_discounted)
+                for subscriber in subscribers
+                if subscriber.wishlist_new_discounted]
+    each = time.perf_counter() - start
+    start = time.perf_counter()
+    bodies, grouped_messages = 0, []
+    for body, recipients in observer.iter_notification_groups():
+        bodies += 1
+        grouped_messages.extend(compose_discount_greeting(name) + body
+                                for _, name in recipients)
+    grouped = time.perf_counter() - start
+    observer.remove_many(subscribers)
+    print(f'{len(messages)} notifications, {bodies} distinct bodies: '
+          f'per subscriber {each:.3f} s, once per body {grouped:.3f} s')
+
+
+class CountingObserver:
+    """
+    bus observer only counting the events it receives.
+    """
+    __slots__ = ('received',)
+
+    def __init__(self) -> None:
+        self.received = 0
+
+    def update(self, event: Event) -> None:
+        self.received += 1
+
+
+def time_bus_dispatch(topics: int, subscriptions: int, events: int = 10_000,
+                      values: int = 100, seed: int = 0) -> Tuple[float, int]:
+    """
+    returns seconds per dispatched event and deliveries made, on a bus
+    with `subscriptions` subscriptions spread over `topics` topics, each
+    filtering on one of `values` categories, half also on a severity.
+
+    Parameters
+    ----------
+    topics: int:
+        number of topics.
+    subscriptions: int:
+        total number of subscriptions.
+    events: int:
+        number of events dispatched.
+    values: int:
+        number of distinct categories.
+    seed: int:
+        seed of the random generator.
+    """
+    rng = random.Random(seed)
+    bus = EventBus()
+    for i in range(subscriptions):
+        filters = {'category': rng.randrange(values)}
+        if i % 2:
+            filters['severity'] = rng.choice(('low', 'high'))
+        bus.subscribe(CountingObserver(), f'topic{i % topics}', **filters)
+    stream = [Event(f'topic{rng.randrange(topics)}',
+                    {'category': rng.randrange(values),
+                     'severity': rng.choice(('low', 'high'))})
+              for _ in range(events)]
+    start = time.perf_counter()
+    deliveries = bus.dispatch_many(stream)
+    return (time.perf_counter() - start) / events, deliveries
+
+
+def bench_bus(topic_counts: List[int], subscription_counts: List[int],
+              events: int = 10_000) -> None:
+    """
+    prints the cost of one bus dispatch as topics and subscriptions grow,
+    it follows the deliveries made, not the subscriptions held.
+
+    Parameters
+    ----------
+    topic_counts: List[int]:
+        numbers of topics to try.
+    subscription_counts: List[int]:
+        numbers of subscriptions to try.
+    events: int:
+        number of events dispatched per run.
+    """
+    print(f'{"topics":>7} {"subscriptions":>13} {"us/event":>9} '
+          f'{"deliveries/event":>16}')
+    for topics in topic_counts:
+        for subscriptions in subscription_counts:
+            seconds, deliveries = time_bus_dispatch(topics, subscriptions,
+                                                    events)
+            print(f'{topics:>7} {subscriptions:>13} {seconds * 1e6:>9.2f} '
+                  f'{deliveries / events:>16.2f}')
+
+
+def bench_scheduler(bulk: int = 200_000, urgent: int = 50,
+                    send_cost: float = 20e-6, batch_size: int = 100) -> None:
+    """
+    prints the latency of urgent messages submitted while a scheduler's
+    background thread works through a backlog of bulk messages.
+
+    Parameters
+    ----------
+    bulk: int:
+        number of queued bulk messages.
+    urgent: int:
+        number of urgent messages, submitted 10 ms apart.
+    send_cost: float:
+        simulated seconds to send one message.
+    batch_size: int:
+        scheduler batch size.
+    """
+    submitted, latencies = {}, []
+
+    def send(batch: list) -> None:
+        time.sleep(send_cost * len(batch))
+        now = time.perf_counter()
+        for email, _ in batch:
+            if email in submitted:
+                latencies.append(now - submitted.pop(email))
+
+    scheduler = NotificationScheduler(send, batch_size)
+    scheduler.add_channel('urgent', priority=1)
+    scheduler.add_channel('bulk')
+    scheduler.submit_many('bulk', ((f'user{i}@foo.bar', 'bulk')
+                                   for i in range(bulk)))
+    scheduler.start()
+    for i in range(urgent):
+        time.sleep(0.01)
+        submitted[f'alert{i}@foo.bar'] = time.perf_counter()
+        scheduler.submit('urgent', f'alert{i}@foo.bar', 'urgent')
+    backlog = scheduler.depth()['bulk']
+    scheduler.close()
+    latencies.sort()
+    print(f'{urgent} urgent messages behind {bulk} bulk ones '
+          f'({backlog} still queued), batch size {batch_size}: '
+          f'p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+          f'max {latencies[-1] * 1000:.1f} ms')
+
+
+def bench_process_scaling(subscriber_count: int, max_processes: int,
+                          product_count: int, events: int,
+                          wishlist_size: int = 5, exponent: float = 1.1,
+                          seed: int = 0) -> None:
+    """
+    prints fan-out time of one process vs 1 to max_processes workers.
+    subscribers and discounts are drawn from the same catalogue, like in
+    run_pipeline.
+
+    Parameters
+    ----------
+    subscriber_count: int:
+        number of subscribers.
+    max_processes: int:
+        largest number of worker processes to try.
+    product_count: int:
+        number of products in the catalogue.
+    events: int:
+        number of discounted products, at most product_count.
+    wishlist_size: int:
+        number of products in each wishlist.
+    exponent: float:
+        Zipf exponent of product popularity.
+    seed: int:
+        seed of the random generator.
+    """
+    catalogue = load_catalogue(product_count)
+    subscribers = make_zipf_subscribers(subscriber_count, catalogue,
+                                        wishlist_size, exponent, seed)
+    discounts = random.Random(seed).sample(catalogue,
+                                           min(events, len(catalogue)))
+
+    observer = DiscountObserver()
+    observer.add_many(subscribers)
+    baseline, messages = time_fan_out(observer, discounts)
+    observer.remove_many(subscribers)
+    print(f"{subscriber_count} subscribers, {len(discounts)} discounts, "
+          f"{messages} messages, in process: {baseline:.3f}s")
+
+    processes = 1
+    while processes <= max_processes:
+        pool = ProcessPoolDiscountObserver(processes)
+        for subscriber in subscribers:
+            pool.add_subscriber(subscriber)
+        pool.start()
+        pool.update([])  # workers are spawned and loaded outside timing
+        seconds, pool_messages = time_fan_out(pool, discounts)
+        pool.close()
+        print(f"{processes:>3} processes: {seconds:.3f}s, "
+              f"speedup {baseline / seconds:.2f}x"
+              + ('' if pool_messages == messages
+                 else f', {pool_messages} messages'))
+        processes *= 2
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    runs the benchmarks selected on the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--subscribers', type=int, default=200_000,
+                        help='largest number of subscribers')
+    parser.add_argument('--steps', type=int, default=4,
+                        help='points of the scaling curve, halving the '
+                             'subscribers each step')
+    parser.add_argument('--products', type=int, default=10_000,
+                        help='number of products in the catalogue')
+    parser.add_argument('--events', type=int, default=1_000,
+                        help='number of discount events')
+    parser.add_argument('--batch', type=int, default=1,
+                        help='discount events per notification')
+    parser.add_argument('--wishlist', type=int, default=5,
+                        help='products in each wishlist')
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help='Zipf exponent of product popularity')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='also compare 1 to PROCESSES worker processes')
+    parser.add_argument('--bus', action='store_true',
+                        help='only benchmark event bus dispatch')
+    parser.add_argument('--scheduler', action='store_true',
+                        help='only benchmark urgent message latency '
+                             'under bulk load')
+    parser.add_argument('--render', action='store_true',
+                        help='only compare rendering per subscriber and '
+                             'once per distinct body')
+    args = parser.parse_args(argv)
+
+    if args.bus:
+        bench_bus([1, 10, 100], [1_000, 10_000, 100_000])
+        return
+    if args.scheduler:
+        bench_scheduler()
+        return
+    if args.render:
+        bench_render(args.subscribers, args.products, args.events,
+                     args.wishlist, args.zipf)
+        return
+
+    counts = sorted({max(args.subscribers >> step, 1)
+                     for step in range(args.steps)})
+    bench_pipeline(counts, args.products, args.events, args.batch,
+                   args.wishlist, args.zipf)
+    if args.processes:
+        bench_process_scaling(args.subscribers, args.processes,
+                              args.products, args.events, args.wishlist,
+                              args.zipf)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+event bus routing events to observers by topic and attribute filters.
+
+subscriptions are indexed when they are made: per topic, subscriptions
+filtering on the same attribute names share a table keyed by the
+filtered values. dispatching an event looks up one entry per distinct
+set of filtered attribute names of its topic, so its cost does not grow
+with the number of subscriptions or topics, only with the number of
+observers it actually reaches.
+"""
+from itertools import product
+from typing import (Any, Dict, Hashable, Iterable, List, Mapping,
+                    NamedTuple, Tuple)
+
+from services.registry import hybridmethod
+
+
+class Event(NamedTuple):
+    """
+    event published on the bus.
+    """
+    topic: str
+    attributes: Mapping[str, Hashable]
+    payload: Any = None
+
+
+class Subscription(NamedTuple):
+    """
+    an observer's interest in the events of a topic whose attributes
+    equal the filters. a filter given as a tuple, list, set or frozenset
+    accepts any of its values.
+    """
+    observer: Any
+    topic: str
+    filters: Tuple[Tuple[str, Any], ...]
+
+    def index_keys(self) -> Tuple[Tuple[str, ...],
+                                  List[Tuple[Hashable, ...]]]:
+        """
+        returns the subscription's filtered attribute names, sorted, and
+        every combination of accepted values in that order.
+        """
+        names = tuple(name for name, _ in self.filters)
+        choices = [value if isinstance(value, (tuple, list, set, frozenset))
+                   else (value,) for _, value in self.filters]
+        return names, list(product(*choices))
+
+
+class EventBus:
+    """
+    routes published events to the observers subscribed to them.
+
+    the class is the shared default bus, instances own a separate index.
+    """
+    # topic -> filtered names -> filtered values -> observers
+    _index: Dict[str, Dict[Tuple[str, ...],
+                           Dict[Tuple[Hashable, ...], Dict[Any, int]]]] = {}
+    _subscriptions: Dict[Any, List[Subscription]] = {}
+
+    def __init__(self) -> None:
+        self._index = {}
+        self._subscriptions = {}
+
+    @hybridmethod
+    def subscribe(cls, observer: Any, topic: str,
+                  **filters: Any) -> Subscription:
+        """
+        subscribes observer to the events of topic matching every filter,
+        returns the subscription.
+
+        Parameters
+        ----------
+        observer: Any:
+            object with an update(event) method.
+        topic: str:
+            topic of the events.
+        filters: Any:
+            attribute values the events must have.
+        """
+        subscription = Subscription(observer, topic,
+                                    tuple(sorted(filters.items())))
+        names, values = subscription.index_keys()
+        table = cls._index.setdefault(topic, {}).setdefault(names, {})
+        for key in values:
+            observers = table.setdefault(key, {})
+            observers[observer] = observers.get(observer, 0) + 1
+        cls._subscriptions.setdefault(observer, []).append(subscription)
+        return subscription
+
+    @hybridmethod
+    def unsubscribe(cls, subscription: Subscription) -> None:
+        """
+        removes a subscription. raises ValueError if it is not on the bus.
+
+        Parameters
+        ----------
+        subscription: Subscription:
+            subscription returned by subscribe.
+        """
+        subscriptions = cls._subscriptions.get(subscription.observer, [])
+        try:
+            subscriptions.remove(subscription)
+        except ValueError:
+            raise ValueError('subscription is not on the bus') from None
+        if not subscriptions:
+            del cls._subscriptions[subscription.observer]
+        names, values = subscription.index_keys()
+        tables = cls._index[subscription.topic]
+        table = tables[names]
+        for key in values:
+            observers = table[key]
+            observers[subscription.observer] -= 1
+            if not observers[subscription.observer]:
+                del observers[subscription.observer]
+                if not observers:
+                    del table[key]
+        if not table:
+            del tables[names]
+            if not tables:
+                del cls._index[subscription.topic]
+
+    @hybridmethod
+    def unsubscribe_all(cls, observer: Any) -> None:
+        """
+        removes every subscription of observer.
+
+        Parameters
+        ----------
+        observer: Any:
+            subscribed observer.
+        """
+        for subscription in list(cls._subscriptions.get(observer, ())):
+            cls.unsubscribe(subscription)
+
+    @hybridmethod
+    def get_subscriptions(cls, observer: Any) -> List[Subscription]:
+        """
+        returns the subscriptions of observer.
+
+        Parameters
+        ----------
+        observer: Any:
+            subscribed observer.
+        """
+        return list(cls._subscriptions.get(observer, ()))
+
+    @hybridmethod
+    def match(cls, event: Event) -> List[Any]:
+        """
+        returns the observers subscribed to event, each once, in the order
+        they subscribed within each set of filtered attribute names.
+
+        Parameters
+        ----------
+        event: Event:
+            published event.
+        """
+        matched = {}
+        attributes = event.attributes
+        for names, table in cls._index.get(event.topic, {}).items():
+            try:
+                key = tuple(attributes[name] for name in names)
+            except KeyError:
+                continue
+            observers = table.get(key)
+            if observers:
+                matched.update(observers)
+        return list(matched)
+
+    @hybridmethod
+    def dispatch(cls, event: Event) -> int:
+        """
+        passes event to the update method of every matching observer,
+        returns the number of observers reached.
+
+        Parameters
+        ----------
+        event: Event:
+            published event.
+        """
+        observers = cls.match(event)
+        for observer in observers:
+            observer.update(event)
+        return len(observers)
+
+    @hybridmethod
+    def publish(cls, topic: str, payload: Any = None,
+                **attributes: Hashable) -> int:
+        """
+        dispatches a new event, returns the number of observers reached.
+
+        Parameters
+        ----------
+        topic: str:
+            topic of the event.
+        payload: Any:
+            content of the event.
+        attributes: Hashable:
+            attributes subscriptions filter on.
+        """
+        return cls.dispatch(Event(topic, attributes, payload))
+
+    @hybridmethod
+    def dispatch_many(cls, events: Iterable[Event]) -> int:
+        """
+        dispatches events in order, returns the number of deliveries.
+
+        Parameters
+        ----------
+        events: Iterable[Event]:
+            published events.
+        """
+        return sum(cls.dispatch(event) for event in events)
@@ -0,0 +1,145 @@
+"""
+coalesces bursts of discount events into one notification.
+
+discounts are recorded in Products as they arrive, but the publisher
+is only notified once per window: when `window` seconds have passed
+since the first discount of the window, or `max_events` discounts have
+been recorded, whichever comes first. DiscountObserver.update then runs
+once per window and each subscriber gets one combined message.
+
+flushing always runs on the caller's thread, inside add_new_discounts,
+poll, flush or close, never on a timer thread, so it cannot race with
+the caller changing subscribers, observers or products. a caller that
+may go quiet with events pending calls poll() from its loop to flush a
+window whose time is up.
+"""
+import time
+from typing import Callable, Iterable, Optional
+
+from services.observer import Observer
+from services.products import Products
+from services.publisher import DiscountPublisher, Publisher
+
+
+class DiscountCoalescer:
+    """
+    batches discount events between Products and a publisher.
+    """
+    def __init__(self, publisher: Publisher = DiscountPublisher,
+                 observers: Iterable[Observer] = (),
+                 products: Products = Products,
+                 window: Optional[float] = 1.0,
+                 max_events: Optional[int] = 500,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        publisher: Publisher:
+            publisher notified once per window, the DiscountPublisher
+            class or an instance.
+        observers: Iterable[Observer]:
+            observers whose subscribers are notified after every window.
+        products: Products:
+            discount state the publisher watches, the Products class or
+            an instance.
+        window: Optional[float]:
+            seconds from the first event of a window until it is
+            flushed, windows are only flushed by count or flush() if None.
+        max_events: Optional[int]:
+            number of events that flushes a window early, no limit if None.
+        clock: Callable[[], float]:
+            returns the current time in seconds.
+        """
+        if window is not None and window <= 0:
+            raise ValueError('window has to be positive.')
+        if max_events is not None and max_events < 1:
+            raise ValueError('max_events has to be at least 1.')
+        self.publisher = publisher
+        self.observers = list(observers)
+        self.products = products
+        self.window = window
+        self.max_events = max_events
+        self.clock = clock
+        self.flushes = 0
+        self._pending = 0
+        self._deadline: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        number of events recorded since the last flush.
+        """
+        return self._pending
+
+    def add_new_discount(self, product: str) -> None:
+        """
+        records a new discount, flushing the window if it is full or
+        its time is up. raises ValueError if no such product is found.
+
+        Parameters
+        ----------
+        product: str:
+            product to be added to new discounts.
+        """
+        self.add_new_discounts([product])
+
+    def add_new_discounts(self, products: Iterable[str]) -> None:
+        """
+        records new discounts as one event each, flushing the window if
+        it is full or its time is up. raises ValueError, before
+        recording anything, if a product is not found.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            products to be added to new discounts.
+        """
+        products = list(products)
+        if not products:
+            return
+        self.products.add_new_discounts(products)
+        if not self._pending and self.window is not None:
+            self._deadline = self.clock() + self.window
+        self._pending += len(products)
+        if (self.max_events is not None
+                and self._pending >= self.max_events):
+            self.flush()
+        else:
+            self.poll()
+
+    def poll(self) -> bool:
+        """
+        flushes the window if its time is up, returns True if it did.
+        """
+        if self._deadline is None or self.clock() < self._deadline:
+            return False
+        self.flush()
+        return True
+
+    def flush(self) -> None:
+        """
+        notifies the publisher of every event of the window, then the
+        observers' subscribers, and starts a new window. does nothing if
+        no event is pending.
+        """
+        self._deadline = None
+        if not self._pending:
+            return
+        self._pending = 0
+        self.flushes += 1
+        self.publisher.notify_observer()
+        for observer in self.observers:
+            observer.notify_subscriber()
+
+    def close(self) -> None:
+        """
+        flushes pending events.
+        """
+        self.flush()
+
+    def __enter__(self) -> 'DiscountCoalescer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,14 +1,543 @@
 """
 emulates sending email, only for example's demonstration.
+
+messages leave through a Transport. connections are opened once, kept
+in a ConnectionPool and reused for every message, bulk sends go through
+EMail.send_many in batches and report their throughput. AsyncEMail
+keeps many sends in flight from one asyncio event loop.
 """
+import asyncio
+import json
+import os
+import smtplib
+import time
+from abc import (ABCMeta,
+                 abstractmethod)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+from itertools import islice
+from queue import LifoQueue, Empty
+from threading import Lock
+from typing import (Awaitable, Callable, Iterable, Iterator, List,
+                    NamedTuple, Optional, Tuple)
+
+
+class Transport(metaclass=ABCMeta):
+    """
+    Interface for a connection able to deliver emails.
+    """
+    def open(self) -> None:
+        """
+        opens the underlying connection, no-op by default.
+        """
+
+    def close(self) -> None:
+        """
+        closes the underlying connection, no-op by default.
+        """
+
+    @abstractmethod
+    def send(self, email: str, message: str) -> None:
+        """
+        sends a single message over the open connection,
+        raises NotImplementedError if not overwritten.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        raise NotImplementedError
+
+    def send_many(self, messages: List[Tuple[str, str]]) -> None:
+        """
+        sends a batch of messages over the open connection.
+
+        Parameters
+        ----------
+        messages: List[Tuple[str, str]]:
+            (recipient email, message body) pairs.
+        """
+        for email, message in messages:
+            self.send(email, message)
+
+    def send_group(self, body: str, recipients: List[Tuple[str, str]],
+                   greeting: Callable[[str], str]) -> None:
+        """
+        sends the same body to a batch of recipients, each message
+        starting with the recipient's own greeting.
+
+        Parameters
+        ----------
+        body: str:
+            body shared by every recipient.
+        recipients: List[Tuple[str, str]]:
+            (recipient email, recipient name) pairs.
+        greeting: Callable[[str], str]:
+            returns the greeting of a recipient given their name.
+        """
+        self.send_many([(email, greeting(name) + body)
+                        for email, name in recipients])
+
+
+class PrintTransport(Transport):
+    """
+    prints emails onto terminal.
+    """
+    def send(self, email: str, message: str) -> None:
+        """
+        prints the email.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        print(f"to: {email}\n{message}")
+
+
+class MemoryTransport(Transport):
+    """
+    in-process stand-in transport, keeps sent emails in a list.
+    """
+    def __init__(self) -> None:
+        self.outbox = []
+
+    def send(self, email: str, message: str) -> None:
+        """
+        appends the email to outbox.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        self.outbox.append((email, message))
+
+
+class SpoolTransport(Transport):
+    """
+    stand-in transport writing emails to a spool directory,
+    one JSON line per email and one file per connection.
+    """
+    def __init__(self, directory: str) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        directory: str:
+            directory the spool files are written to.
+        """
+        self.directory = directory
+        self._file = None
+
+    def open(self) -> None:
+        """
+        opens a new spool file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{os.getpid()}-{id(self)}-{time.time_ns()}.jsonl"
+        self._file = open(os.path.join(self.directory, name), 'a',
+                          encoding='utf-8')
+
+    def close(self) -> None:
+        """
+        flushes and closes the spool file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def send(self, email: str, message: str) -> None:
+        """
+        appends the email to the spool file.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        self._file.write(json.dumps({'to': email, 'message': message}))
+        self._file.write('\n')
+
+
+class SMTPTransport(Transport):
+    """
+    sends emails over one reusable SMTP connection.
+    """
+    def __init__(self, host: str, port: int = 25, sender: str = '',
+                 subject: str = '', username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 starttls: bool = False) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        host: str:
+            SMTP server host.
+        port: int:
+            SMTP server port.
+        sender: str:
+            address used in From header.
+        subject: str:
+            subject of every email.
+        username: Optional[str]:
+            login name, no login if None.
+        password: Optional[str]:
+            login password.
+        starttls: bool:
+            whether to upgrade the connection with STARTTLS.
+        """
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.subject = subject
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self._smtp = None
+
+    def open(self) -> None:
+        """
+        connects (and logs in) to the SMTP server.
+        """
+        self._smtp = smtplib.SMTP(self.host, self.port)
+        if self.starttls:
+            self._smtp.starttls()
+        if self.username is not None:
+            self._smtp.login(self.username, self.password)
+
+    def close(self) -> None:
+        """
+        says goodbye to the SMTP server.
+        """
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                self._smtp.close()
+            self._smtp = None
+
+    def send(self, email: str, message: str) -> None:
+        """
+        sends the email, reconnecting once if the server dropped
+        the connection.
+
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        """
+        mail = EmailMessage()
+        mail['From'] = self.sender
+        mail['To'] = email
+        mail['Subject'] = self.subject
+        mail.set_content(message)
+        try:
+            self._smtp.send_message(mail)
+        except smtplib.SMTPServerDisconnected:
+            self.open()
+            self._smtp.send_message(mail)
+
+
+class ConnectionPool:
+    """
+    keeps opened transports around so they are reused between sends.
+    """
+    def __init__(self, factory: Callable[[], Transport],
+                 size: int = 1) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        factory: Callable[[], Transport]:
+            creates a new, not yet opened transport.
+        size: int:
+            maximum number of open connections.
+        """
+        if size < 1:
+            raise ValueError('pool size has to be at least 1.')
+        self.factory = factory
+        self.size = size
+        self._idle = LifoQueue()
+        self._created = 0
+        self._lock = Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[Transport]:
+        """
+        lends an open transport, opening a new one if none is idle
+        and the pool isn't full, otherwise waits for one to be returned.
+        a transport that raised is closed instead of being returned.
+        """
+        try:
+            transport = self._idle.get_nowait()
+        except Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    transport = self.factory()
+                    transport.open()
+                except BaseException:
+                    self._discard()
+                    raise
+            else:
+                transport = self._idle.get()
+        try:
+            yield transport
+        except BaseException:
+            transport.close()
+            self._discard()
+            raise
+        self._idle.put(transport)
+
+    def _discard(self) -> None:
+        """
+        frees the slot of a connection that won't be returned.
+        """
+        with self._lock:
+            self._created -= 1
+
+    def close(self) -> None:
+        """
+        closes every idle connection.
+        """
+        while True:
+            try:
+                transport = self._idle.get_nowait()
+            except Empty:
+                return
+            transport.close()
+            self._discard()
+
+
+class BatchReport(NamedTuple):
+    """
+    outcome of one batch sent by EMail.send_many.
+    """
+    batch: int
+    messages: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """
+        messages sent per second in this batch.
+        """
+        if self.seconds <= 0:
+            return float('inf')
+        return self.messages / self.seconds
 
 
 class EMail:
     """
     stand-in for the real Email API.
     """
+    _pool = ConnectionPool(PrintTransport)
+
+    @classmethod
+    def set_transport(cls, factory: Callable[[], Transport],
+                      pool_size: int = 1) -> None:
+        """
+        closes current connections and sends future emails through
+        transports created by factory.
+
+        Parameters
+        ----------
+        factory: Callable[[], Transport]:
+            creates a new, not yet opened transport.
+        pool_size: int:
+            maximum number of open connections.
+        """
+        cls._pool.close()
+        cls._pool = ConnectionPool(factory, pool_size)
+
+    @classmethod
+    def send_email(cls, email: str, message: str) -> None:
+        """
+        sends an email to the given email with given message.
+        Parameters
+        ----------
+        email: str:
+            email of the recipient.
+        message:
+            body of the email.
+        """
+        with cls._pool.connection() as transport:
+            transport.send(email, message)
+
+    @classmethod
+    def send_many(cls, messages: Iterable[Tuple[str, str]],
+                  batch_size: int = 100,
+                  report: Optional[Callable[[BatchReport], None]] = None
+                  ) -> List[BatchReport]:
+        """
+        sends emails in batches, each batch over one pooled connection.
+        messages are consumed lazily, one batch at a time.
+
+        Parameters
+        ----------
+        messages: Iterable[Tuple[str, str]]:
+            (recipient email, message body) pairs.
+        batch_size: int:
+            number of emails sent per batch.
+        report: Optional[Callable[[BatchReport], None]]:
+            called with the report of every batch once it is sent.
+        """
+        if batch_size < 1:
+            raise ValueError('batch size has to be at least 1.')
+        reports = []
+        messages = iter(messages)
+        while True:
+            batch = list(islice(messages, batch_size))
+            if not batch:
+                return reports
+            start = time.perf_counter()
+            with cls._pool.connection() as transport:
+                transport.send_many(batch)
+            batch_report = BatchReport(len(reports), len(batch),
+                                       time.perf_counter() - start)
+            reports.append(batch_report)
+            if report is not None:
+                report(batch_report)
+
+    @classmethod
+    def send_groups(cls, groups: Iterable[Tuple[str, List[Tuple[str, str]]]],
+                    greeting: Callable[[str], str],
+                    batch_size: int = 100) -> int:
+        """
+        sends each group's body to its recipients, personalising only the
+        greeting, in batches of recipients sharing a body. groups are
+        consumed lazily, returns the number of emails sent.
+
+        Parameters
+        ----------
+        groups: Iterable[Tuple[str, List[Tuple[str, str]]]]:
+            (body, [(recipient email, recipient name), ...]) pairs.
+        greeting: Callable[[str], str]:
+            returns the greeting of a recipient given their name.
+        batch_size: int:
+            number of recipients sent per batch.
+        """
+        if batch_size < 1:
+            raise ValueError('batch size has to be at least 1.')
+        sent = 0
+        for body, recipients in groups:
+            for first in range(0, len(recipients), batch_size):
+                batch = recipients[first:first + batch_size]
+                with cls._pool.connection() as transport:
+                    transport.send_group(body, batch, greeting)
+                sent += len(batch)
+        return sent
+
+
+class AsyncSendReport(NamedTuple):
+    """
+    outcome of AsyncEMail.send_many.
+    """
+    sent: int
+    failed: List[Tuple[str, BaseException]]
+    seconds: float
+
+
+class AsyncEMail:
+    """
+    asyncio front end of the Email API.
+
+    by default every email is sent through EMail's transport on a
+    worker thread, with as many threads and pooled connections as
+    emails may be in flight (see set_limit), so one slow recipient
+    doesn't hold up the others. set_sender plugs in a native coroutine
+    instead.
+    """
+    _sender: Optional[Callable[[str, str], Awaitable[None]]] = None
+    _limit = 100
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _pool: Optional[ConnectionPool] = None
+    _pool_source: Optional[ConnectionPool] = None
+
+    @classmethod
+    def set_sender(cls, sender: Optional[
+            Callable[[str, str], Awaitable[None]]]) -> None:
+        """
+        sends future emails with the given coroutine function.
+
+        Parameters
+        ----------
+        sender: Optional[Callable[[str, str], Awaitable[None]]]:
+            called with (email, message), None restores the default.
+        """
+        cls._sender = sender
+
+    @classmethod
+    def set_limit(cls, limit: int) -> None:
+        """
+        sets the maximum number of emails in flight at once,
+        across every caller.
+
+        Parameters
+        ----------
+        limit: int:
+            maximum number of concurrent sends.
+        """
+        if limit < 1:
+            raise ValueError('limit has to be at least 1.')
+        cls._limit = limit
+        cls._semaphore = None
+        cls.close()
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        stops the default sender's worker threads and closes its
+        connections, they are created again on the next send.
+        """
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False)
+            cls._pool.close()
+        cls._executor = cls._pool = cls._pool_source = None
+
+    @classmethod
+    def _blocking_pool(cls) -> Tuple[ThreadPoolExecutor, ConnectionPool]:
+        """
+        returns the default sender's worker threads and connections,
+        one of each per email in flight, following EMail's transport.
+        """
+        if cls._pool_source is not EMail._pool:
+            cls.close()
+            cls._executor = ThreadPoolExecutor(
+                cls._limit, thread_name_prefix='AsyncEMail')
+            cls._pool = ConnectionPool(EMail._pool.factory, cls._limit)
+            cls._pool_source = EMail._pool
+        return cls._executor, cls._pool
+
     @staticmethod
-    def send_email(email: str, message: str) -> None:
+    def _send_blocking(pool: ConnectionPool, email: str,
+                       message: str) -> None:
+        """
+        sends an email over one of pool's connections.
+        """
+        with pool.connection() as transport:
+            transport.send(email, message)
+
+    @classmethod
+    async def send_email(cls, email: str, message: str) -> None:
         """
         sends an email to the given email with given message.
         Parameters
@@ -18,4 +547,70 @@ class EMail:
         message:
             body of the email.
         """
-        print(f"to: {email}\n{message}")
+        loop = asyncio.get_running_loop()
+        if cls._semaphore is None or cls._semaphore_loop is not loop:
+            cls._semaphore = asyncio.Semaphore(cls._limit)
+            cls._semaphore_loop = loop
+        async with cls._semaphore:
+            if cls._sender is None:
+                executor, pool = cls._blocking_pool()
+                await loop.run_in_executor(executor, cls._send_blocking,
+                                           pool, email, message)
+            else:
+                await cls._sender(email, message)
+
+    @classmethod
+    async def send_many(cls, messages: Iterable[Tuple[str, str]],
+                        concurrency: int = 100, queue_size: int = 1000,
+                        timeout: Optional[float] = None) -> AsyncSendReport:
+        """
+        sends emails with `concurrency` workers fed from a bounded queue,
+        messages are only pulled from the iterable while the queue has
+        room. a failed or timed out email is reported and doesn't stop
+        the others.
+
+        Parameters
+        ----------
+        messages: Iterable[Tuple[str, str]]:
+            (recipient email, message body) pairs.
+        concurrency: int:
+            number of emails in flight at once.
+        queue_size: int:
+            number of emails waiting for a free worker.
+        timeout: Optional[float]:
+            seconds a single email may take, no limit if None.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency has to be at least 1.')
+        queue = asyncio.Queue(maxsize=queue_size)
+        failed = []
+        sent = 0
+
+        async def worker() -> None:
+            nonlocal sent
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                email, message = item
+                try:
+                    await asyncio.wait_for(cls.send_email(email, message),
+                                           timeout)
+                except Exception as error:
+                    failed.append((email, error))
+                else:
+                    sent += 1
+
+        start = time.perf_counter()
+        workers = [asyncio.create_task(worker())
+                   for _ in range(concurrency)]
+        try:
+            for item in messages:
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        return AsyncSendReport(sent, failed, time.perf_counter() - start)
@@ -5,17 +5,89 @@ subscribers.
 
 from abc import (ABCMeta,
                  abstractmethod)
-from typing import Any, List
+from itertools import islice
+from zlib import crc32
+from typing import (Any, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
 
+from services.bus import Event
+from services.products import Products
 from services.subscriber import Subscriber
-from services.email import EMail
+from services.email import AsyncEMail, AsyncSendReport, EMail
+from services.registry import WeakRegistry, hybridmethod
+
+
+_ARTICLE_MESSAGE = ("dear {},\n"
+                    "new articles were published:\n"
+                    "{}").format
+_SECURITY_MESSAGE = ("dear {},\n"
+                     "the following security alerts were raised:\n"
+                     "{}").format
+_DISCOUNT_GREETING = "dear {},\n".format
+_DISCOUNT_BODY = ("the following items from your wishlist "
+                  "have recently gone on sale:\n"
+                  "{}").format
+
+
+def compose_discount_greeting(name: str) -> str:
+    """
+    returns the personal first line of a discount email.
+
+    Parameters
+    ----------
+    name: str:
+        name of the subscriber.
+    """
+    return _DISCOUNT_GREETING(name)
+
+
+def compose_discount_body(items: List[str]) -> str:
+    """
+    returns the part of a discount email shared by every subscriber
+    with the same newly discounted items.
+
+    Parameters
+    ----------
+    items: List[str]:
+        newly discounted items from the subscriber's wishlist.
+    """
+    return _DISCOUNT_BODY(' and '.join(items))
+
+
+def compose_discount_message(name: str, items: List[str]) -> str:
+    """
+    returns the email body announcing discounted wishlist items.
+
+    Parameters
+    ----------
+    name: str:
+        name of the subscriber.
+    items: List[str]:
+        newly discounted items from the subscriber's wishlist.
+    """
+    return _DISCOUNT_GREETING(name) + compose_discount_body(items)
+
+
+def shard_of(email: str, shard_count: int) -> int:
+    """
+    returns the shard, out of shard_count, owning the subscriber with
+    the given email. stable across processes and runs.
+
+    Parameters
+    ----------
+    email: str:
+        email of the subscriber.
+    shard_count: int:
+        number of shards.
+    """
+    return crc32(email.encode()) % shard_count
 
 
 class Observer(metaclass=ABCMeta):
     """
     interface for Observer classes.
     """
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def update(cls, info: Any) -> None:
         """
@@ -28,7 +100,7 @@ class Observer(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def add_subscriber(cls, subscriber: Subscriber) -> None:
         """
@@ -42,7 +114,7 @@ class Observer(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def remove_subscriber(cls, subscriber: Subscriber) -> None:
         """
@@ -56,7 +128,7 @@ class Observer(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def notify_subscriber(cls) -> None:
         """
@@ -69,73 +141,716 @@ class Observer(metaclass=ABCMeta):
 class DiscountObserver(Observer):
     """
     concrete implementation of Observer interface, monitoring discounts.
+
+    the class is the default observer, instances own their
+    subscriber list and product index.
+
+    subscribers and the product id to subscribers index are insertion
+    ordered dicts holding strong references, a subscriber stays
+    registered until remove_subscriber or remove_many is called.
+    subscribers that received newly discounted items are kept in
+    _pending, only they are notified, in the order the discounts were
+    matched and, per product, the order the subscribers were indexed.
+
+    with a scheduler set (see set_scheduler) notifications are queued on
+    the scheduler's `channel` instead of being sent right away.
     """
-    _subscriber_list = []
+    _subscriber_list: Dict[Subscriber, None] = {}
+    _wishlist_index: Dict[int, Dict[Subscriber, None]] = {}
+    _pending: Dict[Subscriber, None] = {}
+    chunk_size = 1000
+    scheduler = None
+    channel = 'discount'
 
-    @classmethod
+    def __init__(self) -> None:
+        self._subscriber_list = {}
+        self._wishlist_index = {}
+        self._pending = {}
+        self.scheduler = None
+
+    @hybridmethod
     def update(cls, new_discounts: List[str]) -> None:
         """
-        updates state of observer.
+        updates state of observer, only subscribers who have a newly
+        discounted item in their wishlist are visited.
 
         Parameters
         ----------
         new_discounts: List: str:
             a list strings matching newly discounted items.
         """
-        for subscriber in cls._subscriber_list:
-            for item in new_discounts:
-                if item in subscriber.wishlist_new_discounted:
-                    subscriber.remove_from_wishlist_new_discounted(item)
-            for item in new_discounts:
-                if item in subscriber.wishlist:
-                    subscriber.add_to_wishlist_new_discounted(item)
-
-    @classmethod
+        cls._match_discounts(new_discounts)
+
+    @hybridmethod
+    def _match_discounts(cls, new_discounts: List[str]) -> None:
+        """
+        adds newly discounted items to the wishlists wishing for them.
+
+        Parameters
+        ----------
+        new_discounts: List: str:
+            a list strings matching newly discounted items.
+        """
+        for item in new_discounts:
+            product_id = Products.get_product_id(item)
+            for subscriber in cls._wishlist_index.get(product_id, ()):
+                subscriber.add_to_wishlist_new_discounted(item)
+                cls._pending[subscriber] = None
+
+    @hybridmethod
+    def index_wishlist_item(cls, subscriber: Subscriber,
+                            product_id: int) -> None:
+        """
+        records that subscriber wishes for a product in the
+        product id to subscribers index.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber who added the product to their wishlist.
+        product_id: int:
+            id of the product added to the wishlist.
+        """
+        subscribers = cls._wishlist_index.get(product_id)
+        if subscribers is None:
+            subscribers = cls._wishlist_index[product_id] = {}
+        subscribers[subscriber] = None
+
+    @hybridmethod
+    def unindex_wishlist_item(cls, subscriber: Subscriber,
+                              product_id: int) -> None:
+        """
+        removes subscriber from the product's entry in the
+        product id to subscribers index.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber who removed the product from their wishlist.
+        product_id: int:
+            id of the product removed from the wishlist.
+        """
+        subscribers = cls._wishlist_index.get(product_id)
+        if subscribers is not None:
+            subscribers.pop(subscriber, None)
+            if not subscribers:
+                del cls._wishlist_index[product_id]
+
+    @hybridmethod
     def add_subscriber(cls, subscriber: Subscriber) -> None:
         """
-        adds a subscriber to the observer.
+        adds a subscriber to the observer, a subscriber already added
+        is left as is.
 
         Parameters
         ----------
         subscriber: Subscriber:
             DiscountSubscriber to be added to the observer.
         """
-        cls._subscriber_list.append(subscriber)
+        if subscriber in cls._subscriber_list:
+            return
+        cls._subscriber_list[subscriber] = None
+        for product_id in subscriber.wishlist_ids:
+            cls.index_wishlist_item(subscriber, product_id)
+        subscriber.attach_observer(cls)
 
-    @classmethod
+    @hybridmethod
     def remove_subscriber(cls, subscriber: Subscriber) -> None:
         """
         removes a subscriber from the observer.
+        raises ValueError if it was not added.
 
         Parameters
         ----------
         subscriber: Subscriber:
             DiscountSubscriber to be removed from the observer.
         """
-        cls._subscriber_list.remove(subscriber)
+        if subscriber not in cls._subscriber_list:
+            raise ValueError(f'{subscriber!r} is not registered')
+        del cls._subscriber_list[subscriber]
+        cls._forget_subscriber(subscriber)
+
+    @hybridmethod
+    def _forget_subscriber(cls, subscriber: Subscriber) -> None:
+        """
+        drops a removed subscriber's pending items and index entries.
+        """
+        cls._pending.pop(subscriber, None)
+        for product_id in subscriber.wishlist_ids:
+            cls.unindex_wishlist_item(subscriber, product_id)
+        subscriber.detach_observer(cls)
+
+    @hybridmethod
+    def add_many(cls, subscribers: Iterable[Subscriber]) -> int:
+        """
+        adds subscribers to the observer, returns the number that were
+        not added yet.
+
+        Parameters
+        ----------
+        subscribers: Iterable[Subscriber]:
+            DiscountSubscribers to be added to the observer.
+        """
+        added = 0
+        for subscriber in subscribers:
+            if subscriber not in cls._subscriber_list:
+                cls._subscriber_list[subscriber] = None
+                for product_id in subscriber.wishlist_ids:
+                    cls.index_wishlist_item(subscriber, product_id)
+                subscriber.attach_observer(cls)
+                added += 1
+        return added
+
+    @hybridmethod
+    def remove_many(cls, subscribers: Iterable[Subscriber]) -> int:
+        """
+        removes subscribers from the observer, returns the number that
+        were added. subscribers that were not added are skipped.
+
+        Parameters
+        ----------
+        subscribers: Iterable[Subscriber]:
+            DiscountSubscribers to be removed from the observer.
+        """
+        removed = 0
+        for subscriber in subscribers:
+            if cls._subscriber_list.pop(subscriber, False) is None:
+                cls._forget_subscriber(subscriber)
+                removed += 1
+        return removed
 
-    @classmethod
+    @hybridmethod
+    def get_subscribers(cls) -> List[Subscriber]:
+        """
+        returns the subscribers in the list.
+        """
+        return list(cls._subscriber_list)
+
+    @hybridmethod
+    def get_wishlist_subscribers(cls, product: str) -> List[Subscriber]:
+        """
+        returns the subscribers with product in their wishlist,
+        from the product id to subscribers index.
+
+        Parameters
+        ----------
+        product: str:
+            product to look up.
+        """
+        product_id = Products.get_product_id(product)
+        return list(cls._wishlist_index.get(product_id, ()))
+
+    @hybridmethod
+    def set_scheduler(cls, scheduler: Optional[Any],
+                      channel: Optional[str] = None) -> None:
+        """
+        queues future notifications on a scheduler instead of sending
+        them, None sends them right away again. the scheduler belongs to
+        the observer it is set on: set on the class it only applies to
+        the class-level default observer, instances start without one.
+
+        Parameters
+        ----------
+        scheduler: Optional[NotificationScheduler]:
+            scheduler notifications are queued on.
+        channel: Optional[str]:
+            scheduler channel to use, the observer's channel if None.
+        """
+        cls.scheduler = scheduler
+        if channel is not None:
+            cls.channel = channel
+
+    @hybridmethod
     def notify_subscriber(cls) -> None:
         """
         notifies the subscribers in the list, of the new events.
+        subscribers with the same newly discounted items share one
+        rendered body and are sent in batches of chunk_size, or the
+        messages are queued on the scheduler if one is set. announced
+        items are moved to all discounted items afterwards so they are
+        not sent again.
+        """
+        if cls.scheduler is not None:
+            cls.scheduler.submit_many(cls.channel, cls.iter_notifications())
+            return
+        EMail.send_groups(cls.iter_notification_groups(),
+                          compose_discount_greeting,
+                          batch_size=cls.chunk_size)
+
+    @hybridmethod
+    def _iter_pending_messages(cls) -> Iterator[Tuple[Subscriber, str]]:
+        """
+        lazily yields (subscriber, message body) for every pending
+        subscriber with newly discounted items, subscribers with nothing
+        new leave _pending. bodies are rendered once per distinct set of
+        items, only the greeting is per subscriber.
+        """
+        bodies = {}
+        for subscriber in list(cls._pending):
+            key = subscriber.new_discounted_key()
+            if key is None:
+                cls._pending.pop(subscriber, None)
+                continue
+            body = bodies.get(key)
+            if body is None:
+                body = bodies[key] = compose_discount_body(
+                    subscriber.wishlist_new_discounted)
+            yield subscriber, _DISCOUNT_GREETING(subscriber.name) + body
+
+    @hybridmethod
+    def iter_notifications(cls) -> Iterator[Tuple[str, str]]:
+        """
+        lazily yields (recipient email, message body) for every subscriber
+        with newly discounted items, subscribers with nothing new are
+        skipped. a subscriber's items are archived and it leaves _pending
+        once the consumer asks for the next message, so subscribers not
+        reached when the consumer fails stay pending for the next call.
+        """
+        for subscriber, message in cls._iter_pending_messages():
+            yield subscriber.email, message
+            subscriber.archive_wishlist_new_discounted()
+            cls._pending.pop(subscriber, None)
+
+    @hybridmethod
+    def enqueue_notifications(cls, outbox: Any, campaign: str) -> int:
+        """
+        writes the notifications of every subscriber with newly
+        discounted items to an outbox, returns the number added.
+        subscribers are archived one outbox batch at a time, only
+        after their batch is committed, so a failed write leaves them
+        pending to be enqueued again.
+
+        Parameters
+        ----------
+        outbox: NotificationOutbox:
+            outbox the notifications are written to.
+        campaign: str:
+            id of the announcement, part of every notification's
+            idempotency key.
+        """
+        messages = cls._iter_pending_messages()
+        added = 0
+        while True:
+            batch = list(islice(messages, outbox.batch_size))
+            if not batch:
+                return added
+            added += outbox.enqueue([(subscriber.email, message)
+                                     for subscriber, message in batch],
+                                    campaign)
+            for subscriber, _ in batch:
+                subscriber.archive_wishlist_new_discounted()
+                cls._pending.pop(subscriber, None)
+
+    @hybridmethod
+    def iter_notification_groups(cls) -> Iterator[
+            Tuple[str, List[Tuple[str, str]]]]:
+        """
+        lazily yields (body, [(recipient email, recipient name), ...]),
+        one group per distinct set of newly discounted items, each body
+        rendered once. a group's subscribers are archived and leave
+        _pending once the consumer asks for the next group, so groups
+        not reached when the consumer fails stay pending for the next
+        call.
+        """
+        groups: Dict[Tuple[int, ...], List[Subscriber]] = {}
+        for subscriber in list(cls._pending):
+            key = subscriber.new_discounted_key()
+            if key is None:
+                cls._pending.pop(subscriber, None)
+            else:
+                groups.setdefault(key, []).append(subscriber)
+        for subscribers in groups.values():
+            body = compose_discount_body(
+                subscribers[0].wishlist_new_discounted)
+            yield body, [(subscriber.email, subscriber.name)
+                         for subscriber in subscribers]
+            for subscriber in subscribers:
+                subscriber.archive_wishlist_new_discounted()
+                cls._pending.pop(subscriber, None)
+
+
+class AsyncObserver(Observer):
+    """
+    interface for Observer classes running on an asyncio event loop.
+    """
+    @hybridmethod
+    @abstractmethod
+    async def update(cls, info: Any) -> None:
+        """
+        updates state of observer.
+
+        Parameters
+        ----------
+        info:
+            the new given state, raises NotImplementedError if not overwritten.
+        """
+        raise NotImplementedError
+
+    @hybridmethod
+    @abstractmethod
+    async def notify_subscriber(cls) -> None:
+        """
+        notifies the subscriber of the new events.
+        raises NotImplementedError if not overwritten.
+        """
+        raise NotImplementedError
+
+
+class AsyncDiscountObserver(AsyncObserver, DiscountObserver):
+    """
+    asyncio variant of DiscountObserver, emails are sent concurrently
+    through AsyncEMail.
+    """
+    _subscriber_list: Dict[Subscriber, None] = {}
+    _wishlist_index: Dict[int, Dict[Subscriber, None]] = {}
+    _pending: Dict[Subscriber, None] = {}
+    concurrency = 100
+    queue_size = 1000
+    timeout: Optional[float] = None
+
+    @hybridmethod
+    async def update(cls, new_discounts: List[str]) -> None:
+        """
+        updates state of observer, only subscribers who have a newly
+        discounted item in their wishlist are visited.
+
+        Parameters
+        ----------
+        new_discounts: List: str:
+            a list strings matching newly discounted items.
+        """
+        cls._match_discounts(new_discounts)
+
+    @hybridmethod
+    async def notify_subscriber(cls) -> AsyncSendReport:
         """
+        notifies the subscribers in the list, of the new events, and
+        returns the AsyncSendReport. at most `concurrency` emails are in
+        flight, and at most `queue_size` wait to be sent. subscribers
+        are archived once the campaign is over, those whose email failed
+        or timed out stay pending and are retried on the next call.
+        """
+        handed_off = []
+
+        def messages() -> Iterator[Tuple[str, str]]:
+            for subscriber, message in cls._iter_pending_messages():
+                handed_off.append(subscriber)
+                yield subscriber.email, message
+        report = await AsyncEMail.send_many(messages(),
+                                            concurrency=cls.concurrency,
+                                            queue_size=cls.queue_size,
+                                            timeout=cls.timeout)
+        failed = {email for email, _ in report.failed}
+        for subscriber in handed_off:
+            if subscriber.email not in failed:
+                subscriber.archive_wishlist_new_discounted()
+                cls._pending.pop(subscriber, None)
+        return report
+
+
+class ShardedDiscountObserver(Observer):
+    """
+    DiscountObserver partitioning its subscribers over independent
+    DiscountObserver instances by a stable hash of their email, so each
+    shard can be processed on its own.
+    """
+    def __init__(self, shard_count: int,
+                 shard_type: type = DiscountObserver) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        shard_count: int:
+            number of shards.
+        shard_type: type:
+            DiscountObserver class the shards are instances of.
+        """
+        if shard_count < 1:
+            raise ValueError('shard count has to be at least 1.')
+        self.shards = [shard_type() for _ in range(shard_count)]
+
+    def shard_for(self, subscriber: Subscriber) -> DiscountObserver:
+        """
+        returns the shard owning the given subscriber.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber to look up.
+        """
+        return self.shards[shard_of(subscriber.email, len(self.shards))]
+
+    def update(self, new_discounts: List[str]) -> None:
+        """
+        updates state of every shard.
+
+        Parameters
+        ----------
+        new_discounts: List: str:
+            a list strings matching newly discounted items.
+        """
+        for shard in self.shards:
+            shard.update(new_discounts)
+
+    def add_subscriber(self, subscriber: Subscriber) -> None:
+        """
+        adds a subscriber to its shard.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            DiscountSubscriber to be added to the observer.
+        """
+        self.shard_for(subscriber).add_subscriber(subscriber)
+
+    def remove_subscriber(self, subscriber: Subscriber) -> None:
+        """
+        removes a subscriber from its shard.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            DiscountSubscriber to be removed from the observer.
+        """
+        self.shard_for(subscriber).remove_subscriber(subscriber)
+
+    def iter_notifications(self) -> Iterator[Tuple[str, str]]:
+        """
+        lazily yields (recipient email, message body) of every shard.
+        """
+        for shard in self.shards:
+            yield from shard.iter_notifications()
+
+    def enqueue_notifications(self, outbox: Any, campaign: str) -> int:
+        """
+        writes the notifications of every shard to an outbox, returns
+        the number added.
+
+        Parameters
+        ----------
+        outbox: NotificationOutbox:
+            outbox the notifications are written to.
+        campaign: str:
+            id of the announcement, part of every notification's
+            idempotency key.
+        """
+        return sum(shard.enqueue_notifications(outbox, campaign)
+                   for shard in self.shards)
+
+    def set_scheduler(self, scheduler: Optional[Any],
+                      channel: Optional[str] = None) -> None:
+        """
+        queues future notifications of every shard on a scheduler
+        instead of sending them, None sends them right away again.
+
+        Parameters
+        ----------
+        scheduler: Optional[NotificationScheduler]:
+            scheduler notifications are queued on.
+        channel: Optional[str]:
+            scheduler channel to use, the shards' channel if None.
+        """
+        for shard in self.shards:
+            shard.set_scheduler(scheduler, channel)
+
+    def notify_subscriber(self) -> None:
+        """
+        notifies the subscribers of every shard, of the new events.
+        """
+        for shard in self.shards:
+            shard.notify_subscriber()
+
+
+class ChannelObserver(Observer):
+    """
+    Observer of a channel on the EventBus.
+
+    the observer's filters select the events it receives, e.g.
+    ArticleObserver(category='python'). every subscriber of the observer
+    receives one message listing the events received since the last
+    notification. the class is the default observer with no filters,
+    subclasses set their own _subscriber_list, _events and _filters.
+    like DiscountObserver, notifications can be queued on a scheduler.
+    """
+    _subscriber_list = WeakRegistry()
+    _events: List[Event] = []
+    _filters: Dict[str, Any] = {}
+    chunk_size = 1000
+    scheduler = None
+    channel = ''
+
+    def __init__(self, **filters: Any) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        filters: Any:
+            event attribute values to receive, a tuple, list, set or
+            frozenset accepts any of its values.
+        """
+        self._subscriber_list = WeakRegistry()
+        self._events = []
+        self._filters = filters
+        self.scheduler = None
+
+    @hybridmethod
+    def get_filters(cls) -> Dict[str, Any]:
+        """
+        returns the event attribute values the observer receives.
+        """
+        return dict(cls._filters)
+
+    @hybridmethod
+    def update(cls, event: Event) -> None:
+        """
+        keeps an event until the next notification.
+
+        Parameters
+        ----------
+        event: Event:
+            event dispatched by the bus.
+        """
+        cls._events.append(event)
+
+    @hybridmethod
+    def add_subscriber(cls, subscriber: Subscriber) -> None:
+        """
+        adds a subscriber to the observer, once.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber to be added to the observer.
+        """
+        cls._subscriber_list.add(subscriber)
+
+    @hybridmethod
+    def remove_subscriber(cls, subscriber: Subscriber) -> None:
+        """
+        removes a subscriber from the observer.
+        raises ValueError if it was not added.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber to be removed from the observer.
+        """
+        cls._subscriber_list.remove(subscriber)
+
+    @hybridmethod
+    def get_subscribers(cls) -> List[Subscriber]:
+        """
+        returns the subscribers in the list.
+        """
+        return list(cls._subscriber_list)
+
+    @hybridmethod
+    def compose_message(cls, name: str, events: List[Event]) -> str:
+        """
+        returns the email body announcing events,
+        raises NotImplementedError if not overwritten.
+
+        Parameters
+        ----------
+        name: str:
+            name of the subscriber.
+        events: List[Event]:
+            events received since the last notification.
+        """
+        raise NotImplementedError
+
+    @hybridmethod
+    def iter_notifications(cls) -> Iterator[Tuple[str, str]]:
+        """
+        lazily yields (recipient email, message body) for every subscriber
+        if events were received since the last notification.
+        """
+        events, cls._events = cls._events, []
+        if not events:
+            return
         for subscriber in cls._subscriber_list:
-            message = f"dear {subscriber.name},\n" \
-                      f"the following items from your wishlist " \
-                      f"have recently gone on sale:\n" \
-                      f"{' and '.join(subscriber.wishlist_new_discounted)}"
-            EMail.send_email(subscriber.email, message)
+            yield (subscriber.email,
+                   cls.compose_message(subscriber.name, events))
+
+    @hybridmethod
+    def set_scheduler(cls, scheduler: Optional[Any],
+                      channel: Optional[str] = None) -> None:
+        """
+        queues future notifications on a scheduler instead of sending
+        them, None sends them right away again. the scheduler belongs to
+        the observer it is set on: set on the class it only applies to
+        the class-level default observer, instances start without one.
 
+        Parameters
+        ----------
+        scheduler: Optional[NotificationScheduler]:
+            scheduler notifications are queued on.
+        channel: Optional[str]:
+            scheduler channel to use, the observer's channel if None.
+        """
+        cls.scheduler = scheduler
+        if channel is not None:
+            cls.channel = channel
 
-class ArticleObserver(Observer):
+    @hybridmethod
+    def notify_subscriber(cls) -> None:
+        """
+        notifies the subscribers in the list, of the received events,
+        or queues the notifications on the scheduler if one is set.
+        """
+        if cls.scheduler is not None:
+            cls.scheduler.submit_many(cls.channel, cls.iter_notifications())
+            return
+        EMail.send_many(cls.iter_notifications(), batch_size=cls.chunk_size)
+
+
+class ArticleObserver(ChannelObserver):
     """
     concrete implementation of Observer interface, monitoring articles.
     """
-    pass
+    channel = 'article'
+    _subscriber_list = WeakRegistry()
+    _events: List[Event] = []
+    _filters: Dict[str, Any] = {}
+
+    @hybridmethod
+    def compose_message(cls, name: str, events: List[Event]) -> str:
+        """
+        returns the email body listing new articles.
+
+        Parameters
+        ----------
+        name: str:
+            name of the subscriber.
+        events: List[Event]:
+            published articles.
+        """
+        return _ARTICLE_MESSAGE(name, '\n'.join(
+            f"{event.payload} ({event.attributes.get('category')})"
+            for event in events))
 
 
-class SecurityObserver(Observer):
+class SecurityObserver(ChannelObserver):
     """
     concrete implementation of Observer interface, monitoring security.
     """
-    pass
+    channel = 'security'
+    _subscriber_list = WeakRegistry()
+    _events: List[Event] = []
+    _filters: Dict[str, Any] = {}
+
+    @hybridmethod
+    def compose_message(cls, name: str, events: List[Event]) -> str:
+        """
+        returns the email body listing security alerts.
+
+        Parameters
+        ----------
+        name: str:
+            name of the subscriber.
+        events: List[Event]:
+            raised alerts.
+        """
+        return _SECURITY_MESSAGE(name, '\n'.join(
+            f"[{event.attributes.get('severity')}] {event.payload}"
+            for event in events))
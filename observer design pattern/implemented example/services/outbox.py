@@ -0,0 +1,357 @@
+"""
+durable queue of notifications waiting to be emailed.
+
+notifications are written to a SQLite database before anything is
+sent, so a crash mid-campaign loses nothing: on restart draining
+resumes after the last notification known to be delivered, and
+notifications leased to a consumer that died are handed out again
+once their lease expires. delivery is at-least-once, a notification
+may be sent twice if the process dies between sending and acking it.
+
+every notification carries an idempotency key derived from its
+campaign, the recipient and the message, which lists the subscriber's
+newly discounted items. enqueueing the same (campaign, subscriber,
+discount set) again while it is undelivered keeps a single
+notification. keys are only unique among undelivered notifications,
+so a discount that expires and is issued again is announced again,
+even under the same campaign.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from services.email import EMail
+
+_PENDING = 0
+_LEASED = 1
+_DONE = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    email TEXT NOT NULL,
+    message TEXT NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS notifications_state
+    ON notifications (state, id);
+CREATE UNIQUE INDEX IF NOT EXISTS notifications_undelivered
+    ON notifications (key) WHERE state != {done};
+CREATE TABLE IF NOT EXISTS progress (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    delivered INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO progress (id, delivered) VALUES (0, 0);
+""".format(done=_DONE)
+
+
+def notification_key(email: str, message: str, campaign: str) -> str:
+    """
+    returns the idempotency key of a notification.
+
+    Parameters
+    ----------
+    email: str:
+        email of the recipient.
+    message: str:
+        body of the email, naming the discounted items.
+    campaign: str:
+        id of the announcement, e.g. a date or the discount version,
+        separates notifications of otherwise identical campaigns.
+    """
+    digest = hashlib.sha256()
+    for part in (campaign, email, message):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class Lease(NamedTuple):
+    """
+    notifications handed to one consumer, to be acked or released.
+    """
+    owner: str
+    ids: List[int]
+    messages: List[Tuple[str, str]]
+
+
+class NotificationOutbox:
+    """
+    SQLite-backed queue of (recipient email, message body) notifications.
+
+    every thread uses its own connection, the database runs in WAL mode
+    so consumers can claim and ack while producers enqueue.
+    """
+    def __init__(self, path: str, batch_size: int = 500,
+                 lease: float = 60.0,
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        initialize the instance, creating the database if needed.
+        Parameters
+        ----------
+        path: str:
+            path of the SQLite database.
+        batch_size: int:
+            notifications written per transaction and claimed at once.
+        lease: float:
+            seconds a consumer has to ack claimed notifications before
+            they are handed out again.
+        clock: Callable[[], float]:
+            returns the current time in seconds, shared by every process
+            using the database.
+        """
+        if batch_size < 1:
+            raise ValueError('batch size has to be at least 1.')
+        self.path = os.fspath(path)
+        self.batch_size = batch_size
+        self.lease = lease
+        self.clock = clock
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        returns the calling thread's connection.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=60.0,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def close(self) -> None:
+        """
+        closes the calling thread's connection.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __enter__(self) -> 'NotificationOutbox':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def enqueue(self, messages: Iterable[Tuple[str, str]],
+                campaign: str) -> int:
+        """
+        durably adds notifications, committing one batch at a time, and
+        returns the number added. notifications whose key is already
+        queued and not yet delivered are skipped.
+
+        messages are read lazily, one batch at a time. a generator that
+        archives as it yields, such as DiscountObserver.iter_notifications,
+        may archive up to batch_size - 1 subscribers before their batch
+        is committed; DiscountObserver.enqueue_notifications archives
+        only after the commit.
+
+        Parameters
+        ----------
+        messages: Iterable[Tuple[str, str]]:
+            (recipient email, message body) pairs.
+        campaign: str:
+            id of the announcement, part of every notification's
+            idempotency key.
+        """
+        connection = self._connection()
+        messages = iter(messages)
+        added = 0
+        while True:
+            batch = list(islice(messages, self.batch_size))
+            if not batch:
+                return added
+            rows = [(notification_key(email, message, campaign),
+                     email, message) for email, message in batch]
+            with connection:
+                connection.execute('BEGIN')
+                before = connection.total_changes
+                connection.executemany(
+                    'INSERT OR IGNORE INTO notifications '
+                    '(key, email, message) VALUES (?, ?, ?)', rows)
+                added += connection.total_changes - before
+
+    def offset(self) -> int:
+        """
+        returns the id up to which every notification was delivered.
+        """
+        return self._connection().execute(
+            'SELECT delivered FROM progress WHERE id = 0').fetchone()[0]
+
+    def pending(self) -> int:
+        """
+        returns the number of notifications not yet delivered.
+        """
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM notifications WHERE state != ? AND id > ?',
+            (_DONE, self.offset())).fetchone()[0]
+
+    def claim(self, limit: Optional[int] = None,
+              owner: Optional[str] = None) -> Lease:
+        """
+        leases up to limit undelivered notifications, oldest first,
+        including ones whose lease expired.
+
+        Parameters
+        ----------
+        limit: Optional[int]:
+            maximum number of notifications, batch_size if None.
+        owner: Optional[str]:
+            name of the consumer, a random one if None.
+        """
+        owner = owner or uuid.uuid4().hex
+        limit = limit or self.batch_size
+        connection = self._connection()
+        now = self.clock()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            offset = connection.execute(
+                'SELECT delivered FROM progress WHERE id = 0').fetchone()[0]
+            rows = connection.execute(
+                'SELECT id, email, message FROM notifications '
+                'WHERE id > ? AND (state = ? OR '
+                '(state = ? AND lease_until < ?)) ORDER BY id LIMIT ?',
+                (offset, _PENDING, _LEASED, now, limit)).fetchall()
+            ids = [row[0] for row in rows]
+            connection.executemany(
+                'UPDATE notifications SET state = ?, owner = ?, '
+                'lease_until = ?, attempts = attempts + 1 WHERE id = ?',
+                [(_LEASED, owner, now + self.lease, row_id)
+                 for row_id in ids])
+        return Lease(owner, ids, [(email, message)
+                                  for _, email, message in rows])
+
+    def ack(self, lease: Lease) -> None:
+        """
+        marks a lease's notifications as delivered and moves the resume
+        offset past every delivered notification.
+
+        Parameters
+        ----------
+        lease: Lease:
+            lease returned by claim.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'UPDATE notifications SET state = ?, lease_until = NULL '
+                'WHERE id = ? AND owner = ?',
+                [(_DONE, row_id, lease.owner) for row_id in lease.ids])
+            self._advance_offset(connection)
+
+    def release(self, lease: Lease) -> None:
+        """
+        hands a lease's notifications back undelivered.
+
+        Parameters
+        ----------
+        lease: Lease:
+            lease returned by claim.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'UPDATE notifications SET state = ?, owner = NULL, '
+                'lease_until = NULL WHERE id = ? AND owner = ? '
+                'AND state = ?',
+                [(_PENDING, row_id, lease.owner, _LEASED)
+                 for row_id in lease.ids])
+
+    @staticmethod
+    def _advance_offset(connection: sqlite3.Connection) -> None:
+        """
+        sets the offset to the id before the oldest undelivered
+        notification, or the newest id if everything was delivered.
+        """
+        offset = connection.execute(
+            'SELECT delivered FROM progress WHERE id = 0').fetchone()[0]
+        undelivered = connection.execute(
+            'SELECT MIN(id) FROM notifications WHERE id > ? AND state != ?',
+            (offset, _DONE)).fetchone()[0]
+        if undelivered is None:
+            undelivered = connection.execute(
+                'SELECT COALESCE(MAX(id), 0) + 1 '
+                'FROM notifications').fetchone()[0]
+        if undelivered - 1 > offset:
+            connection.execute('UPDATE progress SET delivered = ? '
+                               'WHERE id = 0', (undelivered - 1,))
+
+    def compact(self) -> int:
+        """
+        deletes delivered notifications up to the offset, returns the
+        number deleted.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            offset = connection.execute(
+                'SELECT delivered FROM progress WHERE id = 0').fetchone()[0]
+            return connection.execute(
+                'DELETE FROM notifications WHERE id <= ? AND state = ?',
+                (offset, _DONE)).rowcount
+
+    def _consume(self, send: Callable[[List[Tuple[str, str]]], None],
+                 limit: Optional[int]) -> int:
+        """
+        claims, sends and acks batches until nothing is left to claim,
+        returns the number of notifications delivered.
+        """
+        delivered = 0
+        try:
+            while True:
+                lease = self.claim(limit)
+                if not lease.ids:
+                    return delivered
+                try:
+                    send(lease.messages)
+                except BaseException:
+                    self.release(lease)
+                    raise
+                self.ack(lease)
+                delivered += len(lease.ids)
+        finally:
+            self.close()
+
+    def drain(self, consumers: int = 4, limit: Optional[int] = None,
+              send: Optional[Callable[[List[Tuple[str, str]]], None]] = None
+              ) -> int:
+        """
+        delivers every undelivered notification with consumers threads
+        claiming batches in parallel, returns the number delivered.
+        a batch that fails to send is released and the error re-raised.
+
+        Parameters
+        ----------
+        consumers: int:
+            number of consumer threads.
+        limit: Optional[int]:
+            notifications claimed per batch, batch_size if None.
+        send: Optional[Callable[[List[Tuple[str, str]]], None]]:
+            sends a batch of (email, message) pairs, EMail.send_many
+            if None.
+        """
+        if consumers < 1:
+            raise ValueError('consumers has to be at least 1.')
+        if send is None:
+            def send(messages: List[Tuple[str, str]]) -> None:
+                EMail.send_many(messages, batch_size=len(messages))
+        with ThreadPoolExecutor(consumers) as pool:
+            futures = [pool.submit(self._consume, send, limit)
+                       for _ in range(consumers)]
+            return sum(future.result() for future in futures)
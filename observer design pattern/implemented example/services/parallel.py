@@ -0,0 +1,458 @@
+"""
+runs discount matching and message composition in worker processes.
+
+subscribers are partitioned by a hash of their email and each partition
+is shipped once to its own worker process, which then keeps the
+partition's wishlists and newly discounted items. after that only
+changes go to the workers: new discounts, and subscribers or wishlist
+items added or removed while they run. rendered notifications come
+back in chunks of at most chunk_size recipients, so memory stays
+bounded however large a partition is.
+"""
+from concurrent.futures import (FIRST_COMPLETED,
+                                ProcessPoolExecutor,
+                                wait)
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.email import EMail
+from services.observer import (Observer,
+                               compose_discount_body,
+                               compose_discount_greeting,
+                               shard_of)
+from services.products import Products
+from services.subscriber import Subscriber
+
+# state of the partition owned by the current worker process.
+_rows: List[Optional[Tuple[str, str]]] = []
+_index: Dict[str, List[int]] = {}
+_product_ids: Dict[str, int] = {}
+_new_discounted: Dict[int, set] = {}
+_recipients: Optional[Iterator[Tuple[str, Tuple[str, str]]]] = None
+
+
+def _load_partition(rows: List[Tuple[str, str, Tuple[int, ...]]],
+                    product_names: Dict[int, str]) -> None:
+    """
+    worker initializer, keeps the shipped partition in module globals.
+
+    Parameters
+    ----------
+    rows: List[Tuple[str, str, Tuple[int, ...]]]:
+        (name, email, wishlist product ids) of every subscriber.
+    product_names: Dict[int, str]:
+        names of the products found in the wishlists.
+    """
+    global _rows, _index, _product_ids, _new_discounted, _recipients
+    _rows = []
+    _product_ids = {}
+    _index = {}
+    _new_discounted = {}
+    _recipients = None
+    _add_rows(rows, product_names)
+
+
+def _add_rows(rows: List[Tuple[str, str, Tuple[int, ...]]],
+              product_names: Dict[int, str]) -> int:
+    """
+    appends subscribers to the partition, returns the row of the first.
+
+    Parameters
+    ----------
+    rows: List[Tuple[str, str, Tuple[int, ...]]]:
+        (name, email, wishlist product ids) of every subscriber.
+    product_names: Dict[int, str]:
+        names of the products found in the wishlists.
+    """
+    first = len(_rows)
+    for product_id, name in product_names.items():
+        _product_ids[name] = product_id
+    for row, (name, email, wishlist) in enumerate(rows, first):
+        _rows.append((name, email))
+        for product_id in wishlist:
+            _index.setdefault(product_names[product_id], []).append(row)
+    return first
+
+
+def _remove_row(row: int, products: Tuple[str, ...]) -> None:
+    """
+    retires a subscriber's row, its newly discounted items are dropped.
+
+    Parameters
+    ----------
+    row: int:
+        row of the subscriber.
+    products: Tuple[str, ...]:
+        products in the subscriber's wishlist.
+    """
+    for product in products:
+        _index_row(row, 0, product, False)
+    _rows[row] = None
+    _new_discounted.pop(row, None)
+
+
+def _index_row(row: int, product_id: int, product: str,
+               wished: bool) -> None:
+    """
+    adds a product to, or removes it from, a row's wishlist.
+
+    Parameters
+    ----------
+    row: int:
+        row of the subscriber.
+    product_id: int:
+        id of the product.
+    product: str:
+        name of the product.
+    wished: bool:
+        True if the product was added, False if it was removed.
+    """
+    rows = _index.get(product)
+    if wished:
+        _product_ids[product] = product_id
+        if rows is None:
+            rows = _index[product] = []
+        if row not in rows:
+            rows.append(row)
+    elif rows is not None and row in rows:
+        rows.remove(row)
+        if not rows:
+            del _index[product]
+
+
+def _match_partition(new_discounts: List[str]) -> int:
+    """
+    adds newly discounted items to the wishlists of the partition,
+    returns the number of subscribers affected.
+
+    Parameters
+    ----------
+    new_discounts: List[str]:
+        newly discounted products.
+    """
+    affected = set()
+    for item in new_discounts:
+        for row in _index.get(item, ()):
+            _new_discounted.setdefault(row, set()).add(_product_ids[item])
+            affected.add(row)
+    return len(affected)
+
+
+def _take_pending() -> Dict[int, set]:
+    """
+    returns and forgets the newly discounted product ids of every row.
+    """
+    global _new_discounted
+    pending, _new_discounted = _new_discounted, {}
+    return pending
+
+
+def _restore_pending(pending: Dict[int, set]) -> None:
+    """
+    adds newly discounted product ids to rows.
+
+    Parameters
+    ----------
+    pending: Dict[int, set]:
+        newly discounted product ids of every row.
+    """
+    for row, items in pending.items():
+        _new_discounted.setdefault(row, set()).update(items)
+
+
+def _iter_recipients() -> Iterator[Tuple[str, Tuple[str, str]]]:
+    """
+    takes the partition's newly discounted items out of the way and
+    yields (body, (email, name)) grouped by body, each body rendered
+    once per distinct set of items.
+    """
+    pending = _take_pending()
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    for row, product_ids in pending.items():
+        groups.setdefault(tuple(sorted(product_ids)), []).append(row)
+    del pending
+    product_names = {product_id: name
+                     for name, product_id in _product_ids.items()}
+    for product_ids, rows in groups.items():
+        body = compose_discount_body([product_names[product_id]
+                                      for product_id in product_ids])
+        for row in rows:
+            if _rows[row] is None:
+                continue
+            name, email = _rows[row]
+            yield body, (email, name)
+
+
+def _compose_chunk(limit: int) -> Tuple[list, bool]:
+    """
+    returns the next (body, [(email, name), ...]) groups of the
+    partition, at most limit recipients in all, and whether more may
+    follow.
+
+    Parameters
+    ----------
+    limit: int:
+        maximum number of recipients returned.
+    """
+    global _recipients
+    if _recipients is None:
+        _recipients = _iter_recipients()
+    groups, count = [], 0
+    for body, recipient in islice(_recipients, limit):
+        if groups and groups[-1][0] is body:
+            groups[-1][1].append(recipient)
+        else:
+            groups.append((body, [recipient]))
+        count += 1
+    if count < limit:
+        _recipients = None
+        return groups, False
+    return groups, True
+
+
+class ProcessPoolDiscountObserver(Observer):
+    """
+    DiscountObserver running each partition in its own worker process.
+
+    subscribers are partitioned when the workers start. subscribers
+    added or removed and wishlist items changed while the workers run
+    are shipped to the worker owning the subscriber right away. newly
+    discounted items are tracked in the workers, not on the subscribers.
+    the observer itself only keeps each partition's subscribers and
+    their rows in the worker, without a product index.
+    """
+    chunk_size = 1000
+
+    def __init__(self, processes: int) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        processes: int:
+            number of worker processes, one per partition.
+        """
+        if processes < 1:
+            raise ValueError('processes has to be at least 1.')
+        # subscriber to its row in the partition's worker, None until
+        # the workers start.
+        self._partitions: List[Dict[Subscriber, Optional[int]]] = [
+            {} for _ in range(processes)]
+        self._executors: Optional[List[ProcessPoolExecutor]] = None
+
+    def start(self) -> None:
+        """
+        starts one worker per partition and ships it its subscribers.
+        """
+        self.close()
+        self._executors = []
+        for partition in self._partitions:
+            rows, product_names = self._rows(partition)
+            for row, subscriber in enumerate(partition):
+                partition[subscriber] = row
+            executor = ProcessPoolExecutor(
+                max_workers=1, initializer=_load_partition,
+                initargs=(rows, product_names))
+            self._executors.append(executor)
+
+    @staticmethod
+    def _rows(subscribers: Iterable[Subscriber]) -> Tuple[
+            List[Tuple[str, str, Tuple[int, ...]]], Dict[int, str]]:
+        """
+        returns the worker rows of subscribers and the names of the
+        products in their wishlists.
+        """
+        rows, product_names = [], {}
+        for subscriber in subscribers:
+            wishlist = subscriber.wishlist_ids
+            rows.append((subscriber.name, subscriber.email, wishlist))
+            for product_id in wishlist:
+                product_names[product_id] = \
+                    Products.get_product_name(product_id)
+        return rows, product_names
+
+    def restart(self) -> None:
+        """
+        re-ships every partition, pending discounted items are carried
+        over to the new workers.
+        """
+        pending = []
+        for partition, executor in zip(self._partitions,
+                                       self._executors or ()):
+            subscribers = {row: subscriber
+                           for subscriber, row in partition.items()}
+            taken = executor.submit(_take_pending).result()
+            pending.append({subscribers[row]: items
+                            for row, items in taken.items()})
+        self.start()
+        for partition, executor, taken in zip(self._partitions,
+                                              self._executors, pending):
+            if taken:
+                executor.submit(_restore_pending, {
+                    partition[subscriber]: items
+                    for subscriber, items in taken.items()}).result()
+
+    def close(self) -> None:
+        """
+        shuts the worker processes down.
+        """
+        for executor in self._executors or ():
+            executor.shutdown()
+        self._executors = None
+
+    def _workers(self) -> List[ProcessPoolExecutor]:
+        """
+        returns the workers, starting them if needed.
+        """
+        if self._executors is None:
+            self.start()
+        return self._executors
+
+    def update(self, new_discounts: List[str]) -> int:
+        """
+        updates state of every worker, returns the number of
+        subscribers affected.
+
+        Parameters
+        ----------
+        new_discounts: List: str:
+            a list strings matching newly discounted items.
+        """
+        futures = [executor.submit(_match_partition, list(new_discounts))
+                   for executor in self._workers()]
+        return sum(future.result() for future in futures)
+
+    def _shard_of(self, subscriber: Subscriber) -> int:
+        """
+        returns the number of the partition owning the given subscriber.
+        """
+        return shard_of(subscriber.email, len(self._partitions))
+
+    def add_subscriber(self, subscriber: Subscriber) -> None:
+        """
+        adds a subscriber to its partition, and to the partition's
+        worker if the workers are running. a subscriber already added
+        is left as is.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            DiscountSubscriber to be added to the observer.
+        """
+        shard = self._shard_of(subscriber)
+        partition = self._partitions[shard]
+        if subscriber in partition:
+            return
+        row = None
+        if self._executors is not None:
+            rows, product_names = self._rows([subscriber])
+            row = self._executors[shard].submit(
+                _add_rows, rows, product_names).result()
+        partition[subscriber] = row
+        subscriber.attach_observer(self)
+
+    def remove_subscriber(self, subscriber: Subscriber) -> None:
+        """
+        removes a subscriber from its partition, and from the
+        partition's worker if the workers are running, with its pending
+        discounted items. raises ValueError if it was not added.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            DiscountSubscriber to be removed from the observer.
+        """
+        shard = self._shard_of(subscriber)
+        try:
+            row = self._partitions[shard].pop(subscriber)
+        except KeyError:
+            raise ValueError(f'{subscriber!r} was not added') from None
+        subscriber.detach_observer(self)
+        if self._executors is not None and row is not None:
+            self._executors[shard].submit(
+                _remove_row, row, subscriber.wishlist).result()
+
+    def index_wishlist_item(self, subscriber: Subscriber,
+                            product_id: int) -> None:
+        """
+        ships a product added to a subscriber's wishlist to the worker
+        owning the subscriber, if the workers are running.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber who added the product to their wishlist.
+        product_id: int:
+            id of the product added to the wishlist.
+        """
+        self._ship_wishlist_item(subscriber, product_id, True)
+
+    def unindex_wishlist_item(self, subscriber: Subscriber,
+                              product_id: int) -> None:
+        """
+        ships a product removed from a subscriber's wishlist to the
+        worker owning the subscriber, if the workers are running.
+
+        Parameters
+        ----------
+        subscriber: Subscriber:
+            subscriber who removed the product from their wishlist.
+        product_id: int:
+            id of the product removed from the wishlist.
+        """
+        self._ship_wishlist_item(subscriber, product_id, False)
+
+    def _ship_wishlist_item(self, subscriber: Subscriber, product_id: int,
+                            wished: bool) -> None:
+        """
+        updates the subscriber's row in its worker, if it has one.
+        """
+        shard = self._shard_of(subscriber)
+        row = self._partitions[shard].get(subscriber)
+        if self._executors is None or row is None:
+            return
+        self._executors[shard].submit(
+            _index_row, row, product_id,
+            Products.get_product_name(product_id), wished).result()
+
+    def get_subscribers(self) -> List[Subscriber]:
+        """
+        returns the subscribers of every partition.
+        """
+        return [subscriber for partition in self._partitions
+                for subscriber in partition]
+
+    def iter_notification_groups(self) -> Iterator[
+            Tuple[str, List[Tuple[str, str]]]]:
+        """
+        yields (body, [(recipient email, recipient name), ...]) groups
+        rendered by the workers, chunk_size recipients per worker round
+        trip. a worker renders its next chunk while the previous one is
+        consumed, so at most two chunks per worker are held at once.
+        """
+        pending = {executor.submit(_compose_chunk, self.chunk_size):
+                   executor for executor in self._workers()}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                executor = pending.pop(future)
+                groups, more = future.result()
+                if more:
+                    pending[executor.submit(_compose_chunk,
+                                            self.chunk_size)] = executor
+                yield from groups
+
+    def iter_messages(self) -> Iterator[Tuple[str, str]]:
+        """
+        yields (email, message) pairs composed by the workers.
+        """
+        for body, recipients in self.iter_notification_groups():
+            for email, name in recipients:
+                yield email, compose_discount_greeting(name) + body
+
+    def notify_subscriber(self) -> None:
+        """
+        notifies the subscribers of every partition, of the new events.
+        """
+        EMail.send_groups(self.iter_notification_groups(),
+                          compose_discount_greeting,
+                          batch_size=self.chunk_size)
@@ -1,79 +1,546 @@
 """
 emulates data from database, only to example's demonstration.
 """
-from typing import List
+from abc import ABCMeta
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from services.registry import hybridmethod
+from services.store import CatalogueStore
+
+
+class DiscountListener(metaclass=ABCMeta):
+    """
+    Interface for receivers of discount start and expiry events.
+    """
+    def discount_started(self, products: List[str]) -> None:
+        """
+        called with products that became discounted, no-op by default.
+
+        Parameters
+        ----------
+        products: List[str]:
+            products that were not discounted before.
+        """
+
+    def discount_ended(self, products: List[str]) -> None:
+        """
+        called with products that are no longer discounted,
+        no-op by default.
+
+        Parameters
+        ----------
+        products: List[str]:
+            products that are neither new nor old discounts anymore.
+        """
 
 
 class Products:
     """
     stand-in for data retrieved from database.
+
+    the catalogue is indexed both ways, product name to numeric id and
+    id to name, so validating a product is a hash lookup. discount state
+    is kept as insertion-ordered sets of product ids.
+
+    every product that starts being discounted as a new discount is
+    also appended to a change log, the number of discounts ever logged
+    is the discount version publishers use to pick up only what changed
+    since their last notification. each publisher is a reader of the
+    log with a version of its own (add_reader, mark_consumed): log
+    entries every reader has consumed are dropped and their products
+    promoted to old discounts, so the log only holds what some reader
+    has yet to see and every reader sees every entry.
+
+    the class itself is the default, process-wide discount state. each
+    instance owns separate discount state over the same catalogue.
+
+    the catalogue and discount state can be saved to a memory-mapped
+    store (see services.store) and opened again without re-populating.
+
+    DiscountListeners are told when products start being discounted and
+    when their discount ends (expire_discounts, or removal from both new
+    and old discounts).
     """
     _products = ['ps1', 'ps2', 'ps3', 'ps4', 'ps5']
-    _old_discounts = []
-    _new_discounts = []
+    _product_ids = dict(zip(_products, range(len(_products))))
+    _old_discounts: Dict[int, None] = {}
+    _new_discounts: Dict[int, None] = {}
+    _discount_log = []
+    _log_start = 0
+    _readers: WeakKeyDictionary = WeakKeyDictionary()
+    _lock = RLock()
+    _store: Optional[CatalogueStore] = None
+    _listeners: Dict[DiscountListener, None] = {}
+
+    def __init__(self) -> None:
+        self._old_discounts = {}
+        self._new_discounts = {}
+        self._discount_log = []
+        self._log_start = 0
+        self._readers = WeakKeyDictionary()
+        self._lock = RLock()
+        self._listeners = {}
 
     @classmethod
+    def load_products(cls, products: Iterable[str]) -> int:
+        """
+        adds products to the catalogue in one pass, products already in
+        the catalogue are skipped. returns the number of products added.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            names of the products.
+        """
+        if cls._store is not None:
+            raise TypeError('catalogue is opened read-only from '
+                            f'{cls._store.path}')
+        added = 0
+        for product in products:
+            if product not in cls._product_ids:
+                cls._product_ids[product] = len(cls._products)
+                cls._products.append(product)
+                added += 1
+        return added
+
+    @classmethod
+    def open_store(cls, path: str) -> None:
+        """
+        replaces the catalogue and the class' discount state with the
+        ones saved in a store. the catalogue is read straight from the
+        memory-mapped file and becomes read-only, stored new discounts
+        are announced again on the next incremental notification.
+
+        Parameters
+        ----------
+        path: str:
+            path of a store written by save_store.
+        """
+        store = CatalogueStore(path)
+        cls.close_store()
+        cls._store = store
+        cls._products = store.names
+        cls._product_ids = store.ids
+        with cls._lock:
+            cls._new_discounts = dict.fromkeys(store.new_discounts())
+            cls._old_discounts = dict.fromkeys(store.old_discounts())
+            cls._log_start += len(cls._discount_log)
+            cls._discount_log = [store.names[product_id]
+                                 for product_id in cls._new_discounts]
+
+    @classmethod
+    def close_store(cls) -> None:
+        """
+        copies the catalogue back into memory and unmaps the store.
+        """
+        if cls._store is None:
+            return
+        cls._products = list(cls._products)
+        cls._product_ids = dict(zip(cls._products,
+                                    range(len(cls._products))))
+        cls._store.close()
+        cls._store = None
+
+    @hybridmethod
+    def save_store(cls, path: str) -> None:
+        """
+        saves the catalogue and this discount state to a store,
+        atomically replacing an existing file.
+
+        Parameters
+        ----------
+        path: str:
+            path of the store file.
+        """
+        with cls._lock:
+            CatalogueStore.write(path, cls._products,
+                                 list(cls._new_discounts),
+                                 list(cls._old_discounts))
+
+    @classmethod
+    def _product_id(cls, product: str) -> int:
+        """
+        returns the id of a product. raises Value error
+        if no such product is found.
+
+        Parameters
+        ----------
+        product: str:
+            name of the product.
+        """
+        product_id = cls._product_ids.get(product)
+        if product_id is None:
+            raise ValueError(f'No product named {product}')
+        return product_id
+
+    @hybridmethod
     def add_old_discount(cls, product: str) -> None:
         """
-        adds a product to list of old discounts. raises Value error
+        adds a product to old discounts. raises Value error
         if no such product is found.
 
         Parameters
         ----------
         product:
-            product to be added to old discounts list.
+            product to be added to old discounts.
         """
-        if product in cls._products:
-            cls._old_discounts.append(product)
-        else:
-            raise ValueError(f'No product named {product}')
+        cls.add_old_discounts([product])
 
-    @classmethod
+    @hybridmethod
+    def add_old_discounts(cls, products: Iterable[str]) -> None:
+        """
+        adds products to old discounts in one pass. raises Value error,
+        before adding anything, if a product is not found.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            products to be added to old discounts.
+        """
+        product_ids = [cls._product_id(product) for product in products]
+        with cls._lock:
+            started = cls._not_discounted(product_ids)
+            cls._old_discounts.update(dict.fromkeys(product_ids))
+        cls._emit_started(started)
+
+    @hybridmethod
     def remove_old_discount(cls, product: str) -> None:
         """
-        removes a product from list of old discounts. raises Value error
-        if no such product is found.
+        removes a product from old discounts. raises Value error
+        if no such product is found or it isn't an old discount.
 
         Parameters
         ----------
         product:
-            product to be removed from old discounts list.
+            product to be removed from old discounts.
         """
-        if product in cls._products:
-            cls._old_discounts.remove(product)
-        else:
-            raise ValueError(f'No product named {product}')
+        product_id = cls._product_id(product)
+        with cls._lock:
+            try:
+                del cls._old_discounts[product_id]
+            except KeyError:
+                raise ValueError(f'{product} is not an old discount') \
+                    from None
+            ended = product_id not in cls._new_discounts
+        if ended:
+            cls._emit_ended([product_id])
 
-    @classmethod
+    @hybridmethod
     def add_new_discount(cls, product: str) -> None:
         """
-        adds a product to list of new discounts. raises Value error
+        adds a product to new discounts. raises Value error
         if no such product is found.
 
         Parameters
         ----------
         product:
-            product to be added to new discounts list.
+            product to be added to new discounts.
         """
-        if product in cls._products:
-            cls._new_discounts.append(product)
-        else:
-            raise ValueError(f'No product named {product}')
+        cls.add_new_discounts([product])
 
-    @classmethod
+    @hybridmethod
+    def add_new_discounts(cls, products: Iterable[str]) -> None:
+        """
+        adds products to new discounts in one pass. raises Value error,
+        before adding anything, if a product is not found.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            products to be added to new discounts.
+        """
+        products = list(products)
+        product_ids = [cls._product_id(product) for product in products]
+        with cls._lock:
+            started = cls._not_discounted(product_ids)
+            cls._new_discounts.update(dict.fromkeys(product_ids))
+            cls._discount_log.extend(cls._products[product_id]
+                                     for product_id in started)
+        cls._emit_started(started)
+
+    @hybridmethod
+    def load_discount_file(cls, path: str) -> int:
+        """
+        adds the products listed in a file, one per line, to new
+        discounts. blank lines are skipped. returns the number of
+        products read.
+
+        Parameters
+        ----------
+        path: str:
+            path of the discount file.
+        """
+        with open(path, encoding='utf-8') as file:
+            products = [line.strip() for line in file if line.strip()]
+        cls.add_new_discounts(products)
+        return len(products)
+
+    @hybridmethod
     def remove_new_discount(cls, product: str) -> None:
         """
-        removes a product from list of new discounts. raises Value error
-        if no such product is found.
+        removes a product from new discounts. raises Value error
+        if no such product is found or it isn't a new discount.
 
         Parameters
         ----------
         product:
-            product to be removed from old discounts list.
+            product to be removed from new discounts.
+        """
+        product_id = cls._product_id(product)
+        with cls._lock:
+            try:
+                del cls._new_discounts[product_id]
+            except KeyError:
+                raise ValueError(f'{product} is not a new discount') \
+                    from None
+            ended = product_id not in cls._old_discounts
+        if ended:
+            cls._emit_ended([product_id])
+
+    @hybridmethod
+    def expire_discount(cls, product: str) -> bool:
+        """
+        ends a product's discount, new or old, returns False if it
+        was not discounted. raises Value error if no such product
+        is found.
+
+        Parameters
+        ----------
+        product: str:
+            product whose discount ends.
+        """
+        return cls.expire_discounts([product]) == 1
+
+    @hybridmethod
+    def expire_discounts(cls, products: Iterable[str]) -> int:
+        """
+        ends the discounts of products in one pass, returns the number
+        that were discounted. raises Value error, before expiring
+        anything, if a product is not found.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            products whose discounts end.
+        """
+        product_ids = [cls._product_id(product) for product in products]
+        ended = []
+        with cls._lock:
+            for product_id in dict.fromkeys(product_ids):
+                in_new = cls._new_discounts.pop(product_id, 0) is None
+                in_old = cls._old_discounts.pop(product_id, 0) is None
+                if in_new or in_old:
+                    ended.append(product_id)
+        cls._emit_ended(ended)
+        return len(ended)
+
+    @hybridmethod
+    def add_discount_listener(cls, listener: DiscountListener) -> None:
+        """
+        tells listener about discount starts and expiries from now on.
+
+        Parameters
+        ----------
+        listener: DiscountListener:
+            listener to be added.
+        """
+        cls._listeners[listener] = None
+
+    @hybridmethod
+    def remove_discount_listener(cls, listener: DiscountListener) -> None:
+        """
+        stops telling listener about discount events. raises Value error
+        if it was not added.
+
+        Parameters
+        ----------
+        listener: DiscountListener:
+            listener to be removed.
+        """
+        try:
+            del cls._listeners[listener]
+        except KeyError:
+            raise ValueError('listener was not added') from None
+
+    @hybridmethod
+    def _not_discounted(cls, product_ids: List[int]) -> List[int]:
+        """
+        returns the ids, once each, that are neither new nor old
+        discounts. called with the lock held.
+        """
+        return [product_id for product_id in dict.fromkeys(product_ids)
+                if product_id not in cls._new_discounts
+                and product_id not in cls._old_discounts]
+
+    @hybridmethod
+    def _emit_started(cls, product_ids: List[int]) -> None:
+        """
+        tells every listener that products started being discounted.
+        """
+        if product_ids and cls._listeners:
+            products = [cls.get_product_name(product_id)
+                        for product_id in product_ids]
+            for listener in list(cls._listeners):
+                listener.discount_started(products)
+
+    @hybridmethod
+    def _emit_ended(cls, product_ids: List[int]) -> None:
+        """
+        tells every listener that products are no longer discounted.
+        """
+        if product_ids and cls._listeners:
+            products = [cls.get_product_name(product_id)
+                        for product_id in product_ids]
+            for listener in list(cls._listeners):
+                listener.discount_ended(products)
+
+    @hybridmethod
+    def is_new_discount(cls, product: str) -> bool:
+        """
+        returns True if product is a new discount.
+
+        Parameters
+        ----------
+        product: str:
+            product to look up.
+        """
+        return cls._product_ids.get(product) in cls._new_discounts
+
+    @hybridmethod
+    def is_old_discount(cls, product: str) -> bool:
+        """
+        returns True if product is an old discount.
+
+        Parameters
+        ----------
+        product: str:
+            product to look up.
+        """
+        return cls._product_ids.get(product) in cls._old_discounts
+
+    @hybridmethod
+    def get_version(cls) -> int:
+        """
+        returns the current discount version, the number of
+        new discounts recorded so far.
+        """
+        with cls._lock:
+            return cls._log_start + len(cls._discount_log)
+
+    @hybridmethod
+    def get_new_discounts_since(cls,
+                                version: int) -> Tuple[List[str], int]:
+        """
+        returns the products that started being discounted after the
+        given version, along with the current version. entries dropped
+        from the log were consumed by every reader and promoted to old
+        discounts, a version before the start of the log gets the whole
+        log.
+
+        Parameters
+        ----------
+        version: int:
+            version returned by a previous call or by get_version.
         """
-        if product in cls._products:
-            cls._new_discounts.remove(product)
-        raise ValueError(f'No product named {product}')
+        with cls._lock:
+            start = max(version - cls._log_start, 0)
+            return (cls._discount_log[start:],
+                    cls._log_start + len(cls._discount_log))
+
+    @hybridmethod
+    def add_reader(cls, reader: Any) -> int:
+        """
+        registers a reader of the log, which holds back every entry
+        from the current start of the log until it marks them consumed.
+        returns the version the reader has consumed, the start of the
+        log for a new reader. readers are held by weak reference, one
+        that is collected stops holding the log back.
+
+        Parameters
+        ----------
+        reader: Any:
+            publisher reading the log.
+        """
+        with cls._lock:
+            return cls._readers.setdefault(reader, cls._log_start)
+
+    @hybridmethod
+    def remove_reader(cls, reader: Any) -> None:
+        """
+        stops holding the log back for reader, a reader that was not
+        added is ignored.
+
+        Parameters
+        ----------
+        reader: Any:
+            publisher reading the log.
+        """
+        with cls._lock:
+            cls._readers.pop(reader, None)
+            cls._drop_consumed()
+
+    @hybridmethod
+    def mark_consumed(cls, reader: Any, version: int) -> None:
+        """
+        records that reader has seen the log up to version, adding it
+        if needed, and drops the entries every reader has seen.
+
+        Parameters
+        ----------
+        reader: Any:
+            publisher reading the log.
+        version: int:
+            version returned by get_new_discounts_since.
+        """
+        with cls._lock:
+            cls._readers[reader] = version
+            cls._drop_consumed()
+
+    @hybridmethod
+    def _drop_consumed(cls) -> None:
+        """
+        drops the log entries every reader has seen and promotes their
+        products that are still new discounts to old discounts. without
+        readers the log is kept for the first one. called with the lock
+        held.
+        """
+        if not cls._readers:
+            return
+        consumed = min(cls._readers.values()) - cls._log_start
+        if consumed <= 0:
+            return
+        for product in cls._discount_log[:consumed]:
+            product_id = cls._product_ids[product]
+            if cls._new_discounts.pop(product_id, 0) is None:
+                cls._old_discounts[product_id] = None
+        del cls._discount_log[:consumed]
+        cls._log_start += consumed
+
+    @hybridmethod
+    def get_log_size(cls) -> int:
+        """
+        returns the number of discounts kept in the log.
+        """
+        return len(cls._discount_log)
+
+    @hybridmethod
+    def promote_new_discounts(cls, products: List[str]) -> None:
+        """
+        moves announced products from new discounts to old discounts
+        in one step, so readers never see a product in both or neither.
+
+        Parameters
+        ----------
+        products: List[str]:
+            products that were announced to observers.
+        """
+        product_ids = [cls._product_id(product) for product in products]
+        with cls._lock:
+            for product_id in product_ids:
+                cls._new_discounts.pop(product_id, None)
+                cls._old_discounts[product_id] = None
 
     @classmethod
     def get_products(cls) -> List[str]:
@@ -83,15 +550,42 @@ class Products:
         return cls._products
 
     @classmethod
-    def get_new_discounts(cls) -> List[str]:
+    def get_product_id(cls, product: str) -> Optional[int]:
         """
-        returns private attribute, new discounts list.
+        returns the interned integer id of a product,
+        or None if no such product is found.
+
+        Parameters
+        ----------
+        product: str:
+            name of the product.
         """
-        return cls._new_discounts
+        return cls._product_ids.get(product)
 
     @classmethod
+    def get_product_name(cls, product_id: int) -> str:
+        """
+        returns the name of the product with the given interned id.
+
+        Parameters
+        ----------
+        product_id: int:
+            id previously returned by get_product_id.
+        """
+        return cls._products[product_id]
+
+    @hybridmethod
+    def get_new_discounts(cls) -> List[str]:
+        """
+        returns new discounts, in the order they were added.
+        """
+        return [cls._products[product_id]
+                for product_id in cls._new_discounts]
+
+    @hybridmethod
     def get_old_discounts(cls) -> List[str]:
         """
-        returns private attribute, old discounts list.
+        returns old discounts, in the order they were added.
         """
-        return cls._old_discounts
+        return [cls._products[product_id]
+                for product_id in cls._old_discounts]
@@ -2,10 +2,15 @@
 inform observers of events inside the server applications.
 """
 
+import asyncio
 from abc import (ABCMeta,
                  abstractmethod)
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+from services.bus import Event, EventBus, Subscription
 from services.products import Products
 from services.observer import Observer
+from services.registry import WeakRegistry, hybridmethod
 
 
 class Publisher(metaclass=ABCMeta):
@@ -13,7 +18,7 @@ class Publisher(metaclass=ABCMeta):
     Interface for Publisher class.
     """
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def add_observer(cls, observer: Observer) -> None:
         """
@@ -27,7 +32,7 @@ class Publisher(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def remove_observer(cls, observer: Observer) -> None:
         """
@@ -41,7 +46,7 @@ class Publisher(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    @classmethod
+    @hybridmethod
     @abstractmethod
     def notify_observer(cls) -> None:
         """
@@ -54,25 +59,50 @@ class Publisher(metaclass=ABCMeta):
 class DiscountPublisher(Publisher):
     """
     concrete implementation of Publisher interface, monitoring discounts.
+
+    the class is the default publisher watching the default Products,
+    instances own their observer list and may watch separate Products
+    instances. observers are held by weak reference, an observer nobody
+    else refers to is dropped.
+
+    while it has observers a publisher is a reader of its Products'
+    discount log, with a version of its own, so several publishers on
+    the same Products each announce every new discount.
     """
-    _observer_list = []
+    _observer_list = WeakRegistry()
+    _last_version = 0
+    _products = Products
+
+    def __init__(self, products: Products = Products) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        products: Products:
+            discount state to watch, the Products class or an instance.
+        """
+        self._observer_list = WeakRegistry()
+        self._last_version = 0
+        self._products = products
 
-    @classmethod
+    @hybridmethod
     def add_observer(cls, observer: Observer) -> None:
         """
-        adds an Observer to the _observer_list.
+        adds an Observer to the _observer_list, once.
 
         Parameters
         ----------
         observer: Observer:
             Observer to be added to the _observer_list.
         """
-        cls._observer_list.append(observer)
+        cls._observer_list.add(observer)
+        cls._follow_products()
 
-    @classmethod
+    @hybridmethod
     def remove_observer(cls, observer: Observer) -> None:
         """
         removes an Observer from the _observer_list.
+        raises ValueError if it is not in the list.
 
         Parameters
         ----------
@@ -80,27 +110,327 @@ class DiscountPublisher(Publisher):
             Observer to be removed from the _observer_list.
         """
         cls._observer_list.remove(observer)
+        cls._follow_products()
 
-    @classmethod
-    def notify_observer(cls):
+    @hybridmethod
+    def add_many(cls, observers: Iterable[Observer]) -> int:
+        """
+        adds Observers to the _observer_list, returns the number that
+        were not in it yet.
+
+        Parameters
+        ----------
+        observers: Iterable[Observer]:
+            Observers to be added to the _observer_list.
+        """
+        added = cls._observer_list.add_many(observers)
+        cls._follow_products()
+        return added
+
+    @hybridmethod
+    def remove_many(cls, observers: Iterable[Observer]) -> int:
+        """
+        removes Observers from the _observer_list, returns the number
+        that were in it. observers not in the list are skipped.
+
+        Parameters
+        ----------
+        observers: Iterable[Observer]:
+            Observers to be removed from the _observer_list.
+        """
+        removed = cls._observer_list.discard_many(observers)
+        cls._follow_products()
+        return removed
+
+    @hybridmethod
+    def _follow_products(cls) -> None:
+        """
+        registers the publisher as a reader of its Products' discount
+        log while it has observers, and unregisters it otherwise.
+        """
+        if cls._observer_list:
+            cls._last_version = cls._products.add_reader(cls)
+        else:
+            cls._products.remove_reader(cls)
+
+    @hybridmethod
+    def notify_observer(cls, incremental: bool = True) -> None:
         """
         notifies the Observers in the list, of the new events.
+
+        Parameters
+        ----------
+        incremental: bool:
+            if True only discounts recorded since this publisher's last
+            notification are sent, they are promoted to old discounts
+            once every publisher reading the same Products sent them.
+            if False every new discount that is not an old discount is
+            sent again.
         """
-        new_discounts = [item for item in Products.get_new_discounts()
-                         if item not in Products.get_old_discounts()]
+        new_discounts, version = cls._collect_new_discounts(incremental)
         for observer in cls._observer_list:
             observer.update(new_discounts)
+        if incremental:
+            cls._mark_consumed(version)
+
+    @hybridmethod
+    def _collect_new_discounts(cls,
+                               incremental: bool) -> Tuple[List[str], int]:
+        """
+        returns the discounts to announce and the discount version
+        they were read at.
+
+        Parameters
+        ----------
+        incremental: bool:
+            whether to only return discounts recorded since the
+            last notification.
+        """
+        products = cls._products
+        if not incremental:
+            return [item for item in products.get_new_discounts()
+                    if not products.is_old_discount(item)], cls._last_version
+        changed, version = products.get_new_discounts_since(
+            cls._last_version)
+        # only discounts that ended since they were logged are skipped,
+        # other readers may already have promoted the rest to old.
+        new_discounts = list(dict.fromkeys(
+            item for item in changed
+            if products.is_new_discount(item)
+            or products.is_old_discount(item)))
+        return new_discounts, version
+
+    @hybridmethod
+    def _mark_consumed(cls, version: int) -> None:
+        """
+        remembers the version announced discounts were read at, the
+        Products promotes them once every reader has consumed them.
+
+        Parameters
+        ----------
+        version: int:
+            discount version returned by _collect_new_discounts.
+        """
+        cls._last_version = version
+        cls._products.mark_consumed(cls, version)
 
 
-class ArticlePublisher(Publisher):
+class AsyncPublisher(Publisher):
+    """
+    Interface for Publisher classes running on an asyncio event loop.
+    """
+    @hybridmethod
+    @abstractmethod
+    async def notify_observer(cls) -> None:
+        """
+        notifies the Observer of the new events.
+        raises NotImplementedError if not overwritten.
+        """
+        raise NotImplementedError
+
+
+class AsyncDiscountPublisher(AsyncPublisher, DiscountPublisher):
+    """
+    asyncio variant of DiscountPublisher, notifies AsyncObservers
+    concurrently. observers whose update is not a coroutine function
+    are rejected when they are added.
+    """
+    _observer_list = WeakRegistry()
+    _last_version = 0
+
+    @staticmethod
+    def _check_observer(observer: Observer) -> None:
+        """
+        raises TypeError if observer cannot be awaited on update.
+        """
+        if not asyncio.iscoroutinefunction(observer.update):
+            raise TypeError(f'{observer!r} is not an AsyncObserver, its '
+                            'update has to be a coroutine function')
+
+    @hybridmethod
+    def add_observer(cls, observer: Observer) -> None:
+        """
+        adds an AsyncObserver to the _observer_list, once.
+        raises TypeError if it is not an AsyncObserver.
+
+        Parameters
+        ----------
+        observer: Observer:
+            AsyncObserver to be added to the _observer_list.
+        """
+        cls._check_observer(observer)
+        cls._observer_list.add(observer)
+        cls._follow_products()
+
+    @hybridmethod
+    def add_many(cls, observers: Iterable[Observer]) -> int:
+        """
+        adds AsyncObservers to the _observer_list, returns the number
+        that were not in it yet. raises TypeError, before adding
+        anything, if one is not an AsyncObserver.
+
+        Parameters
+        ----------
+        observers: Iterable[Observer]:
+            AsyncObservers to be added to the _observer_list.
+        """
+        observers = list(observers)
+        for observer in observers:
+            cls._check_observer(observer)
+        added = cls._observer_list.add_many(observers)
+        cls._follow_products()
+        return added
+
+    @hybridmethod
+    async def notify_observer(cls, incremental: bool = True) -> None:
+        """
+        notifies the Observers in the list, of the new events.
+
+        Parameters
+        ----------
+        incremental: bool:
+            if True only discounts recorded since this publisher's last
+            notification are sent, they are promoted to old discounts
+            once every publisher reading the same Products sent them.
+            if False every new discount that is not an old discount is
+            sent again.
+        """
+        new_discounts, version = cls._collect_new_discounts(incremental)
+        await asyncio.gather(*(observer.update(new_discounts)
+                               for observer in cls._observer_list))
+        if incremental:
+            cls._mark_consumed(version)
+
+
+class ChannelPublisher(Publisher):
+    """
+    Publisher of a channel on the EventBus.
+
+    events are queued by publish and dispatched by notify_observer to
+    the observers whose filters match them. observers are subscribed to
+    the channel's topic with their own filters, see ChannelObserver.
+    subclasses set topic and their own _events and _subscriptions.
+    """
+    topic = ''
+    _bus = EventBus
+    _events: List[Event] = []
+    _subscriptions: Dict[Observer, Subscription] = {}
+
+    def __init__(self, bus: EventBus = EventBus) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        bus: EventBus:
+            bus the events are dispatched on, the EventBus class
+            or an instance.
+        """
+        self._bus = bus
+        self._events = []
+        self._subscriptions = {}
+
+    @hybridmethod
+    def add_observer(cls, observer: Observer) -> None:
+        """
+        subscribes an Observer to the channel with the observer's filters.
+
+        Parameters
+        ----------
+        observer: Observer:
+            ChannelObserver to be added.
+        """
+        if observer in cls._subscriptions:
+            return
+        cls._subscriptions[observer] = cls._bus.subscribe(
+            observer, cls.topic, **observer.get_filters())
+
+    @hybridmethod
+    def remove_observer(cls, observer: Observer) -> None:
+        """
+        unsubscribes an Observer from the channel.
+        raises ValueError if it was not added.
+
+        Parameters
+        ----------
+        observer: Observer:
+            ChannelObserver to be removed.
+        """
+        try:
+            subscription = cls._subscriptions.pop(observer)
+        except KeyError:
+            raise ValueError('observer was not added') from None
+        cls._bus.unsubscribe(subscription)
+
+    @hybridmethod
+    def publish(cls, payload: Any = None, **attributes: Hashable) -> None:
+        """
+        queues an event of the channel until the next notify_observer.
+
+        Parameters
+        ----------
+        payload: Any:
+            content of the event.
+        attributes: Hashable:
+            attributes observers filter on.
+        """
+        cls._events.append(Event(cls.topic, attributes, payload))
+
+    @hybridmethod
+    def notify_observer(cls) -> int:
+        """
+        dispatches the queued events to the matching Observers,
+        returns the number of deliveries.
+        """
+        events, cls._events = cls._events, []
+        return cls._bus.dispatch_many(events)
+
+
+class ArticlePublisher(ChannelPublisher):
     """
     concrete implementation of Publisher interface, monitoring articles.
     """
-    NotImplemented
+    topic = 'article'
+    _events: List[Event] = []
+    _subscriptions: Dict[Observer, Subscription] = {}
+
+    @hybridmethod
+    def add_article(cls, title: str, category: str,
+                    author: str = '') -> None:
+        """
+        queues a newly published article.
 
+        Parameters
+        ----------
+        title: str:
+            title of the article.
+        category: str:
+            category observers filter on.
+        author: str:
+            author observers may filter on.
+        """
+        cls.publish(title, category=category, author=author)
 
-class SecurityPublisher(Publisher):
+
+class SecurityPublisher(ChannelPublisher):
     """
     concrete implementation of Publisher interface, monitoring security.
     """
-    NotImplemented
+    topic = 'security'
+    _events: List[Event] = []
+    _subscriptions: Dict[Observer, Subscription] = {}
+
+    @hybridmethod
+    def add_alert(cls, title: str, severity: str, system: str = '') -> None:
+        """
+        queues a new security alert.
+
+        Parameters
+        ----------
+        title: str:
+            description of the alert.
+        severity: str:
+            severity observers filter on, e.g. "low" or "critical".
+        system: str:
+            affected system observers may filter on.
+        """
+        cls.publish(title, severity=severity, system=system)
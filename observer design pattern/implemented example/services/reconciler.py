@@ -0,0 +1,93 @@
+"""
+keeps subscribers' discounted wishlist items in step with discount
+expiries.
+
+DiscountReconciler listens to discount expiry events of Products and,
+for every expired product, only visits the subscribers wishing for it,
+found through each observer's product to subscribers index. expiring a
+product costs O(subscribers who want it) instead of a pass over every
+subscriber.
+"""
+from typing import Iterable, List
+
+from services.observer import DiscountObserver
+from services.products import DiscountListener, Products
+from services.registry import WeakRegistry
+
+
+class DiscountReconciler(DiscountListener):
+    """
+    removes expired discounts from the wishlists of the subscribers of
+    its observers. observers are held by weak reference.
+    """
+    def __init__(self, observers: Iterable[DiscountObserver] = (),
+                 products: Products = Products) -> None:
+        """
+        initialize the instance and start listening to products.
+        Parameters
+        ----------
+        observers: Iterable[DiscountObserver]:
+            observers whose subscribers are kept up to date, the
+            DiscountObserver class or instances.
+        products: Products:
+            discount state to listen to, the Products class or an instance.
+        """
+        self.observers = WeakRegistry(observers)
+        self.products = products
+        self.reconciled = 0
+        products.add_discount_listener(self)
+
+    def add_observer(self, observer: DiscountObserver) -> None:
+        """
+        keeps the subscribers of observer up to date too.
+
+        Parameters
+        ----------
+        observer: DiscountObserver:
+            observer to be added.
+        """
+        self.observers.add(observer)
+
+    def remove_observer(self, observer: DiscountObserver) -> None:
+        """
+        stops keeping the subscribers of observer up to date.
+        raises ValueError if it was not added.
+
+        Parameters
+        ----------
+        observer: DiscountObserver:
+            observer to be removed.
+        """
+        self.observers.remove(observer)
+
+    def discount_ended(self, products: List[str]) -> None:
+        """
+        drops the expired products from the discounted items of every
+        subscriber wishing for them.
+
+        Parameters
+        ----------
+        products: List[str]:
+            products that are no longer discounted.
+        """
+        for product in products:
+            product_id = Products.get_product_id(product)
+            for observer in self.observers:
+                for subscriber in observer.get_wishlist_subscribers(product):
+                    subscriber.drop_discounted(product_id)
+                    self.reconciled += 1
+
+    def reconcile_all(self) -> None:
+        """
+        drops every no longer discounted item from every subscriber,
+        a full pass to recover from changes made while not listening.
+        """
+        for observer in self.observers:
+            for subscriber in observer.get_subscribers():
+                subscriber.clean_up_wishlist(self.products)
+
+    def close(self) -> None:
+        """
+        stops listening to products.
+        """
+        self.products.remove_discount_listener(self)
@@ -0,0 +1,159 @@
+"""
+helpers for classes whose registries can live on the class itself
+or on one of its instances.
+"""
+import weakref
+from functools import update_wrapper
+from types import MethodType
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+class hybridmethod:
+    """
+    method decorator binding to the instance when called on an instance,
+    and to the class when called on the class, like classmethod.
+
+    a class keeps working as a process-wide default registry while each
+    instance can own a registry of its own.
+    """
+    def __init__(self, func: Callable) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        func: Callable:
+            function taking the class or the instance as first argument.
+        """
+        self.__func__ = func
+        self.__isabstractmethod__ = getattr(func, '__isabstractmethod__',
+                                            False)
+        update_wrapper(self, func)
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        """
+        binds the function to instance, or to owner if accessed on the class.
+        """
+        if instance is None:
+            return MethodType(self.__func__, owner)
+        return MethodType(self.__func__, instance)
+
+
+class WeakRegistry:
+    """
+    insertion ordered set of weakly referenced objects.
+
+    adding, removing and membership tests take constant time, adding an
+    object twice keeps one entry, and an object is dropped from the
+    registry as soon as it is garbage collected. unlike weakref.WeakSet
+    entries are iterated in the order they were added. objects have to
+    be hashable and support weak references.
+    """
+    def __init__(self, objects: Iterable[Any] = ()) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        objects: Iterable[Any]:
+            objects to be added.
+        """
+        self._refs = {}
+        registry = weakref.ref(self)
+
+        def _drop(ref: weakref.ref) -> None:
+            # called once an entry's object is collected.
+            self = registry()
+            if self is not None:
+                self._refs.pop(ref, None)
+        self._drop = _drop
+        self.add_many(objects)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __bool__(self) -> bool:
+        return bool(self._refs)
+
+    def __contains__(self, obj: Any) -> bool:
+        try:
+            return weakref.ref(obj) in self._refs
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[Any]:
+        for ref in list(self._refs):
+            obj = ref()
+            if obj is not None:
+                yield obj
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self)!r})'
+
+    def add(self, obj: Any) -> bool:
+        """
+        adds obj, returns False if it was already registered.
+
+        Parameters
+        ----------
+        obj: Any:
+            object to be added.
+        """
+        ref = weakref.ref(obj, self._drop)
+        if ref in self._refs:
+            return False
+        self._refs[ref] = None
+        return True
+
+    def discard(self, obj: Any) -> bool:
+        """
+        removes obj, returns False if it was not registered.
+
+        Parameters
+        ----------
+        obj: Any:
+            object to be removed.
+        """
+        try:
+            ref = weakref.ref(obj)
+        except TypeError:
+            return False
+        return self._refs.pop(ref, False) is None
+
+    def remove(self, obj: Any) -> None:
+        """
+        removes obj, raises ValueError if it was not registered.
+
+        Parameters
+        ----------
+        obj: Any:
+            object to be removed.
+        """
+        if not self.discard(obj):
+            raise ValueError(f'{obj!r} is not registered')
+
+    def add_many(self, objects: Iterable[Any]) -> int:
+        """
+        adds objects, returns the number that were not registered yet.
+
+        Parameters
+        ----------
+        objects: Iterable[Any]:
+            objects to be added.
+        """
+        return sum(map(self.add, objects))
+
+    def discard_many(self, objects: Iterable[Any]) -> int:
+        """
+        removes objects, returns the number that were registered.
+
+        Parameters
+        ----------
+        objects: Iterable[Any]:
+            objects to be removed.
+        """
+        return sum(map(self.discard, objects))
+
+    def clear(self) -> None:
+        """
+        removes every object.
+        """
+        self._refs.clear()
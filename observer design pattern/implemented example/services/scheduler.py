@@ -0,0 +1,349 @@
+"""
+schedules notifications of several channels onto the email layer.
+
+every channel has its own FIFO queue. channels of a higher priority
+always go first, so an urgent security alert never waits behind bulk
+discount mail already queued, channels of the same priority share the
+sender by weight (stride scheduling). a message not sent before its
+deadline is dropped or demoted to another channel, as its channel says.
+"""
+import threading
+import time
+from collections import deque
+from typing import (Callable, Deque, Dict, Iterable, List, NamedTuple,
+                    Optional, Tuple)
+
+from services.email import EMail
+
+# stride of a channel of weight 1, strides are _STRIDE / weight.
+_STRIDE = 1 << 20
+
+
+class Channel:
+    """
+    queue and scheduling settings of one channel.
+    """
+    def __init__(self, name: str, priority: int = 0, weight: int = 1,
+                 deadline: Optional[float] = None,
+                 demote_to: Optional[str] = None,
+                 wait_samples: int = 10000) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        name: str:
+            name of the channel.
+        priority: int:
+            channels with a higher priority are always served first.
+        weight: int:
+            share of the sender among channels of the same priority.
+        deadline: Optional[float]:
+            seconds a message may wait, unlimited if None.
+        demote_to: Optional[str]:
+            channel late messages move to, they are dropped if None.
+        wait_samples: int:
+            number of recent wait times kept for stats.
+        """
+        if weight < 1:
+            raise ValueError('weight has to be at least 1.')
+        self.name = name
+        self.priority = priority
+        self.weight = weight
+        self.deadline = deadline
+        self.demote_to = demote_to
+        self.stride = _STRIDE // weight
+        self.pass_value = 0
+        self.queue: Deque[Tuple[str, str, float, Optional[float]]] = deque()
+        self.waits: Deque[float] = deque(maxlen=wait_samples)
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.demoted = 0
+
+
+class ChannelStats(NamedTuple):
+    """
+    queue depth, counters and wait times of a channel, times in seconds.
+    """
+    depth: int
+    enqueued: int
+    sent: int
+    dropped: int
+    demoted: int
+    wait_p50: float
+    wait_p99: float
+    wait_max: float
+
+
+class NotificationScheduler:
+    """
+    priority and weighted fair queueing of (email, message) notifications
+    between the observers and the email layer.
+
+    messages are queued with submit or submit_many and sent in batches
+    by run, or continuously by a background thread after start.
+    """
+    def __init__(self, send: Optional[Callable[[List[Tuple[str, str]]],
+                                               None]] = None,
+                 batch_size: int = 100,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        initialize the instance.
+        Parameters
+        ----------
+        send: Optional[Callable[[List[Tuple[str, str]]], None]]:
+            sends a batch of (email, message) pairs, EMail.send_many
+            if None.
+        batch_size: int:
+            maximum messages sent at once, bounds how long an urgent
+            message waits for the batch in progress.
+        clock: Callable[[], float]:
+            returns the current time in seconds.
+        """
+        if batch_size < 1:
+            raise ValueError('batch size has to be at least 1.')
+        self.send = send or self._send_email
+        self.batch_size = batch_size
+        self.clock = clock
+        self._channels: Dict[str, Channel] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closing = False
+
+    @staticmethod
+    def _send_email(messages: List[Tuple[str, str]]) -> None:
+        """
+        sends a batch through EMail.
+        """
+        EMail.send_many(messages, batch_size=len(messages))
+
+    def add_channel(self, name: str, priority: int = 0, weight: int = 1,
+                    deadline: Optional[float] = None,
+                    demote_to: Optional[str] = None) -> Channel:
+        """
+        adds a channel or replaces its settings, keeping queued messages.
+        see Channel for the parameters.
+        """
+        with self._condition:
+            channel = Channel(name, priority, weight, deadline, demote_to)
+            previous = self._channels.get(name)
+            if previous is not None:
+                for attribute in ('queue', 'waits', 'pass_value', 'enqueued',
+                                  'sent', 'dropped', 'demoted'):
+                    setattr(channel, attribute,
+                            getattr(previous, attribute))
+            else:
+                channel.pass_value = self._min_pass(priority)
+            self._channels[name] = channel
+            return channel
+
+    def _min_pass(self, priority: int) -> int:
+        """
+        returns the lowest pass value of the busy channels of priority,
+        so a new or idle channel does not make up for lost time.
+        """
+        return min((channel.pass_value
+                    for channel in self._channels.values()
+                    if channel.priority == priority and channel.queue),
+                   default=0)
+
+    def _channel(self, name: str) -> Channel:
+        """
+        returns a channel, raises ValueError if there is none by name.
+        """
+        try:
+            return self._channels[name]
+        except KeyError:
+            raise ValueError(f'no channel named {name}') from None
+
+    def submit(self, channel: str, email: str, message: str,
+               deadline: Optional[float] = None) -> None:
+        """
+        queues a message.
+
+        Parameters
+        ----------
+        channel: str:
+            name of the channel.
+        email: str:
+            email of the recipient.
+        message: str:
+            body of the email.
+        deadline: Optional[float]:
+            seconds the message may wait, the channel's deadline if None.
+        """
+        self.submit_many(channel, [(email, message)], deadline)
+
+    def submit_many(self, channel: str,
+                    messages: Iterable[Tuple[str, str]],
+                    deadline: Optional[float] = None) -> int:
+        """
+        queues messages, returns the number queued.
+
+        Parameters
+        ----------
+        channel: str:
+            name of the channel.
+        messages: Iterable[Tuple[str, str]]:
+            (recipient email, message body) pairs.
+        deadline: Optional[float]:
+            seconds each message may wait, the channel's deadline if None.
+        """
+        target = self._channel(channel)
+        now = self.clock()
+        if deadline is None:
+            deadline = target.deadline
+        due = None if deadline is None else now + deadline
+        queued = [(email, message, now, due) for email, message in messages]
+        with self._condition:
+            if not target.queue:
+                target.pass_value = max(target.pass_value,
+                                        self._min_pass(target.priority))
+            target.queue.extend(queued)
+            target.enqueued += len(queued)
+            self._condition.notify()
+        return len(queued)
+
+    def _next_channel(self) -> Optional[Channel]:
+        """
+        returns the channel to send from next, None if every queue is
+        empty. called with the lock held.
+        """
+        best = None
+        for channel in self._channels.values():
+            if not channel.queue:
+                continue
+            if (best is None or channel.priority > best.priority
+                    or (channel.priority == best.priority
+                        and channel.pass_value < best.pass_value)):
+                best = channel
+        return best
+
+    def _take_batch(self, limit: int) -> List[Tuple[str, str]]:
+        """
+        pops up to limit messages in schedule order, dropping or
+        demoting late ones. called with the lock held.
+        """
+        batch = []
+        now = self.clock()
+        while len(batch) < limit:
+            channel = self._next_channel()
+            if channel is None:
+                break
+            email, message, enqueued, due = channel.queue.popleft()
+            if due is not None and now > due:
+                target = self._channels.get(channel.demote_to)
+                if target is None or target is channel:
+                    channel.dropped += 1
+                else:
+                    channel.demoted += 1
+                    target.enqueued += 1
+                    target_due = (None if target.deadline is None
+                                  else now + target.deadline)
+                    if not target.queue:
+                        target.pass_value = max(
+                            target.pass_value,
+                            self._min_pass(target.priority))
+                    target.queue.append((email, message, enqueued,
+                                         target_due))
+                continue
+            channel.pass_value += channel.stride
+            channel.sent += 1
+            channel.waits.append(now - enqueued)
+            batch.append((email, message))
+        return batch
+
+    def run(self, max_messages: Optional[int] = None) -> int:
+        """
+        sends queued messages in batches until the queues are empty or
+        max_messages were sent, returns the number sent.
+
+        Parameters
+        ----------
+        max_messages: Optional[int]:
+            maximum number of messages to send, unlimited if None.
+        """
+        sent = 0
+        while max_messages is None or sent < max_messages:
+            limit = self.batch_size
+            if max_messages is not None:
+                limit = min(limit, max_messages - sent)
+            with self._condition:
+                batch = self._take_batch(limit)
+            if not batch:
+                return sent
+            self.send(batch)
+            sent += len(batch)
+        return sent
+
+    def start(self) -> None:
+        """
+        starts a background thread sending messages as they are queued.
+        """
+        with self._condition:
+            if self._worker is not None:
+                return
+            self._closing = False
+            self._worker = threading.Thread(target=self._work, daemon=True)
+            self._worker.start()
+
+    def _work(self) -> None:
+        """
+        body of the background thread.
+        """
+        while True:
+            with self._condition:
+                batch = self._take_batch(self.batch_size)
+                while not batch and not self._closing:
+                    self._condition.wait()
+                    batch = self._take_batch(self.batch_size)
+                if not batch:
+                    return
+            self.send(batch)
+
+    def close(self) -> None:
+        """
+        sends what is left in the queues and stops the background thread,
+        on the calling thread if start was never called.
+        """
+        with self._condition:
+            worker, self._worker = self._worker, None
+            self._closing = True
+            self._condition.notify_all()
+        if worker is not None:
+            worker.join()
+        else:
+            self.run()
+
+    def __enter__(self) -> 'NotificationScheduler':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def depth(self) -> Dict[str, int]:
+        """
+        returns the number of queued messages of every channel.
+        """
+        with self._condition:
+            return {name: len(channel.queue)
+                    for name, channel in self._channels.items()}
+
+    def stats(self) -> Dict[str, ChannelStats]:
+        """
+        returns the queue depth, counters and recent wait times of every
+        channel.
+        """
+        with self._condition:
+            channels = [(name, channel, sorted(channel.waits))
+                        for name, channel in self._channels.items()]
+        stats = {}
+        for name, channel, waits in channels:
+            stats[name] = ChannelStats(
+                len(channel.queue), channel.enqueued, channel.sent,
+                channel.dropped, channel.demoted,
+                waits[len(waits) // 2] if waits else 0.0,
+                waits[min(len(waits) * 99 // 100, len(waits) - 1)]
+                if waits else 0.0,
+                waits[-1] if waits else 0.0)
+        return stats
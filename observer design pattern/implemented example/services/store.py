@@ -0,0 +1,222 @@
+"""
+on-disk, memory-mapped catalogue and discount state for Products.
+
+file layout, all integers little-endian:
+
+    header       magic b'PRDS', format version (u32), product count (u64)
+    offsets      count + 1 u64, start of every name in the names blob
+    sorted ids   count u32, product ids ordered by name bytes
+    new bitmap   one bit per product id, set if a new discount
+    old bitmap   one bit per product id, set if an old discount
+    names        utf-8 product names, concatenated
+
+product ids are positions in the offsets table, so id to name is O(1)
+and name to id is a binary search over sorted ids. the file is opened
+read-only with mmap, processes opening the same file share its pages.
+"""
+import mmap
+import os
+import re
+import struct
+from typing import (Iterable, Iterator, List, Mapping,
+                    Optional, Sequence)
+
+_MAGIC = b'PRDS'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sIQ')
+_NON_ZERO = re.compile(b'[^\x00]')
+
+
+def _bitmap(product_ids: Iterable[int], count: int) -> bytearray:
+    """
+    returns a bitmap of count bits with the given product ids set.
+    """
+    bitmap = bytearray((count + 7) // 8)
+    for product_id in product_ids:
+        bitmap[product_id >> 3] |= 1 << (product_id & 7)
+    return bitmap
+
+
+class MappedNames(Sequence):
+    """
+    read-only product names of a store, indexed by product id.
+    """
+    def __init__(self, store: 'CatalogueStore') -> None:
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.count
+
+    def __getitem__(self, product_id):
+        if isinstance(product_id, slice):
+            return [self[index]
+                    for index in range(*product_id.indices(len(self)))]
+        if product_id < 0:
+            product_id += len(self)
+        if not 0 <= product_id < len(self):
+            raise IndexError('product id out of range')
+        return self._store.name_bytes(product_id).decode('utf-8')
+
+
+class MappedNameIndex(Mapping):
+    """
+    read-only product name to product id index of a store.
+    """
+    def __init__(self, store: 'CatalogueStore') -> None:
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.count
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MappedNames(self._store))
+
+    def __getitem__(self, product: str) -> int:
+        if not isinstance(product, str):
+            raise KeyError(product)
+        product_id = self._store.find(product.encode('utf-8'))
+        if product_id is None:
+            raise KeyError(product)
+        return product_id
+
+
+class CatalogueStore:
+    """
+    memory-mapped catalogue file, see the module docstring for its layout.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        opens the store read-only.
+        Parameters
+        ----------
+        path: str:
+            path of a file written by CatalogueStore.write.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        magic, version, self.count = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f'{path} is not a products store')
+        self._view = view = memoryview(self._mmap)
+        start = _HEADER.size
+        end = start + 8 * (self.count + 1)
+        self._offsets = view[start:end].cast('Q')
+        start, end = end, end + 4 * self.count
+        self._sorted_ids = view[start:end].cast('I')
+        bitmap_size = (self.count + 7) // 8
+        self._new_bitmap = view[end:end + bitmap_size]
+        self._old_bitmap = view[end + bitmap_size:end + 2 * bitmap_size]
+        self._names_start = end + 2 * bitmap_size
+        self.names = MappedNames(self)
+        self.ids = MappedNameIndex(self)
+
+    @staticmethod
+    def write(path: str, products: Sequence[str],
+              new_discounts: Iterable[int] = (),
+              old_discounts: Iterable[int] = ()) -> None:
+        """
+        writes a store file, replacing any existing file atomically so
+        processes that have the old file open keep a consistent view.
+
+        Parameters
+        ----------
+        path: str:
+            path of the store file.
+        products: Sequence[str]:
+            product names, a product's id is its position.
+        new_discounts: Iterable[int]:
+            ids of products that are new discounts.
+        old_discounts: Iterable[int]:
+            ids of products that are old discounts.
+        """
+        encoded = [product.encode('utf-8') for product in products]
+        count = len(encoded)
+        offsets = [0] * (count + 1)
+        for product_id, name in enumerate(encoded):
+            offsets[product_id + 1] = offsets[product_id] + len(name)
+        sorted_ids = sorted(range(count), key=encoded.__getitem__)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, count))
+            file.write(struct.pack(f'<{count + 1}Q', *offsets))
+            file.write(struct.pack(f'<{count}I', *sorted_ids))
+            file.write(_bitmap(new_discounts, count))
+            file.write(_bitmap(old_discounts, count))
+            file.write(b''.join(encoded))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    def name_bytes(self, product_id: int) -> bytes:
+        """
+        returns the utf-8 name of a product.
+
+        Parameters
+        ----------
+        product_id: int:
+            id of the product.
+        """
+        start = self._names_start + self._offsets[product_id]
+        end = self._names_start + self._offsets[product_id + 1]
+        return self._mmap[start:end]
+
+    def find(self, name: bytes) -> Optional[int]:
+        """
+        returns the id of the product with the given utf-8 name,
+        or None if there is none.
+
+        Parameters
+        ----------
+        name: bytes:
+            utf-8 name of the product.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            product_id = self._sorted_ids[middle]
+            if self.name_bytes(product_id) < name:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            product_id = self._sorted_ids[low]
+            if self.name_bytes(product_id) == name:
+                return product_id
+        return None
+
+    @staticmethod
+    def _bitmap_ids(bitmap: memoryview) -> List[int]:
+        """
+        returns the ids whose bit is set, skipping empty bytes.
+        """
+        product_ids = []
+        for match in _NON_ZERO.finditer(bitmap):
+            index = match.start()
+            byte = bitmap[index]
+            for bit in range(8):
+                if byte >> bit & 1:
+                    product_ids.append(index * 8 + bit)
+        return product_ids
+
+    def new_discounts(self) -> List[int]:
+        """
+        returns ids of the products stored as new discounts.
+        """
+        return self._bitmap_ids(self._new_bitmap)
+
+    def old_discounts(self) -> List[int]:
+        """
+        returns ids of the products stored as old discounts.
+        """
+        return self._bitmap_ids(self._old_bitmap)
+
+    def close(self) -> None:
+        """
+        unmaps the file.
+        """
+        for view in (self._offsets, self._sorted_ids, self._new_bitmap,
+                     self._old_bitmap, self._view):
+            view.release()
+        self._mmap.close()
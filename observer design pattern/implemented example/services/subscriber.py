@@ -5,7 +5,9 @@ querying the server applications directly.
 
 from abc import (ABCMeta,
                  abstractmethod)
-from typing import List
+from bisect import bisect_left
+from typing import (Any, Iterable, Optional,
+                    Tuple)
 
 from services.products import Products
 
@@ -14,6 +16,7 @@ class Subscriber(metaclass=ABCMeta):
     """
     Interface for Subscriber classes.
     """
+    __slots__ = ()
 
     @property
     @abstractmethod
@@ -34,16 +37,61 @@ class Subscriber(metaclass=ABCMeta):
         raise NotImplementedError
 
 
+def _contains(product_ids: Tuple[int, ...], product_id: int) -> bool:
+    """
+    returns True if product_id is in the sorted product_ids.
+    """
+    index = bisect_left(product_ids, product_id)
+    return index < len(product_ids) and product_ids[index] == product_id
+
+
+def _insert(product_ids: Tuple[int, ...],
+            product_id: int) -> Tuple[int, ...]:
+    """
+    returns the sorted product_ids with product_id added.
+    """
+    index = bisect_left(product_ids, product_id)
+    if index < len(product_ids) and product_ids[index] == product_id:
+        return product_ids
+    return product_ids[:index] + (product_id,) + product_ids[index:]
+
+
+def _delete(product_ids: Tuple[int, ...],
+            product_id: int) -> Tuple[int, ...]:
+    """
+    returns the sorted product_ids without product_id.
+    """
+    index = bisect_left(product_ids, product_id)
+    if index < len(product_ids) and product_ids[index] == product_id:
+        return product_ids[:index] + product_ids[index + 1:]
+    return product_ids
+
+
 class DiscountSubscriber(Subscriber):
     """
     concrete implementation of Subscriber interface, monitoring discounts.
+
+    wishlists are kept as sorted tuples of interned product ids (see
+    Products.get_product_id) and the instance has no __dict__, so
+    millions of subscribers stay cheap to hold in memory. an empty
+    wishlist is the shared empty tuple and costs nothing.
+
+    the wishlist getters return tuples of product names, wishlists are
+    changed through add_to_wishlist, remove_from_wishlist and the
+    wishlist setter.
     """
-    def __init__(self, name: str, email: str, wishlist: List = []) -> None:
+    __slots__ = ('_name', '_email', '_wishlist', '_wishlist_new_discounted',
+                 '_wishlist_all_discounted', '_observers')
+
+    def __init__(self, name: str, email: str,
+                 wishlist: Iterable[str] = ()) -> None:
         self.name = name
         self.email = email
+        self._observers = ()
+        self._wishlist = ()
+        self._wishlist_new_discounted = ()
+        self._wishlist_all_discounted = ()
         self.wishlist = wishlist
-        self.wishlist_new_discounted = []
-        self.wishlist_all_discounted = []
 
     @property
     def name(self) -> str:
@@ -89,6 +137,119 @@ class DiscountSubscriber(Subscriber):
             raise ValueError('email has to be a string.')
         self._email = new_email
 
+    @property
+    def wishlist(self) -> Tuple[str, ...]:
+        """
+        getter for wishlist, product names in catalogue order.
+        """
+        return self._product_names(self._wishlist)
+
+    @wishlist.setter
+    def wishlist(self, products: Iterable[str]) -> None:
+        """
+        replaces the wishlist with the given products.
+        raises value error if a product is not in products.
+
+        Parameters
+        ----------
+        products: Iterable[str]:
+            products the subscriber wishes for.
+        """
+        product_ids = set()
+        for product in products:
+            product_id = Products.get_product_id(product)
+            if product_id is None:
+                raise ValueError(f'No product named {product}')
+            product_ids.add(product_id)
+        for observer in self._observers:
+            for product_id in self._wishlist:
+                observer.unindex_wishlist_item(self, product_id)
+        self._wishlist = tuple(sorted(product_ids))
+        for observer in self._observers:
+            for product_id in self._wishlist:
+                observer.index_wishlist_item(self, product_id)
+
+    @property
+    def wishlist_ids(self) -> Tuple[int, ...]:
+        """
+        getter for wishlist, a sorted tuple of product ids.
+        """
+        return self._wishlist
+
+    @property
+    def wishlist_new_discounted(self) -> Tuple[str, ...]:
+        """
+        getter for newly discounted items in wishlist, in catalogue order.
+        """
+        return self._product_names(self._wishlist_new_discounted)
+
+    def new_discounted_key(self) -> Optional[Tuple[int, ...]]:
+        """
+        returns the newly discounted items as a sorted tuple of product
+        ids, equal for subscribers with the same items, None if there
+        are none.
+        """
+        return self._wishlist_new_discounted or None
+
+    @property
+    def wishlist_all_discounted(self) -> Tuple[str, ...]:
+        """
+        getter for all discounted items in wishlist, in catalogue order.
+        """
+        return self._product_names(self._wishlist_all_discounted)
+
+    @staticmethod
+    def _product_names(product_ids: Tuple[int, ...]) -> Tuple[str, ...]:
+        """
+        turns a sorted tuple of interned product ids back into product
+        names.
+
+        Parameters
+        ----------
+        product_ids: Tuple[int, ...]:
+            product ids.
+        """
+        return tuple(Products.get_product_name(product_id)
+                     for product_id in product_ids)
+
+    def attach_observer(self, observer: Any) -> None:
+        """
+        registers an observer whose product index has to follow
+        changes to this wishlist.
+
+        Parameters
+        ----------
+        observer: Observer:
+            observer this subscriber was added to.
+        """
+        self._observers += (observer,)
+
+    def detach_observer(self, observer: Any) -> None:
+        """
+        stops forwarding wishlist changes to an observer.
+
+        Parameters
+        ----------
+        observer: Observer:
+            observer this subscriber was removed from.
+        """
+        observers = list(self._observers)
+        observers.remove(observer)
+        self._observers = tuple(observers)
+
+    def in_wishlist(self, product: str) -> bool:
+        """
+        returns True if product is in wishlist.
+
+        Parameters
+        ----------
+        product: str:
+            product to look up.
+        """
+        product_id = Products.get_product_id(product)
+        return product_id is not None and _contains(self._wishlist,
+                                                    product_id)
+
     def add_to_wishlist(self, product: str) -> None:
         """
         adds a product to wishlist.
@@ -98,10 +259,13 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be added to wishlist.
         """
-        if product in Products.get_products():
-            self.wishlist.append(product)
-        else:
+        product_id = Products.get_product_id(product)
+        if product_id is None:
             print(f'{product} is not in products, no action')
+            return
+        self._wishlist = _insert(self._wishlist, product_id)
+        for observer in self._observers:
+            observer.index_wishlist_item(self, product_id)
 
     def remove_from_wishlist(self, product: str) -> None:
         """
@@ -112,8 +276,11 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be removed from wishlist.
         """
-        if product in self.wishlist:
-            self.wishlist.remove(product)
+        if self.in_wishlist(product):
+            product_id = Products.get_product_id(product)
+            self._wishlist = _delete(self._wishlist, product_id)
+            for observer in self._observers:
+                observer.unindex_wishlist_item(self, product_id)
         else:
             print(f'{product} did not exist in wishlist, not removed.')
 
@@ -126,10 +293,12 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be added to newly discounted items in wishlist.
         """
-        if product in Products.get_products():
-            self.wishlist_new_discounted.append(product)
-        else:
+        product_id = Products.get_product_id(product)
+        if product_id is None:
             print(f'{product} is not in products, no action')
+            return
+        self._wishlist_new_discounted = _insert(
+            self._wishlist_new_discounted, product_id)
 
     def remove_from_wishlist_new_discounted(self, product: str) -> None:
         """
@@ -140,10 +309,16 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be removed from newly discounted items in wishlist.
         """
-        if product in self.wishlist:
-            self.wishlist_new_discounted.remove(product)
-        else:
+        if not self.in_wishlist(product):
             print(f'{product} did not exist in wishlist, not removed.')
+            return
+        product_id = Products.get_product_id(product)
+        if not _contains(self._wishlist_new_discounted, product_id):
+            print(f'{product} did not exist in newly discounted items, '
+                  'not removed.')
+            return
+        self._wishlist_new_discounted = _delete(
+            self._wishlist_new_discounted, product_id)
 
     def add_to_wishlist_all_discounted(self, product: str) -> None:
         """
@@ -154,10 +329,12 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be added to all discounted items in wishlist.
         """
-        if product in Products.get_products():
-            self.wishlist_all_discounted.append(product)
-        else:
+        product_id = Products.get_product_id(product)
+        if product_id is None:
             print(f'{product} is not in products, no action')
+            return
+        self._wishlist_all_discounted = _insert(
+            self._wishlist_all_discounted, product_id)
 
     def remove_from_wishlist_all_discounted(self, product: str) -> None:
         """
@@ -168,31 +345,130 @@ class DiscountSubscriber(Subscriber):
         product: str:
             product to be removed from all discounted items in wishlist.
         """
-        if product in self.wishlist:
-            self.wishlist_all_discounted.remove(product)
-        else:
+        if not self.in_wishlist(product):
             print(f'{product} did not exist in wishlist, not removed.')
+            return
+        product_id = Products.get_product_id(product)
+        if not _contains(self._wishlist_all_discounted, product_id):
+            print(f'{product} did not exist in all discounted items, '
+                  'not removed.')
+            return
+        self._wishlist_all_discounted = _delete(
+            self._wishlist_all_discounted, product_id)
 
-    def clean_up_wishlist(self) -> None:
+    def archive_wishlist_new_discounted(self) -> None:
+        """
+        moves newly discounted items to all discounted items,
+        once they have been announced to the subscriber.
+        """
+        if not self._wishlist_new_discounted:
+            return
+        self._wishlist_all_discounted = tuple(sorted(
+            set(self._wishlist_all_discounted)
+            | set(self._wishlist_new_discounted)))
+        self._wishlist_new_discounted = ()
+
+    def drop_discounted(self, product_id: int) -> None:
+        """
+        forgets an expired discount of a wishlist item, whether it was
+        announced yet or not.
+
+        Parameters
+        ----------
+        product_id: int:
+            interned id of the product whose discount ended.
+        """
+        self._wishlist_new_discounted = _delete(
+            self._wishlist_new_discounted, product_id)
+        self._wishlist_all_discounted = _delete(
+            self._wishlist_all_discounted, product_id)
+
+    def clean_up_wishlist(self, products: Products = Products) -> None:
         """
         removes items that aren't discounted in products from
         all discounted wishlist items list.
+
+        this is a full pass over the subscriber, DiscountReconciler
+        (services.reconciler) keeps the list up to date as discounts end.
+
+        Parameters
+        ----------
+        products: Products:
+            discount state to check, the Products class or an instance.
+        """
+        discounted = []
+        for product_id in self._wishlist_all_discounted:
+            product = Products.get_product_name(product_id)
+            if (products.is_new_discount(product)
+                    or products.is_old_discount(product)):
+                discounted.append(product_id)
+        self._wishlist_all_discounted = tuple(discounted)
+
+
+class ChannelSubscriber(Subscriber):
+    """
+    subscriber of an event bus channel, known by name and email.
+    """
+    __slots__ = ('_name', '_email', '__weakref__')
+
+    def __init__(self, name: str, email: str) -> None:
+        self.name = name
+        self.email = email
+
+    @property
+    def name(self) -> str:
+        """
+        getter for name attribute.
+        """
+        return self._name
+
+    @name.setter
+    def name(self, new_name: str) -> None:
         """
-        for item in self.wishlist_all_discounted:
-            if item not in [Products.get_old_discounts() +
-                            Products.get_new_discounts()]:
-                self.wishlist_all_discounted.remove(item)
+        sets a new value for name.
+        raises value error if not a string.
+
+        Parameters
+        ----------
+        new_name: str:
+            new value for name.
+        """
+        if not isinstance(new_name, str):
+            raise ValueError('names can only be strings.')
+        self._name = new_name
+
+    @property
+    def email(self) -> str:
+        """
+        getter for email attribute.
+        """
+        return self._email
+
+    @email.setter
+    def email(self, new_email: str) -> None:
+        """
+        sets a new value for email.
+        raises value error if not a string.
+
+        Parameters
+        ----------
+        new_email: str:
+            new value for email.
+        """
+        if not isinstance(new_email, str):
+            raise ValueError('email has to be a string.')
+        self._email = new_email
 
 
-class ArticleSubscriber(Subscriber):
+class ArticleSubscriber(ChannelSubscriber):
     """
     concrete implementation of Subscriber interface, monitoring articles.
     """
-    pass
+    __slots__ = ()
 
 
-class SecuritySubscriber(Subscriber):
+class SecuritySubscriber(ChannelSubscriber):
     """
     concrete implementation of Subscriber interface, monitoring security.
     """
-    pass
+    __slots__ = ()
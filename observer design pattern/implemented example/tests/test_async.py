@@ -0,0 +1,71 @@
+"""
+behaviour of AsyncEMail and AsyncDiscountObserver.
+run from the example directory: python -m pytest
+"""
+import asyncio
+import time
+import unittest
+
+from services.email import AsyncEMail, EMail, MemoryTransport, PrintTransport
+from services.observer import AsyncDiscountObserver
+from services.subscriber import DiscountSubscriber
+
+
+class TestAsyncEMail(unittest.TestCase):
+    def tearDown(self) -> None:
+        AsyncEMail.close()
+        EMail.set_transport(PrintTransport)
+
+    def test_slow_recipient_does_not_hold_up_the_others(self):
+        class SlowTransport(MemoryTransport):
+            def send(self, email, message):
+                if email == 'slow@foo.bar':
+                    time.sleep(0.5)
+        EMail.set_transport(SlowTransport)
+        messages = [('slow@foo.bar', 'hi')] + [
+            (f'user{i}@foo.bar', 'hi') for i in range(50)]
+        start = time.perf_counter()
+        report = asyncio.run(AsyncEMail.send_many(messages, concurrency=100))
+        self.assertEqual(report.sent, 51)
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+
+class TestAsyncDiscountObserver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.observer = AsyncDiscountObserver()
+        self.subscribers = [DiscountSubscriber(f'user{i}',
+                                               f'user{i}@foo.bar', ['ps5'])
+                            for i in range(3)]
+        self.observer.add_many(self.subscribers)
+        self.sent = []
+        self.failures = {'user0@foo.bar': 1}
+
+        async def sender(email, message):
+            if self.failures.get(email):
+                self.failures[email] -= 1
+                raise OSError('recipient refused')
+            self.sent.append(email)
+        AsyncEMail.set_sender(sender)
+        self.addCleanup(AsyncEMail.set_sender, None)
+
+    def test_failed_recipients_stay_pending_and_are_retried(self):
+        asyncio.run(self.observer.update(['ps5']))
+        report = asyncio.run(self.observer.notify_subscriber())
+        self.assertEqual(report.sent, 2)
+        self.assertEqual([email for email, _ in report.failed],
+                         ['user0@foo.bar'])
+        self.assertEqual(self.subscribers[0].wishlist_new_discounted,
+                         ('ps5',))
+        self.assertEqual(self.subscribers[0].wishlist_all_discounted, ())
+        self.assertEqual(self.subscribers[1].wishlist_all_discounted,
+                         ('ps5',))
+        report = asyncio.run(self.observer.notify_subscriber())
+        self.assertEqual((report.sent, report.failed), (1, []))
+        self.assertEqual(self.sent, ['user1@foo.bar', 'user2@foo.bar',
+                                     'user0@foo.bar'])
+        self.assertEqual(self.subscribers[0].wishlist_all_discounted,
+                         ('ps5',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+behaviour of DiscountObserver registration, matching and notification.
+run from the example directory: python -m pytest
+"""
+import unittest
+
+from services.email import EMail, MemoryTransport, PrintTransport
+from services.observer import DiscountObserver
+from services.subscriber import DiscountSubscriber
+
+
+class TestObserver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.observer = DiscountObserver()
+        self.ali = DiscountSubscriber('ali', 'ali@foo.bar', ['ps5'])
+        self.bob = DiscountSubscriber('bob', 'bob@foo.bar', ['ps4', 'ps5'])
+        self.observer.add_many([self.ali, self.bob])
+
+    def test_only_wishing_subscribers_are_notified_in_order(self):
+        self.observer.update(['ps4'])
+        self.assertEqual([email for email, _ in
+                          self.observer.iter_notifications()],
+                         ['bob@foo.bar'])
+        self.observer.update(['ps5'])
+        self.assertEqual([email for email, _ in
+                          self.observer.iter_notifications()],
+                         ['ali@foo.bar', 'bob@foo.bar'])
+
+    def test_index_follows_wishlist_changes(self):
+        self.ali.remove_from_wishlist('ps5')
+        self.ali.add_to_wishlist('ps4')
+        self.assertEqual(self.observer.get_wishlist_subscribers('ps5'),
+                         [self.bob])
+        self.assertEqual(self.observer.get_wishlist_subscribers('ps4'),
+                         [self.bob, self.ali])
+
+    def test_removed_subscriber_is_forgotten(self):
+        self.observer.update(['ps5'])
+        self.assertEqual(self.observer.remove_many([self.ali, self.ali]), 1)
+        self.assertEqual(self.observer.get_subscribers(), [self.bob])
+        self.assertEqual(self.observer.get_wishlist_subscribers('ps5'),
+                         [self.bob])
+        self.assertEqual([email for email, _ in
+                          self.observer.iter_notifications()],
+                         ['bob@foo.bar'])
+        with self.assertRaises(ValueError):
+            self.observer.remove_subscriber(self.ali)
+
+
+    def test_unsent_notifications_stay_pending_after_a_failure(self):
+        self.observer.update(['ps5'])
+        notifications = self.observer.iter_notifications()
+        self.assertEqual(next(notifications)[0], 'ali@foo.bar')
+        notifications.close()
+        self.assertEqual([email for email, _ in
+                          self.observer.iter_notifications()],
+                         ['ali@foo.bar', 'bob@foo.bar'])
+        self.assertEqual(list(self.observer.iter_notifications()), [])
+        self.assertEqual(self.bob.wishlist_all_discounted, ('ps5',))
+
+
+    def test_unsent_groups_stay_pending_after_a_failure(self):
+        sent = []
+
+        class FlakyTransport(MemoryTransport):
+            failures = 1
+
+            def send(self, email, message):
+                if email == 'bob@foo.bar' and FlakyTransport.failures:
+                    FlakyTransport.failures -= 1
+                    raise OSError('transport down')
+                sent.append(email)
+        EMail.set_transport(FlakyTransport)
+        self.addCleanup(EMail.set_transport, PrintTransport)
+        self.observer.update(['ps4', 'ps5'])
+        with self.assertRaises(OSError):
+            self.observer.notify_subscriber()
+        self.observer.notify_subscriber()
+        self.assertEqual(sorted(sent), ['ali@foo.bar', 'bob@foo.bar'])
+        self.assertEqual(self.bob.wishlist_all_discounted, ('ps4', 'ps5'))
+        self.assertEqual(list(self.observer.iter_notifications()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+behaviour of NotificationOutbox: deduplication, leases and resuming.
+run from the example directory: python -m pytest
+"""
+import os
+import tempfile
+import unittest
+
+from services.observer import DiscountObserver
+from services.outbox import NotificationOutbox, notification_key
+from services.subscriber import DiscountSubscriber
+
+
+class FakeClock:
+    """
+    clock that only moves when told to.
+    """
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class OutboxTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.outbox = self.make_outbox()
+
+    def tearDown(self) -> None:
+        self.outbox.close()
+        self.directory.cleanup()
+
+    def make_outbox(self, batch_size: int = 500) -> NotificationOutbox:
+        return NotificationOutbox(
+            os.path.join(self.directory.name, 'outbox.db'),
+            batch_size=batch_size, lease=60.0, clock=self.clock)
+
+
+class TestDeduplication(OutboxTestCase):
+    def test_same_key_is_queued_once_while_undelivered(self):
+        messages = [('ali@foo.bar', 'ps5'), ('bob@foo.bar', 'ps5')]
+        self.assertEqual(self.outbox.enqueue(messages, 'c1'), 2)
+        self.assertEqual(self.outbox.enqueue(messages, 'c1'), 0)
+        self.assertEqual(self.outbox.pending(), 2)
+
+    def test_same_key_is_queued_once_while_leased(self):
+        self.outbox.enqueue([('ali@foo.bar', 'ps5')], 'c1')
+        self.outbox.claim(owner='worker')
+        self.assertEqual(self.outbox.enqueue([('ali@foo.bar', 'ps5')],
+                                             'c1'), 0)
+
+    def test_key_is_accepted_again_after_delivery(self):
+        self.outbox.enqueue([('ali@foo.bar', 'ps5')], 'c1')
+        self.outbox.ack(self.outbox.claim(owner='worker'))
+        self.assertEqual(self.outbox.enqueue([('ali@foo.bar', 'ps5')],
+                                             'c1'), 1)
+        self.assertEqual(self.outbox.pending(), 1)
+
+    def test_campaign_separates_keys(self):
+        self.assertNotEqual(notification_key('ali@foo.bar', 'ps5', 'c1'),
+                            notification_key('ali@foo.bar', 'ps5', 'c2'))
+        self.outbox.enqueue([('ali@foo.bar', 'ps5')], 'c1')
+        self.assertEqual(self.outbox.enqueue([('ali@foo.bar', 'ps5')],
+                                             'c2'), 1)
+
+
+class TestLeases(OutboxTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.outbox.enqueue([(f'user{i}@foo.bar', 'ps5')
+                             for i in range(5)], 'c1')
+
+    def test_claim_hands_out_oldest_first_and_only_once(self):
+        first = self.outbox.claim(3, owner='a')
+        second = self.outbox.claim(3, owner='b')
+        self.assertEqual([email for email, _ in first.messages],
+                         [f'user{i}@foo.bar' for i in range(3)])
+        self.assertEqual([email for email, _ in second.messages],
+                         ['user3@foo.bar', 'user4@foo.bar'])
+        self.assertEqual(self.outbox.claim(owner='c').ids, [])
+
+    def test_expired_lease_is_handed_out_again(self):
+        lease = self.outbox.claim(owner='a')
+        self.clock.now += 30
+        self.assertEqual(self.outbox.claim(owner='b').ids, [])
+        self.clock.now += 31
+        self.assertEqual(self.outbox.claim(owner='b').ids, lease.ids)
+
+    def test_ack_of_an_expired_lease_taken_over_is_ignored(self):
+        lease = self.outbox.claim(owner='a')
+        self.clock.now += 61
+        self.outbox.claim(owner='b')
+        self.outbox.ack(lease)
+        self.assertEqual(self.outbox.pending(), 5)
+
+    def test_release_hands_notifications_back(self):
+        lease = self.outbox.claim(owner='a')
+        self.outbox.release(lease)
+        self.assertEqual(self.outbox.claim(owner='b').ids, lease.ids)
+
+    def test_ack_advances_offset_past_contiguous_deliveries(self):
+        first = self.outbox.claim(2, owner='a')
+        second = self.outbox.claim(2, owner='b')
+        self.outbox.ack(second)
+        self.assertEqual(self.outbox.offset(), 0)
+        self.outbox.ack(first)
+        self.assertEqual(self.outbox.offset(), second.ids[-1])
+        self.assertEqual(self.outbox.pending(), 1)
+
+    def test_compact_deletes_delivered_notifications(self):
+        self.outbox.ack(self.outbox.claim(2, owner='a'))
+        self.assertEqual(self.outbox.compact(), 2)
+        self.assertEqual(self.outbox.pending(), 3)
+
+
+class TestDrain(OutboxTestCase):
+    def test_drain_delivers_everything_once(self):
+        self.outbox.enqueue([(f'user{i}@foo.bar', 'ps5')
+                             for i in range(50)], 'c1')
+        sent = []
+        delivered = self.outbox.drain(consumers=3, limit=7, send=sent.extend)
+        self.assertEqual(delivered, 50)
+        self.assertEqual(sorted(sent), sorted(
+            (f'user{i}@foo.bar', 'ps5') for i in range(50)))
+        self.assertEqual(self.outbox.pending(), 0)
+
+    def test_failed_send_is_released_and_resumed(self):
+        self.outbox.enqueue([(f'user{i}@foo.bar', 'ps5')
+                             for i in range(4)], 'c1')
+
+        def fail(messages):
+            raise OSError('transport down')
+        with self.assertRaises(OSError):
+            self.outbox.drain(consumers=1, limit=2, send=fail)
+        self.assertEqual(self.outbox.pending(), 4)
+        sent = []
+        self.assertEqual(self.make_outbox().drain(consumers=1,
+                                                  send=sent.extend), 4)
+
+
+class TestEnqueueNotifications(OutboxTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.observer = DiscountObserver()
+        self.subscribers = [DiscountSubscriber(f'user{i}',
+                                               f'user{i}@foo.bar', ['ps5'])
+                            for i in range(5)]
+        self.observer.add_many(self.subscribers)
+        self.observer.update(['ps5'])
+
+    def test_failed_batch_leaves_its_subscribers_pending(self):
+        outbox = self.make_outbox(batch_size=2)
+        enqueue = outbox.enqueue
+        calls = []
+
+        def flaky(messages, campaign):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise OSError('disk full')
+            return enqueue(messages, campaign)
+        outbox.enqueue = flaky
+        with self.assertRaises(OSError):
+            self.observer.enqueue_notifications(outbox, 'c1')
+        self.assertEqual(outbox.pending(), 2)
+        self.assertEqual([bool(subscriber.wishlist_new_discounted)
+                          for subscriber in self.subscribers],
+                         [False, False, True, True, True])
+        outbox.enqueue = enqueue
+        self.assertEqual(self.observer.enqueue_notifications(outbox, 'c1'),
+                         3)
+        self.assertEqual(outbox.pending(), 5)
+        self.assertEqual(self.observer.enqueue_notifications(outbox, 'c1'),
+                         0)
+
+
+if __name__ == '__main__':
+    unittest.main()
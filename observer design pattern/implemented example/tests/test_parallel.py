@@ -0,0 +1,51 @@
+"""
+behaviour of ProcessPoolDiscountObserver while its workers run.
+run from the example directory: python -m pytest
+"""
+import unittest
+
+from services.parallel import ProcessPoolDiscountObserver
+from services.subscriber import DiscountSubscriber
+
+
+class TestProcessPoolDiscountObserver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.observer = ProcessPoolDiscountObserver(1)
+        self.addCleanup(self.observer.close)
+        self.ali = DiscountSubscriber('ali', 'ali@foo.bar', ['ps5'])
+        self.observer.add_subscriber(self.ali)
+        self.observer.start()
+
+    def recipients(self):
+        return [email for email, _ in self.observer.iter_messages()]
+
+    def test_subscriber_added_while_running_is_notified(self):
+        bob = DiscountSubscriber('bob', 'bob@foo.bar', ['ps4'])
+        self.observer.add_subscriber(bob)
+        self.observer.update(['ps4', 'ps5'])
+        self.assertEqual(sorted(self.recipients()),
+                         ['ali@foo.bar', 'bob@foo.bar'])
+
+    def test_subscriber_removed_while_running_is_not_notified(self):
+        self.observer.update(['ps5'])
+        self.observer.remove_subscriber(self.ali)
+        self.assertEqual(self.recipients(), [])
+        self.observer.update(['ps5'])
+        self.assertEqual(self.recipients(), [])
+
+    def test_wishlist_changes_reach_the_worker(self):
+        self.ali.remove_from_wishlist('ps5')
+        self.ali.add_to_wishlist('ps4')
+        self.observer.update(['ps5'])
+        self.assertEqual(self.recipients(), [])
+        self.observer.update(['ps4'])
+        self.assertEqual(self.recipients(), ['ali@foo.bar'])
+
+    def test_restart_keeps_pending_matches(self):
+        self.observer.update(['ps5'])
+        self.observer.restart()
+        self.assertEqual(self.recipients(), ['ali@foo.bar'])
+
+
+if __name__ == '__main__':
+    unittest.main()
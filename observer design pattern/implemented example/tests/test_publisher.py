@@ -0,0 +1,109 @@
+"""
+behaviour of DiscountPublisher's incremental notifications.
+run from the example directory: python -m pytest
+"""
+import asyncio
+import unittest
+
+from services.observer import AsyncObserver, Observer
+from services.products import Products
+from services.publisher import AsyncDiscountPublisher, DiscountPublisher
+
+
+class RecordingObserver(Observer):
+    """
+    observer remembering every update.
+    """
+    def __init__(self) -> None:
+        self.updates = []
+
+    def update(self, info):
+        self.updates.append(info)
+
+    def add_subscriber(self, subscriber):
+        pass
+
+    def remove_subscriber(self, subscriber):
+        pass
+
+    def notify_subscriber(self):
+        pass
+
+
+class AsyncRecordingObserver(AsyncObserver):
+    """
+    asyncio observer remembering every update.
+    """
+    def __init__(self) -> None:
+        self.updates = []
+
+    async def update(self, info):
+        self.updates.append(info)
+
+    def add_subscriber(self, subscriber):
+        pass
+
+    def remove_subscriber(self, subscriber):
+        pass
+
+    async def notify_subscriber(self):
+        pass
+
+
+class TestIncrementalNotifications(unittest.TestCase):
+    def setUp(self) -> None:
+        self.products = Products()
+        self.observers = [RecordingObserver(), RecordingObserver()]
+        self.publishers = [DiscountPublisher(self.products)
+                           for _ in self.observers]
+        for publisher, observer in zip(self.publishers, self.observers):
+            publisher.add_observer(observer)
+
+    def test_every_publisher_announces_each_discount_once(self):
+        self.products.add_new_discount('ps1')
+        for publisher in self.publishers:
+            publisher.notify_observer()
+            publisher.notify_observer()
+        self.assertEqual([observer.updates for observer in self.observers],
+                         [[['ps1'], []], [['ps1'], []]])
+
+    def test_discount_is_promoted_once_every_publisher_announced_it(self):
+        self.products.add_new_discount('ps1')
+        self.publishers[0].notify_observer()
+        self.assertTrue(self.products.is_new_discount('ps1'))
+        self.publishers[1].notify_observer()
+        self.assertFalse(self.products.is_new_discount('ps1'))
+        self.assertTrue(self.products.is_old_discount('ps1'))
+        self.assertEqual(self.products.get_log_size(), 0)
+
+    def test_publisher_without_observers_does_not_hold_the_log(self):
+        self.publishers[1].remove_observer(self.observers[1])
+        self.products.add_new_discount('ps1')
+        self.publishers[0].notify_observer()
+        self.assertEqual(self.products.get_log_size(), 0)
+
+    def test_ended_and_already_discounted_products_are_skipped(self):
+        self.products.add_old_discount('ps2')
+        self.products.add_new_discounts(['ps1', 'ps2', 'ps3'])
+        self.products.expire_discount('ps3')
+        self.publishers[0].notify_observer()
+        self.assertEqual(self.observers[0].updates, [['ps1']])
+
+    def test_sync_and_async_publishers_share_the_default_products(self):
+        observer = RecordingObserver()
+        async_observer = AsyncRecordingObserver()
+        DiscountPublisher.add_observer(observer)
+        AsyncDiscountPublisher.add_observer(async_observer)
+        self.addCleanup(DiscountPublisher.remove_observer, observer)
+        self.addCleanup(AsyncDiscountPublisher.remove_observer,
+                        async_observer)
+        self.addCleanup(Products.expire_discount, 'ps1')
+        Products.add_new_discount('ps1')
+        DiscountPublisher.notify_observer()
+        asyncio.run(AsyncDiscountPublisher.notify_observer())
+        self.assertEqual(observer.updates, [['ps1']])
+        self.assertEqual(async_observer.updates, [['ps1']])
+
+
+if __name__ == '__main__':
+    unittest.main()
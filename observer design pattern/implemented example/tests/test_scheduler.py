@@ -0,0 +1,57 @@
+"""
+behaviour of NotificationScheduler and observers queueing on it.
+run from the example directory: python -m pytest
+"""
+import unittest
+
+from services.observer import DiscountObserver, ShardedDiscountObserver
+from services.scheduler import NotificationScheduler
+from services.subscriber import DiscountSubscriber
+
+
+class TestClose(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sent = []
+        self.scheduler = NotificationScheduler(send=self.sent.extend)
+        self.scheduler.add_channel('security', priority=1)
+        self.scheduler.add_channel('article')
+
+    def test_close_without_start_sends_the_queues(self):
+        with self.scheduler as scheduler:
+            scheduler.submit('article', 'ali@foo.bar', 'new article')
+            scheduler.submit('security', 'ali@foo.bar', 'alert')
+        self.assertEqual(self.scheduler.depth(),
+                         {'security': 0, 'article': 0})
+        self.assertEqual(self.sent, [('ali@foo.bar', 'alert'),
+                                     ('ali@foo.bar', 'new article')])
+
+    def test_close_after_start_sends_the_queues(self):
+        self.scheduler.start()
+        self.scheduler.submit('article', 'ali@foo.bar', 'new article')
+        self.scheduler.close()
+        self.assertEqual(self.sent, [('ali@foo.bar', 'new article')])
+
+
+class TestObserverScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = NotificationScheduler(send=lambda batch: None)
+        self.scheduler.add_channel('discount')
+
+    def test_instances_do_not_inherit_the_class_scheduler(self):
+        DiscountObserver.set_scheduler(self.scheduler)
+        self.addCleanup(DiscountObserver.set_scheduler, None)
+        self.assertIsNone(DiscountObserver().scheduler)
+        self.assertIs(DiscountObserver.scheduler, self.scheduler)
+
+    def test_sharded_observer_queues_every_shard(self):
+        observer = ShardedDiscountObserver(3)
+        observer.set_scheduler(self.scheduler)
+        observer.add_subscriber(DiscountSubscriber('ali', 'ali@foo.bar',
+                                                   ['ps5']))
+        observer.update(['ps5'])
+        observer.notify_subscriber()
+        self.assertEqual(self.scheduler.depth(), {'discount': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+behaviour of DiscountSubscriber wishlists.
+run from the example directory: python -m pytest
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from services.subscriber import DiscountSubscriber
+
+
+class TestWishlist(unittest.TestCase):
+    def test_wishlist_is_read_only(self):
+        subscriber = DiscountSubscriber('ali', 'ali@foo.bar', ['ps5'])
+        with self.assertRaises(AttributeError):
+            subscriber.wishlist.append('ps4')
+        self.assertEqual(subscriber.wishlist, ('ps5',))
+
+    def test_wishlist_changes_keep_catalogue_order(self):
+        subscriber = DiscountSubscriber('ali', 'ali@foo.bar', ['ps5', 'ps1'])
+        self.assertEqual(subscriber.wishlist, ('ps1', 'ps5'))
+        subscriber.add_to_wishlist('ps4')
+        subscriber.add_to_wishlist('ps4')
+        self.assertEqual(subscriber.wishlist, ('ps1', 'ps4', 'ps5'))
+        subscriber.remove_from_wishlist('ps1')
+        self.assertEqual(subscriber.wishlist, ('ps4', 'ps5'))
+
+    def test_discounted_items_keep_catalogue_order(self):
+        subscriber = DiscountSubscriber('ali', 'ali@foo.bar',
+                                        ['ps1', 'ps4', 'ps5'])
+        subscriber.add_to_wishlist_new_discounted('ps5')
+        subscriber.add_to_wishlist_new_discounted('ps1')
+        self.assertEqual(subscriber.wishlist_new_discounted, ('ps1', 'ps5'))
+        subscriber.archive_wishlist_new_discounted()
+        self.assertEqual(subscriber.wishlist_new_discounted, ())
+        self.assertEqual(subscriber.wishlist_all_discounted, ('ps1', 'ps5'))
+
+    def test_unknown_product_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DiscountSubscriber('ali', 'ali@foo.bar', ['no such product'])
+
+    def test_removing_an_item_that_is_not_discounted_says_so(self):
+        subscriber = DiscountSubscriber('ali', 'ali@foo.bar', ['ps4', 'ps5'])
+        subscriber.add_to_wishlist_new_discounted('ps5')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            subscriber.remove_from_wishlist_new_discounted('ps4')
+            subscriber.remove_from_wishlist_all_discounted('ps4')
+            subscriber.remove_from_wishlist_new_discounted('ps1')
+        self.assertEqual(output.getvalue().splitlines(), [
+            'ps4 did not exist in newly discounted items, not removed.',
+            'ps4 did not exist in all discounted items, not removed.',
+            'ps1 did not exist in wishlist, not removed.'])
+        subscriber.remove_from_wishlist_new_discounted('ps5')
+        self.assertEqual(subscriber.wishlist_new_discounted, ())
+
+
+if __name__ == '__main__':
+    unittest.main()